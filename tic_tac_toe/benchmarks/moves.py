@@ -0,0 +1,205 @@
+"""
+Times the AI moves on the canonical positions, so the performance can be
+compared between the commits.
+
+    python -m benchmarks.moves --repeat 10 --output results.json
+    python -m benchmarks.moves --compare results.json
+
+Every run makes a new AI, so the search caches are empty, and the first
+warmup runs of every case are not counted.
+"""
+import argparse
+import json
+import math
+import platform
+import statistics
+import sys
+import time
+
+from tic.ai import (MinimaxAI, SimpleAI, configure_ai,
+                    get_heuristic_ai_class)
+from tic.game import Game
+
+# Positions by the board config, as lines, columns and win count. The AI
+# plays 'o' and is to move.
+POSITIONS = {
+    (3, 3, 3): {
+        'empty': ['...', '...', '...'],
+        'corner': ['x..', '...', '...'],
+        'fork': ['x..', '.o.', '..x'],
+    },
+    (4, 4, 3): {
+        'empty': ['....', '....', '....', '....'],
+        'center': ['....', '.x..', '....', '....'],
+    },
+    (4, 4, 4): {
+        'opening': ['x...', '.o..', '..x.', '....'],
+        'middle': ['xo..', '.xo.', '..x.', '....'],
+    },
+    (5, 5, 4): {
+        'empty': ['.....'] * 5,
+        'opening': ['.....', '.x...', '..o..', '...x.', '.....'],
+    },
+}
+
+# Engines by name, and the board configs they finish on in a reasonable
+# time, None for all of them.
+ENGINES = {
+    'simple': (SimpleAI, None),
+    'minimax': (MinimaxAI, [(3, 3, 3), (4, 4, 3), (4, 4, 4)]),
+    'heuristic-2': (get_heuristic_ai_class(2), None),
+    'heuristic-3': (get_heuristic_ai_class(3), None),
+    'heuristic-4': (get_heuristic_ai_class(4), None),
+}
+
+
+def percentile(values, percent):
+    """
+    Returns the nearest-rank percentile of the values.
+    """
+    values = sorted(values)
+    rank = max(1, math.ceil(percent / 100 * len(values)))
+    return values[rank - 1]
+
+
+def time_move(ai_class, config, state):
+    """
+    Returns seconds the new AI took on the move and the number of searched
+    positions, None for the AIs which don't search.
+    """
+    game = Game(*config)
+    game.state = state
+    ai = configure_ai(ai_class, collect_stats=True)(game, game.ai_piece)
+    start = time.perf_counter()
+    ai.next_move()
+    elapsed = time.perf_counter() - start
+    if ai.stats.source is None:
+        return elapsed, None
+    return elapsed, ai.stats.nodes
+
+
+def run_case(engine, config, position, repeat=5, warmup=1):
+    """
+    Returns the result of the engine on the position.
+    """
+    ai_class = ENGINES[engine][0]
+    state = POSITIONS[config][position]
+    for _ in range(warmup):
+        time_move(ai_class, config, state)
+    times, nodes = [], []
+    for _ in range(repeat):
+        elapsed, count = time_move(ai_class, config, state)
+        times.append(elapsed)
+        nodes.append(count)
+    total = sum(times)
+    searched = None not in nodes
+    return {
+        'engine': engine,
+        'board': '{}x{}x{}'.format(*config),
+        'position': position,
+        'runs': repeat,
+        'median': statistics.median(times),
+        'p95': percentile(times, 95),
+        'nodes': int(statistics.median(nodes)) if searched else None,
+        'nodes_per_second': (sum(nodes) / total
+                             if searched and total else None),
+    }
+
+
+def cases(engines=None, boards=None):
+    """
+    Yields engine, config and position of every case to run.
+    """
+    for engine, (_, configs) in sorted(ENGINES.items()):
+        if engines and engine not in engines:
+            continue
+        for config, positions in sorted(POSITIONS.items()):
+            if configs is not None and config not in configs:
+                continue
+            if boards and '{}x{}x{}'.format(*config) not in boards:
+                continue
+            for position in sorted(positions):
+                yield engine, config, position
+
+
+def run(engines=None, boards=None, repeat=5, warmup=1):
+    """
+    Runs the cases and returns the report.
+    """
+    results = [run_case(engine, config, position, repeat, warmup)
+               for engine, config, position in cases(engines, boards)]
+    return {
+        'python': platform.python_version(),
+        'machine': platform.machine(),
+        'time': time.strftime('%Y-%m-%dT%H:%M:%S'),
+        'results': results,
+    }
+
+
+def compare(old, new):
+    """
+    Yields the case and the ratio of the new median to the old one, for the
+    cases in both reports.
+    """
+    def by_case(report):
+        return {(result['engine'], result['board'], result['position']):
+                result for result in report['results']}
+
+    old_results = by_case(old)
+    for case, result in sorted(by_case(new).items()):
+        if case in old_results and old_results[case]['median']:
+            yield case, result['median'] / old_results[case]['median']
+
+
+def print_report(report, out=sys.stdout):
+    out.write('{:<12} {:<8} {:<8} {:>10} {:>10} {:>10} {:>12}\n'.format(
+        'engine', 'board', 'position', 'median ms', 'p95 ms', 'nodes',
+        'nodes/s'))
+    for result in report['results']:
+        nodes, nodes_per_second = result['nodes'], result['nodes_per_second']
+        out.write('{:<12} {:<8} {:<8} {:>10.2f} {:>10.2f} {:>10} {:>12}\n'
+                  .format(result['engine'], result['board'],
+                          result['position'], result['median'] * 1000,
+                          result['p95'] * 1000,
+                          '-' if nodes is None else nodes,
+                          '-' if nodes_per_second is None
+                          else int(nodes_per_second)))
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(
+        description="Times the AI moves of the tic-tac-toe engines."
+    )
+    parser.add_argument('--engine', '-e', dest='engines', action='append',
+                        choices=sorted(ENGINES),
+                        help="engine to time, may be repeated (default all)")
+    parser.add_argument('--board', '-b', dest='boards', action='append',
+                        help="board config like 4x4x3 to time, may be "
+                             "repeated (default all)")
+    parser.add_argument('--repeat', '-r', dest='repeat', type=int,
+                        default=5, help="timed runs of every case "
+                                        "(default 5)")
+    parser.add_argument('--warmup', dest='warmup', type=int, default=1,
+                        help="runs of every case before timing (default 1)")
+    parser.add_argument('--output', '-o', dest='output', default=None,
+                        help="file to write the JSON report to")
+    parser.add_argument('--compare', dest='compare', default=None,
+                        help="JSON report of an earlier run to compare the "
+                             "medians with")
+    args = parser.parse_args()
+
+    if args.repeat <= 0 or args.warmup < 0:
+        print("Number of runs should be positive.")
+        exit(1)
+
+    report = run(args.engines, args.boards, args.repeat, args.warmup)
+    print_report(report)
+    if args.output:
+        with open(args.output, 'w') as output:
+            json.dump(report, output, indent=2)
+    if args.compare:
+        with open(args.compare) as old_file:
+            old = json.load(old_file)
+        for (engine, board, position), ratio in compare(old, report):
+            print("{} {} {}: {:.2f}x the old median".format(
+                engine, board, position, ratio))
@@ -1,9 +1,11 @@
+import time
 import unittest
 from unittest import mock
 
 from tic import ai
+from tic.board import Board
 from tic.game import Game
-from tic.exceptions import NoLegalMoveError
+from tic.exceptions import NoLegalMoveError, SearchAborted
 
 
 class DefaultAITest(unittest.TestCase):
@@ -73,27 +75,26 @@ class MinimaxAITest(unittest.TestCase):
         self.assertRaises(NoLegalMoveError, self.ai.next_move)
 
     def test_score(self):
-        self.game.get_winner = mock.Mock()
-        self.game.get_winner.return_value = "ai"
-        self.assertEqual(self.ai.score("fake", 0), self.ai.max_score)
-        self.game.get_winner.return_value = "player"
-        self.assertEqual(self.ai.score("fake", 0), self.ai.min_score)
-        self.game.get_winner.return_value = None
-        self.assertEqual(self.ai.score("fake", 0), 0)
+        board = Board.from_state(['ooo', 'xx.', '...'], 3)
+        self.assertEqual(self.ai.score(board, 0), self.ai.max_score)
+        board = Board.from_state(['oo.', 'xxx', 'o..'], 3)
+        self.assertEqual(self.ai.score(board, 0), self.ai.min_score)
+        board = Board.from_state(['oo.', 'xx.', '...'], 3)
+        self.assertEqual(self.ai.score(board, 0), 0)
 
     def test_next_move(self):
         self.game = Game(3, 3)
         self.ai = ai.MinimaxAI(self.game, 'o')
         self.assertIn(self.ai.next_move(),
                       [(0, 0), (1, 1), (2, 2), (0, 2), (2, 0)])
-        self.game._state = [
+        self.game.state = [
             ['o', 'x', '.'],
             ['.', '.', '.'],
             ['.', '.', '.']
         ]
         self.assertIn(self.ai.next_move(),
                       [(1, 1), (2, 0), (1, 0)])
-        self.game._state = [
+        self.game.state = [
             ['o', '.', 'x'],
             ['.', '.', '.'],
             ['.', '.', '.']
@@ -101,6 +102,115 @@ class MinimaxAITest(unittest.TestCase):
         self.assertIn(self.ai.next_move(),
                       [(1, 1), (2, 0), (1, 0)])
 
+    def test_next_move_small_cache(self):
+        for policy in ['always', 'lru', 'depth']:
+            ai_class = type('SmallCacheAI', (ai.MinimaxAI,), {
+                'cache_entries': 20, 'cache_policy': policy})
+            self.game = Game(3, 3)
+            self.game.state = ['ox.', '...', '...']
+            self.ai = ai_class(self.game, 'o')
+            self.assertIn(self.ai.next_move(), [(1, 1), (2, 0), (1, 0)])
+            self.assertLessEqual(len(self.ai._cache), 20)
+            self.assertGreater(self.ai.cache_stats()['search']['evictions'],
+                               0)
+
+    def test_cache_kept_between_moves(self):
+        self.game = Game(3, 3)
+        self.game.start(ai_class=ai.MinimaxAI, player_first=True)
+        self.game.make_move(1, 1)
+        cache = self.game._ai._cache
+        hits = cache.hits
+        self.game.make_move(3, 3)
+        self.assertIs(self.game._ai._cache, cache)
+        self.assertGreater(cache.hits, hits)
+        ply = self.game.board.pieces - 1
+        self.assertTrue(all(entry.ply >= ply
+                            for entry in cache._entries.values()))
+
+    def test_next_move_from_symmetric_cache(self):
+        self.game = Game(3, 3)
+        self.ai = ai.MinimaxAI(self.game, 'o')
+        self.game.state = ['xo.', '...', '...']
+        self.ai.next_move()
+        self.game.state = ['...', '...', '.ox']
+        self.assertIn(self.ai.next_move(), [(1, 1), (0, 2), (1, 2)])
+
+    def test_cache_not_kept(self):
+        ai_class = type('FreshCacheAI', (ai.MinimaxAI,),
+                        {'keep_cache': False})
+        self.game = Game(3, 3)
+        self.game.start(ai_class=ai_class, player_first=True)
+        self.game.make_move(1, 1)
+        cache = self.game._ai._cache
+        self.game.make_move(3, 3)
+        self.assertIsNot(self.game._ai._cache, cache)
+
+    def test_shared_cache(self):
+        ai_class = type('SharedCacheAI', (ai.MinimaxAI,),
+                        {'shared_cache': True})
+        self.game = Game(3, 3)
+        self.game.start(ai_class=ai_class, player_first=False)
+        cache = self.game._ai._cache
+        self.game.start(ai_class=ai_class, player_first=False)
+        self.assertIs(self.game._ai._cache, cache)
+        self.assertGreater(cache.hits, 0)
+        other = Game(3, 4)
+        other.start(ai_class=ai_class, player_first=False)
+        self.assertIsNot(other._ai._cache, cache)
+
+    def test_order_moves(self):
+        board = Board.from_state(['xx.', '.o.', 'o..'], 3)
+        self.ai = ai.MinimaxAI(Game(3, 3), 'o')
+        moves = self.ai.order_moves(board, True)
+        self.assertListEqual(moves[:2], [2, 3])
+        self.assertSetEqual(set(moves), {2, 3, 5, 7, 8})
+        moves = self.ai.order_moves(board, False, first=8)
+        self.assertListEqual(moves[:2], [8, 2])
+
+    def test_order_moves_in_neighbourhood(self):
+        ai_class = ai.configure_ai(ai.MinimaxAI, neighbourhood=1)
+        self.ai = ai_class(Game(7, 7, 3), 'o')
+        board = Board.from_state(['.......', '.......', '..x....',
+                                  '.......', '.......', '.......',
+                                  '......o'], 3)
+        moves = self.ai.order_moves(board, True)
+        self.assertSetEqual(set(moves), {8, 9, 10, 15, 17, 22, 23, 24,
+                                         40, 41, 47})
+        empty = Board(board.geometry)
+        self.assertListEqual(self.ai.order_moves(empty, True), [24])
+
+    def test_order_moves_on_sparse_board(self):
+        ai_class = ai.configure_ai(ai.MinimaxAI, neighbourhood=1)
+        game = Game(40, 40, 5, sparse=True)
+        self.ai = ai_class(game, 'o')
+        geometry = game.board.geometry
+        board = game.board.play(geometry.index(20, 20), False)
+        moves = self.ai.order_moves(board, True)
+        self.assertEqual(len(moves), 8)
+        self.assertEqual(moves[0], geometry.index(19, 19))
+        self.assertListEqual(self.ai.order_moves(game.board, True),
+                             [geometry.index(19, 19)])
+        # The order of all the cells is never needed.
+        self.assertNotIn('center_order', vars(geometry))
+
+    def test_minimax_equals_full_search(self):
+        def full_search(board, ai_move, depth):
+            depth += 1
+            if board.is_game_over():
+                return self.ai.score(board, depth)
+            scores = [full_search(board.play(index, ai_move),
+                                  not ai_move, depth)
+                      for index in board.moves()]
+            return max(scores) if ai_move else min(scores)
+
+        self.ai = ai.MinimaxAI(Game(3, 3), 'o')
+        states = [['x..', '...', '...'], ['x..', '.o.', '..x'],
+                  ['xo.', '.x.', '...'], ['.x.', 'o..', '.x.']]
+        for state in states:
+            board = Board.from_state(state, 3)
+            self.assertEqual(self.ai.minimax(board, True, 0)[0],
+                             full_search(board, True, 0), state)
+
 
 class HeuristicAITest(unittest.TestCase):
 
@@ -116,37 +226,50 @@ class HeuristicAITest(unittest.TestCase):
             '.x.o.',
             'o....',
         ]
-        score = self.ai.score(depth=0, ai_move=False, state=state)
+        board = self.game.get_board(state)
+        score = self.ai.score(depth=0, ai_move=False, board=board)
         self.assertEqual(score, -10000)
-        score = self.ai.score(depth=0, ai_move=True, state=state)
+        score = self.ai.score(depth=0, ai_move=True, board=board)
         self.assertEqual(score, -10000)
 
     def test_score_3_with_open_ends(self):
-        self.game._state = [
+        self.game.state = [
             ['.', '.', '.', '.', '.'],
             ['.', 'x', 'o', 'x', '.'],
             ['.', 'o', 'x', '.', '.'],
             ['.', 'x', '.', 'o', '.'],
             ['.', '.', '.', '.', '.'],
         ]
-        score = self.ai.score(depth=0, ai_move=True, state=self.game.state)
+        score = self.ai.score(depth=0, ai_move=True, board=self.game.board)
         self.assertEqual(score, -2998)
-        score = self.ai.score(depth=0, ai_move=False, state=self.game.state)
+        score = self.ai.score(depth=0, ai_move=False, board=self.game.board)
         self.assertEqual(score, -2998)
 
     def test_score_one_better_state(self):
-        self.game._state = [
+        self.game.state = [
             ['.', '.', '.', '.', '.'],
             ['.', 'x', '.', 'x', '.'],
             ['.', 'o', 'o', '.', '.'],
             ['.', 'o', 'x', '.', '.'],
             ['.', '.', '.', '.', '.'],
         ]
-        score = self.ai.score(depth=0, ai_move=True, state=self.game.state)
+        score = self.ai.score(depth=0, ai_move=True, board=self.game.board)
         self.assertEqual(score, 2002)
-        score = self.ai.score(depth=0, ai_move=False, state=self.game.state)
+        score = self.ai.score(depth=0, ai_move=False, board=self.game.board)
         self.assertEqual(score, 2)
 
+    def test_scores(self):
+        states = [
+            ['....x', '.xox.', '.ox..', '.x.o.', 'o....'],
+            ['.....', '.x.x.', '.oo..', '.ox..', '.....'],
+            ['.....', '.....', '.....', '.....', '.....'],
+        ]
+        boards = [self.game.get_board(state) for state in states]
+        for ai_move in (True, False):
+            self.assertListEqual(
+                self.ai.scores(boards, ai_move, 2),
+                [self.ai.score(board, ai_move, 2) for board in boards])
+
     def test_minimax_game_over(self):
         state = [
             '....x',
@@ -155,19 +278,251 @@ class HeuristicAITest(unittest.TestCase):
             '.x.o.',
             'o....',
         ]
+        board = self.game.get_board(state)
         with mock.patch('tic.ai.HeuristicAI.score') as score:
-            self.ai.minimax(state, True, 0)
-        score.assert_called_with(state, True, 0)
+            self.ai.minimax(board, True, 0)
+        score.assert_called_with(board, True, 0)
 
     def test_minimax_too_big_depth(self):
         with mock.patch('tic.ai.HeuristicAI.score') as score:
-            self.ai.minimax(self.game.state, True, self.ai.max_depth)
-        score.assert_called_with(self.game.state, True, self.ai.max_depth)
+            self.ai.minimax(self.game.board, True, self.ai.max_depth)
+        score.assert_called_with(self.game.board, True, self.ai.max_depth)
+
+    def test_neighbourhood(self):
+        ai_class = ai.configure_ai(ai.get_heuristic_ai_class(2),
+                                   neighbourhood=1)
+        game = Game(9, 9, 4)
+        game.state = ['.........', '.........', '.........', '...xx....',
+                      '....o....', '.........', '.........', '.........',
+                      '.........']
+        heuristic = ai_class(game, 'o')
+        line, column = heuristic.next_move()
+        self.assertTrue(2 <= line <= 5 and 2 <= column <= 6)
+        self.assertFalse(heuristic._neighbourhood._history)
 
     def test_minimax(self):
         with mock.patch('tic.ai.MinimaxAI.minimax') as minimax:
-            self.ai.minimax(self.game.state, True, 0)
-        minimax.assert_called_with(self.game.state, True, 0)
+            self.ai.minimax(self.game.board, True, 0)
+        minimax.assert_called_with(self.game.board, True, 0,
+                                   -ai.INF, ai.INF)
+
+
+class ConfigureAITest(unittest.TestCase):
+
+    def test_configure_ai(self):
+        ai_class = ai.configure_ai(ai.MinimaxAI, book='opening.book',
+                                   keep_cache=False)
+        self.assertTrue(issubclass(ai_class, ai.MinimaxAI))
+        self.assertEqual(ai_class.book, 'opening.book')
+        self.assertEqual(ai_class.keep_cache, False)
+        self.assertIsNone(ai.MinimaxAI.book)
+
+
+class IterativeDeepeningTest(unittest.TestCase):
+
+    def setUp(self):
+        self.game = Game(5, 5, 4)
+        self.game.state = ['.....', '.....', '..x..', '.....', '.....']
+
+    def test_think_time(self):
+        ai_class = ai.get_heuristic_ai_class(None, think_time=0.2)
+        self.ai = ai_class(self.game, 'o')
+        start = time.monotonic()
+        line, column = self.ai.next_move()
+        self.assertLess(time.monotonic() - start, 1)
+        self.assertEqual(self.game.state[line][column], '.')
+
+    def test_max_nodes(self):
+        ai_class = ai.get_heuristic_ai_class(None, max_nodes=500)
+        self.ai = ai_class(self.game, 'o')
+        line, column = self.ai.next_move()
+        self.assertEqual(self.game.state[line][column], '.')
+        self.assertLessEqual(self.ai._nodes, 501)
+
+    def test_finds_best_move_of_max_depth(self):
+        ai_class = ai.get_heuristic_ai_class(3, max_nodes=10**6)
+        self.ai = ai_class(self.game, 'o')
+        move = self.game.board.geometry.index(*self.ai.next_move())
+
+        fixed = ai.get_heuristic_ai_class(3)(self.game, 'o')
+        board = self.game.board
+        fixed._root_depth = board.pieces
+        best = fixed.minimax(board, True, board.pieces)[0]
+        score = fixed.minimax(board.play(move, True), False,
+                              board.pieces + 1)[0]
+        self.assertEqual(score, best)
+
+    def test_no_depth_limit(self):
+        game = Game(3, 3)
+        game.start(ai_class=ai.get_heuristic_ai_class(None),
+                   player_first=True)
+        game.make_move(1, 1)
+        self.assertEqual(game.board.pieces, 2)
+        game.state = ['x..', '.o.', '..x']
+        self.assertIn(ai.get_heuristic_ai_class(None)(game, 'o').next_move(),
+                      [(0, 1), (1, 0), (1, 2), (2, 1)])
+
+    def test_budget_is_reset(self):
+        ai_class = ai.get_heuristic_ai_class(2, max_nodes=100)
+        self.ai = ai_class(self.game, 'o')
+        self.ai.next_move()
+        self.assertIsNone(self.ai._node_limit)
+        self.assertEqual(self.ai._depth_limit, 2)
+
+
+class ParallelSearchTest(unittest.TestCase):
+
+    def assertSameMove(self, ai_class, game, states):
+        parallel_class = ai.configure_ai(ai_class, workers=2)
+        for state in states:
+            game.state = state
+            serial = ai_class(game, 'o').next_move()
+            self.assertEqual(parallel_class(game, 'o').next_move(), serial,
+                             state)
+
+    def test_minimax(self):
+        self.assertSameMove(ai.MinimaxAI, Game(3, 3), [
+            ['...', '...', '...'], ['x..', '...', '...'],
+            ['xo.', '.x.', '...'], ['x..', '.o.', '..x'],
+        ])
+
+    def test_heuristic(self):
+        self.assertSameMove(ai.get_heuristic_ai_class(3), Game(5, 5, 4), [
+            ['.....', '.....', '..x..', '.....', '.....'],
+            ['.....', '.xo..', '..x..', '.....', '.....'],
+            ['.....', '.xox.', '..xo.', '.....', '.....'],
+        ])
+
+    def test_heuristic_think_time(self):
+        ai_class = ai.get_heuristic_ai_class(None, think_time=0.3)
+        game = Game(5, 5, 4)
+        game.state = ['.....', '.....', '..x..', '.....', '.....']
+        line, column = ai.configure_ai(ai_class, workers=2)(
+            game, 'o').next_move()
+        self.assertEqual(game.state[line][column], '.')
+
+    def test_heuristic_think_time_bound(self):
+        ai_class = ai.get_heuristic_ai_class(None, think_time=0.3)
+        game = Game(9, 9, 5)
+        game.start(ai_class=ai.configure_ai(ai_class, workers=2),
+                   player_first=True)
+        for line, column in [(5, 5), (4, 4), (6, 3)]:
+            game.make_player_move(line, column)
+            start = time.monotonic()
+            game.make_ai_move()
+            self.assertLess(time.monotonic() - start, 0.45)
+
+    def test_heuristic_node_budget(self):
+        ai_class = ai.get_heuristic_ai_class(None, max_nodes=3000)
+        game = Game(5, 5, 4)
+        game.state = ['.....', '.....', '..x..', '.....', '.....']
+        serial = ai_class(game, 'o')
+        serial.search(game.board)
+        parallel = ai.configure_ai(ai_class, workers=2)(game, 'o')
+        parallel.search(game.board)
+        self.assertLessEqual(serial._nodes, 3001)
+        self.assertLessEqual(parallel._nodes, 3000)
+        self.assertGreater(parallel._nodes, 0)
+
+    def test_queued_job_after_deadline(self):
+        spec = ai.get_ai_spec(ai.get_heuristic_ai_class(None,
+                                                        think_time=0.3))
+        limits = {'depth_limit': 3, 'deadline': time.monotonic() - 1,
+                  'node_limit': None}
+        with self.assertRaises(SearchAborted):
+            ai.search_root_move(spec, (5, 5, 4), 0, 1 << 12, 0, 0, limits)
+
+    def test_get_ai_spec(self):
+        ai_class = ai.configure_ai(ai.get_heuristic_ai_class(5), workers=3)
+        base, options = ai.get_ai_spec(ai_class)
+        self.assertIs(base, ai.HeuristicAI)
+        self.assertEqual(options['max_depth'], 5)
+        self.assertEqual(options['workers'], 3)
+        self.assertEqual(ai.get_ai_spec(ai.MinimaxAI), (ai.MinimaxAI, {}))
+
+
+class MCTSAITest(unittest.TestCase):
+
+    def setUp(self):
+        self.game = Game(3, 3)
+        self.ai_class = ai.configure_ai(ai.MCTSAI, playouts=200, seed=1)
+        self.ai = self.ai_class(self.game, 'o')
+
+    def test_no_budget(self):
+        ai_class = ai.configure_ai(ai.MCTSAI, playouts=None, think_time=None)
+        with self.assertRaises(ValueError):
+            ai_class(self.game, 'o')
+
+    def test_wins(self):
+        self.game.state = ['oo.', 'xx.', 'x..']
+        self.assertEqual(self.ai.next_move(), (0, 2))
+
+    def test_blocks(self):
+        self.game.state = ['xx.', '.o.', '...']
+        self.assertEqual(self.ai.next_move(), (0, 2))
+
+    def test_no_legal_move(self):
+        self.game.state = ['xox', 'oxo', 'oxo']
+        with self.assertRaises(NoLegalMoveError):
+            self.ai.next_move()
+
+    def test_node_keeps_only_forced_moves(self):
+        board = self.game.get_board(['xx.', '.o.', '...'])
+        self.assertListEqual(ai.MCTSNode(board, True).untried, [2])
+        board = self.game.get_board(['x..', '.o.', '...'])
+        self.assertEqual(len(ai.MCTSNode(board, True).untried), 7)
+
+    def test_playouts(self):
+        visits = self.ai.search(self.game.board, 100)
+        self.assertEqual(sum(visits.values()), 100)
+        self.assertEqual(self.ai._root.visits, 100)
+
+    def test_keeps_tree(self):
+        move = self.game.board.geometry.index(*self.ai.next_move())
+        node = next(iter(self.ai._root.children[move].children.values()))
+        self.assertIs(self.ai.tree_at(node.board), node)
+        self.assertIsNone(node.parent)
+
+    def test_new_tree(self):
+        move = self.game.board.geometry.index(*self.ai.next_move())
+        node = next(iter(self.ai._root.children[move].children.values()))
+        self.ai.keep_tree = False
+        self.assertIsNot(self.ai.tree_at(node.board), node)
+        self.assertIsNot(self.ai.tree_at(self.game.board), self.ai._root)
+
+    def test_think_time(self):
+        ai_class = ai.configure_ai(ai.MCTSAI, playouts=None, think_time=0.2)
+        game = Game(7, 7, 5)
+        start = time.monotonic()
+        line, column = ai_class(game, 'o').next_move()
+        self.assertLess(time.monotonic() - start, 1)
+        self.assertEqual(game.state[line][column], '.')
+
+    def test_parallel(self):
+        ai_class = ai.configure_ai(self.ai_class, workers=2)
+        self.game.state = ['xx.', '.o.', '...']
+        self.assertEqual(ai_class(self.game, 'o').next_move(), (0, 2))
+
+    def test_draws_with_minimax(self):
+        for ai_first in (True, False):
+            game = Game(3, 3)
+            players = [ai.MinimaxAI(game, 'x'),
+                       ai.configure_ai(ai.MCTSAI, seed=1)(game, 'o')]
+            ai_move = ai_first
+            while not game.is_game_over():
+                board = game.board
+                if ai_move:
+                    move = players[1].next_move()
+                    game.board = board.play(
+                        board.geometry.index(*move), True)
+                else:
+                    game.board = Board(board.geometry, board.player,
+                                       board.ai)
+                    move = players[0].next_move()
+                    game.board = board.play(
+                        board.geometry.index(*move), False)
+                ai_move = not ai_move
+            self.assertIsNone(game.get_winner())
 
 
 class GetHeuristicAIClassTest(unittest.TestCase):
@@ -179,3 +534,7 @@ class GetHeuristicAIClassTest(unittest.TestCase):
         self.assertEqual(ai_class.max_depth, 7)
         self.ai = ai_class(mock.MagicMock(), 'o')
         self.assertEqual(self.ai.max_depth, 7)
+        self.assertIsNone(self.ai.think_time)
+        ai_class = ai.get_heuristic_ai_class(None, think_time=2)
+        self.assertEqual(ai_class.think_time, 2)
+        self.assertIsNone(ai_class.max_depth)
@@ -0,0 +1,51 @@
+import unittest
+from unittest import mock
+
+from tic import api
+
+
+class BestMovesTest(unittest.TestCase):
+
+    def setUp(self):
+        api._moves.clear()
+
+    def test_best_moves(self):
+        moves = api.best_moves([['xx.', '.o.', '...'], ['oo.', 'xx.', 'x..'],
+                                ['xxx', 'oo.', '...']], 3, 3, 3)
+        self.assertListEqual(moves, [(0, 2), (0, 2), None])
+
+    def test_symmetric_positions_searched_once(self):
+        states = [['x..', '...', '...'], ['..x', '...', '...'],
+                  ['...', '...', 'x..']]
+        with mock.patch('tic.api.search_move',
+                        wraps=api.search_move) as search_move:
+            moves = api.best_moves(states, 3, 3, 3)
+        self.assertEqual(search_move.call_count, 1)
+        self.assertListEqual(moves, [(1, 1)] * 3)
+
+    def test_cached(self):
+        states = [['xx.', '.o.', '...']]
+        api.best_moves(states, 3, 3, 3)
+        with mock.patch('tic.api.search_move') as search_move:
+            moves = api.best_moves([['.xx', '.o.', '...']], 3, 3, 3)
+        self.assertFalse(search_move.called)
+        self.assertListEqual(moves, [(0, 0)])
+        self.assertEqual(api.cache_stats()['hits'], 1)
+
+    def test_engines_cached_apart(self):
+        states = [['....'] * 4]
+        api.best_moves(states, 4, 4, 3, engine='simple')
+        self.assertEqual(api.best_moves(states, 4, 4, 3, engine='simple'),
+                         [(0, 0)])
+        self.assertEqual(api.cache_stats()['size'], 1)
+        api.best_moves(states, 4, 4, 3, engine='heuristic-1')
+        self.assertEqual(api.cache_stats()['size'], 2)
+
+    def test_parallel(self):
+        states = [['xx.', '.o.', '...'], ['x..', '.o.', '..x']]
+        self.assertListEqual(api.best_moves(states, 3, 3, 3, workers=2),
+                             api.best_moves(states, 3, 3, 3))
+
+    def test_wrong_shape(self):
+        with self.assertRaises(ValueError):
+            api.best_moves([['...', '...']], 3, 3, 3)
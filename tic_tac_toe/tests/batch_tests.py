@@ -0,0 +1,60 @@
+import unittest
+from unittest import mock
+
+from tic import batch, vectorized
+from tic.board import Board, get_geometry
+from tic.game import Game
+from tic.heuristic import LineEvaluator
+
+
+class BatchTest(unittest.TestCase):
+
+    def setUp(self):
+        self.boards = [
+            Board.from_state(["ooo", "xx.", "..."], 3),
+            Board.from_state(["xo.", "xo.", "x.."], 3),
+            Board.from_state(["oo..", "x...", "x...", "...."], 3),
+            Board.from_state(["...", "...", "..."], 3),
+        ]
+
+    def test_winners(self):
+        self.assertListEqual(batch.winners(self.boards),
+                             ["ai", "player", None, None])
+
+    def test_scores(self):
+        for ai_move in (True, False):
+            expected = []
+            for board in self.boards:
+                evaluator = LineEvaluator(board.geometry)
+                evaluator.reset(board)
+                expected.append(evaluator.score(ai_move))
+            self.assertListEqual(batch.scores(self.boards, ai_move),
+                                 expected)
+
+    def test_empty(self):
+        self.assertListEqual(batch.winners([]), [])
+        self.assertListEqual(batch.scores([], True), [])
+
+    @mock.patch.object(vectorized, 'should_use', return_value=True)
+    def test_vectorized_by_geometry(self, should_use):
+        with mock.patch.object(vectorized, 'winners',
+                               side_effect=lambda group: [1] * len(group)) \
+                as winners:
+            self.assertListEqual(batch.winners(self.boards), [1] * 4)
+        self.assertEqual(winners.call_count, 2)
+        should_use.assert_any_call(get_geometry(3, 3, 3), 3)
+        should_use.assert_any_call(get_geometry(4, 4, 3), 1)
+
+
+class GameWinnersTest(unittest.TestCase):
+
+    def test_get_winners(self):
+        game = Game(3, 3)
+        states = [["ooo", "xx.", "..."], ["xo.", "xo.", "x.."],
+                  ["...", "...", "..."]]
+        self.assertListEqual(game.get_winners(states),
+                             [game.get_winner(state) for state in states])
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,42 @@
+import unittest
+
+from benchmarks import moves
+from tic.ai import MinimaxAI, SimpleAI
+
+
+class PercentileTest(unittest.TestCase):
+
+    def test_percentile(self):
+        values = list(range(1, 21))
+        self.assertEqual(moves.percentile(values, 95), 19)
+        self.assertEqual(moves.percentile(values, 50), 10)
+        self.assertEqual(moves.percentile([3], 95), 3)
+
+
+class MovesBenchmarkTest(unittest.TestCase):
+
+    def test_counts_nodes(self):
+        elapsed, nodes = moves.time_move(MinimaxAI, (3, 3, 3),
+                                         ['x..', '.o.', '..x'])
+        self.assertGreater(elapsed, 0)
+        self.assertGreater(nodes, 0)
+        self.assertIsNone(moves.time_move(SimpleAI, (3, 3, 3),
+                                          ['...'] * 3)[1])
+
+    def test_run(self):
+        report = moves.run(['minimax'], ['3x3x3'], repeat=2, warmup=0)
+        self.assertEqual(len(report['results']), 3)
+        result = report['results'][0]
+        self.assertEqual(result['runs'], 2)
+        self.assertLessEqual(result['median'], result['p95'])
+        self.assertGreater(result['nodes_per_second'], 0)
+
+    def test_compare(self):
+        old = {'results': [{'engine': 'minimax', 'board': '3x3x3',
+                            'position': 'empty', 'median': 2.0}]}
+        new = {'results': [{'engine': 'minimax', 'board': '3x3x3',
+                            'position': 'empty', 'median': 1.0},
+                           {'engine': 'simple', 'board': '3x3x3',
+                            'position': 'empty', 'median': 1.0}]}
+        self.assertListEqual(list(moves.compare(old, new)),
+                             [(('minimax', '3x3x3', 'empty'), 0.5)])
@@ -0,0 +1,192 @@
+from unittest import TestCase
+
+from tic import board
+from tic.board import Board, get_geometry
+
+
+class GeometryTest(TestCase):
+
+    def test_get_geometry_is_shared(self):
+        self.assertIs(get_geometry(3, 4, 3), get_geometry(3, 4, 3))
+        self.assertIsNot(get_geometry(3, 4, 3), get_geometry(4, 3, 3))
+
+    def test_winning_lines(self):
+        geometry = get_geometry(3, 3, 3)
+        lines = [(0, 1, 2), (3, 4, 5), (6, 7, 8), (0, 3, 6), (1, 4, 7),
+                 (2, 5, 8), (0, 4, 8), (2, 4, 6)]
+        self.assertListEqual(list(geometry.winning_lines), lines)
+
+    def test_winning_lines_tall_board(self):
+        geometry = get_geometry(7, 2, 2)
+        diagonals = geometry.winning_lines[9:]
+        self.assertEqual(len(diagonals), 12)
+
+    def test_cell_masks(self):
+        geometry = get_geometry(3, 3, 3)
+        self.assertEqual(len(geometry.cell_masks[4]), 4)
+        self.assertEqual(len(geometry.cell_masks[1]), 2)
+        for index, masks in enumerate(geometry.cell_masks):
+            for mask in masks:
+                self.assertTrue(mask >> index & 1)
+
+    def test_cell_lines(self):
+        geometry = get_geometry(3, 3, 3)
+        self.assertEqual(geometry.cell_lines[4], (1, 4, 6, 7))
+        self.assertEqual(geometry.cell_lines[1], (0, 4))
+
+    def test_extract_lines(self):
+        geometry = get_geometry(2, 2, 2)
+        self.assertListEqual(geometry.extract_lines('abcd'), [
+            ('a', 'b'), ('c', 'd'), ('a', 'c'), ('b', 'd'), ('a', 'd'),
+            ('b', 'c')])
+
+    def test_extract_lines_single_cell(self):
+        self.assertListEqual(get_geometry(1, 1, 1).extract_lines('a'),
+                             [('a',), ('a',), ('a',), ('a',)])
+
+    def test_center_order(self):
+        self.assertEqual(get_geometry(3, 3, 3).center_order[0], 4)
+        self.assertSetEqual(set(get_geometry(2, 4, 3).center_order[:2]),
+                            {1, 2})
+
+    def test_win_masks(self):
+        geometry = get_geometry(2, 3, 2)
+        masks = {0b11, 0b110, 0b11000, 0b110000, 0b1001, 0b10010,
+                 0b100100, 0b10001, 0b100010, 0b1010, 0b10100}
+        self.assertSetEqual(set(geometry.win_masks), masks)
+
+
+class SymmetriesTest(TestCase):
+
+    def test_square(self):
+        symmetries = board.get_symmetries(2, 2)
+        self.assertEqual(len(symmetries), 8)
+        self.assertEqual(symmetries[0], (0, 1, 2, 3))
+        self.assertSetEqual(set(symmetries), {
+            (0, 1, 2, 3), (1, 3, 0, 2), (3, 2, 1, 0), (2, 0, 3, 1),
+            (1, 0, 3, 2), (3, 1, 2, 0), (2, 3, 0, 1), (0, 2, 1, 3),
+        })
+
+    def test_rectangular(self):
+        symmetries = board.get_symmetries(2, 3)
+        self.assertSetEqual(set(symmetries), {
+            (0, 1, 2, 3, 4, 5), (5, 4, 3, 2, 1, 0), (3, 4, 5, 0, 1, 2),
+            (2, 1, 0, 5, 4, 3),
+        })
+
+    def test_inverse(self):
+        geometry = get_geometry(3, 3, 3)
+        for perm, inverse in zip(geometry.symmetries,
+                                 geometry.inverse_symmetries):
+            self.assertListEqual([inverse[perm[i]] for i in range(9)],
+                                 list(range(9)))
+
+
+class BoardTest(TestCase):
+
+    def test_from_state_to_state(self):
+        state = ['x.o', '.o.', 'x..', 'ox.']
+        result = Board.from_state(state, 3)
+        self.assertEqual(result.ai, 0b1000010100)
+        self.assertEqual(result.player, 0b10001000001)
+        self.assertListEqual(result.to_state(), state)
+
+    def test_piece_at(self):
+        result = Board.from_state(['xo.'], 3)
+        self.assertEqual(result.piece_at(0), board.PLAYER)
+        self.assertEqual(result.piece_at(1), board.AI)
+        self.assertEqual(result.piece_at(2), board.EMPTY)
+
+    def test_moves(self):
+        result = Board.from_state(['x.o', '.o.'], 3)
+        self.assertListEqual(list(result.moves()), [1, 3, 5])
+
+    def test_play(self):
+        empty = Board(get_geometry(2, 2, 2))
+        result = empty.play(3, True).play(1, False)
+        self.assertListEqual(result.to_state(), ['.x', '.o'])
+        self.assertEqual(empty.ai | empty.player, 0)
+
+    def test_equality(self):
+        first = Board.from_state(['xo', '..'], 2)
+        second = Board(get_geometry(2, 2, 2)).play(0, False).play(1, True)
+        self.assertEqual(first, second)
+        self.assertEqual(hash(first), hash(second))
+        self.assertNotEqual(first, Board.from_state(['xo', '..'], 1))
+
+    def test_key(self):
+        played = Board(get_geometry(3, 3, 3)).play(4, True).play(0, False)
+        loaded = Board.from_state(['x..', '.o.', '...'], 3)
+        self.assertEqual(played.key, loaded.key)
+        self.assertNotEqual(loaded.key, Board.from_state(['o..', '.x.', '...'],
+                                                         3).key)
+        self.assertNotEqual(loaded.key_for(True), loaded.key_for(False))
+
+    def test_canonical(self):
+        states = [['xo.', '...', '..o'], ['o..', '...', '.ox'],
+                  ['.ox', '...', 'o..'], ['x..', 'o..', '..o']]
+        keys = {Board.from_state(state, 3).canonical(True)[0]
+                for state in states}
+        self.assertEqual(len(keys), 1)
+        other = Board.from_state(['x.o', '...', '..o'], 3)
+        self.assertNotIn(other.canonical(True)[0], keys)
+        self.assertNotEqual(other.canonical(True)[0],
+                            other.canonical(False)[0])
+
+    def test_canonical_symmetry(self):
+        played = Board.from_state(['o..', '...', '.ox'], 3)
+        key, symmetry = played.canonical(False)
+        perm = played.geometry.symmetries[symmetry]
+        geometry = played.geometry
+        canonical = Board(geometry)
+        for index in range(geometry.size):
+            piece = played.piece_at(index)
+            if piece != board.EMPTY:
+                canonical = canonical.play(perm[index], piece == board.AI)
+        self.assertEqual(canonical.key, min(played.keys))
+        self.assertEqual(canonical.canonical(False), (key, 0))
+
+    def test_zobrist_is_deterministic(self):
+        geometry = get_geometry(3, 3, 3)
+        self.assertEqual(geometry.zobrist, board.Geometry(3, 3, 3).zobrist)
+
+    def test_winner(self):
+        self.assertEqual(Board.from_state(['xo.', 'xo.', 'x..'], 3).winner(),
+                         "player")
+        self.assertEqual(Board.from_state(['x.o', 'xo.', 'o..'], 3).winner(),
+                         "ai")
+        self.assertIsNone(Board.from_state(['xox', '...', '...'], 2).winner())
+
+    def test_winner_after(self):
+        result = Board.from_state(['xo.', 'xo.', 'x.o'], 3)
+        self.assertEqual(result.winner_after(3), "player")
+        self.assertIsNone(result.winner_after(1))
+        self.assertIsNone(result.winner_after(5))
+
+    def test_last_winner(self):
+        result = Board.from_state(['xx.', 'oo.', '...'], 3)
+        self.assertIsNone(result.last_winner())
+        self.assertEqual(result.play(5, True).last_winner(), "ai")
+        self.assertIsNone(result.play(8, True).last_winner())
+        self.assertEqual(result.play(2, False).last, 2)
+
+    def test_threats(self):
+        result = Board.from_state(['xx.', '.o.', 'o..'], 3)
+        self.assertEqual(result.threats(True), (1 << 2, 1 << 2))
+        self.assertEqual(result.threats(False), (1 << 2, 1 << 2))
+        result = Board.from_state(['x..', '.o.', '...'], 3)
+        self.assertEqual(result.threats(True), (0, 0))
+
+    def test_is_game_over(self):
+        self.assertFalse(Board.from_state(['...'] * 3, 3).is_game_over())
+        self.assertTrue(Board.from_state(['xxx', '...', '...'], 3)
+                        .is_game_over())
+        self.assertTrue(Board.from_state(['xoo', 'oxx', 'xoo'], 3)
+                        .is_game_over())
+
+    def test_play_out(self):
+        board = Board.from_state(['xx.', '.o.', 'o..'], 3)
+        self.assertEqual(board.play_out([2, 8], True), "ai")
+        self.assertEqual(board.play_out([2, 8], False), "player")
+        self.assertIsNone(board.play_out([3, 5], True))
+        self.assertEqual(board.ai, 0b1010000)
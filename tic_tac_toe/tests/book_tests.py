@@ -0,0 +1,78 @@
+import os
+import tempfile
+import unittest
+from unittest import mock
+
+from tic import ai
+from tic.board import Board
+from tic.book import OpeningBook, get_book, write_book
+from tic.build_book import build_book
+from tic.game import Game
+
+
+class BookTest(unittest.TestCase):
+
+    def setUp(self):
+        handle, self.path = tempfile.mkstemp(suffix='.book')
+        os.close(handle)
+        self.book = build_book(3, 3, 3, plies=3)
+        write_book(self.path, (3, 3, 3), self.book)
+
+    def tearDown(self):
+        os.remove(self.path)
+
+    def test_build_book(self):
+        empty = Board.from_state(['...'] * 3, 3)
+        self.assertIn(empty.canonical(True)[0], self.book)
+        reply = Board.from_state(['x..', '...', '...'], 3)
+        self.assertIn(reply.canonical(True)[0], self.book)
+
+    def test_opening_book(self):
+        book = OpeningBook(self.path)
+        self.assertEqual(book.config, (3, 3, 3))
+        self.assertEqual(len(book), len(self.book))
+        board = Board.from_state(['...', '...', '..x'], 3)
+        self.assertEqual(book.move(board), 4)
+        board = Board.from_state(['xo.', '...', 'x..'], 3)
+        self.assertIsNone(book.move(board))
+        board = Board.from_state(['...', '...', '...'], 2)
+        self.assertIsNone(book.move(board))
+        book.close()
+
+    def test_moves_are_optimal(self):
+        minimax = ai.MinimaxAI(Game(3, 3), 'o')
+        book = OpeningBook(self.path)
+        for state in [['x..', '...', '...'], ['.x.', '...', '...'],
+                      ['...', '.x.', '...'], ['...', '...', '...']]:
+            board = Board.from_state(state, 3)
+            move = book.move(board)
+            expected = minimax.minimax(board, True, 0)[0]
+            result = minimax.minimax(board.play(move, True), False, 1)[0]
+            self.assertEqual(result, expected, state)
+        book.close()
+
+    def test_invalid_file(self):
+        with open(self.path, 'wb') as book_file:
+            book_file.write(b'x' * 32)
+        self.assertRaises(ValueError, OpeningBook, self.path)
+
+    def test_get_book(self):
+        self.assertIs(get_book(self.path), get_book(self.path))
+
+    def test_ai_uses_book(self):
+        ai_class = ai.configure_ai(ai.MinimaxAI, book=self.path)
+        game = Game(3, 3)
+        game.state = ['...', '...', '..x']
+        book_ai = ai_class(game, 'o')
+        with mock.patch.object(ai_class, 'minimax') as minimax:
+            self.assertEqual(book_ai.next_move(), (1, 1))
+        self.assertFalse(minimax.called)
+        game.state = ['xo.', '...', 'x..']
+        self.assertEqual(book_ai.next_move(), (1, 0))
+
+    def test_not_used_on_sparse_board(self):
+        game = Game(3, 3, sparse=True)
+        book_ai = ai.configure_ai(ai.MinimaxAI, book=self.path)(game, 'o')
+        with mock.patch.object(ai, 'get_book') as book:
+            self.assertIsNone(book_ai.book_move(game.board))
+        book.assert_not_called()
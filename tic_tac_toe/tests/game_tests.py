@@ -133,13 +133,24 @@ class GameTest(unittest.TestCase):
              ".o."],
         ]
         for state in player_winning:
-            self.game._state = state
+            self.game.state = state
             self.assertEqual(self.game.get_winner(), "player", state)
 
         for state in ai_winning:
-            self.game._state = state
+            self.game.state = state
             self.assertEqual(self.game.get_winner(), "ai", state)
 
+    def test_get_winner_after(self):
+        state = ["x..",
+                 ".x.",
+                 "..x"]
+        self.assertEqual(self.game.get_winner_after(state, 1, 1), "player")
+        state = ["x..",
+                 "oxo",
+                 "..x"]
+        self.assertEqual(self.game.get_winner_after(state, 1, 0), None)
+        self.assertEqual(self.game.get_winner_after(state, 0, 1), None)
+
     def test_get_winner_not_straight_line(self):
         state = ["xox", "...", "..."]
         self.game = game.Game(3, 3, win_count=2)
@@ -200,7 +211,7 @@ class GameTest(unittest.TestCase):
             self.game.start(ai_class=self.ai_class, player_first=False)
         self.assertEqual(str(ctx.exception),
                          "AI tried to make a move outside the board.")
-        self.game._state = [['.', '.', '.'], ['.', '.', '.'], ['.', '.', '.']]
+        self.game.state = [['.', '.', '.'], ['.', '.', '.'], ['.', '.', '.']]
         self.ai.next_move.return_value = (0, 2)
         with self.assertRaises(InvalidAIError) as ctx:
             self.game.make_move(1, 3)
@@ -214,14 +225,27 @@ class GameTest(unittest.TestCase):
         self.ai_class.assert_called_once_with(self.game, 'o')
         self.ai.next_move.assert_called_once_with()
 
+    def test_make_player_move(self):
+        self.ai.next_move.reset_mock()
+        self.game.make_player_move(1, 2)
+        self.assertListEqual(self.game.state, ['.x.', '...', '...'])
+        self.assertEqual(self.ai.next_move.called, False)
+        self.assertEqual(self.game.make_ai_move(), (3, 3))
+        self.assertListEqual(self.game.state, ['.x.', '...', '..o'])
+
+    def test_make_ai_move_after_winning(self):
+        self.game.state = [['x', 'x', 'x'], ['.', '.', '.'], ['.', '.', '.']]
+        with self.assertRaises(IllegalMoveError):
+            self.game.make_ai_move()
+
     def test_make_winning_move(self):
-        self.game._state = [['x', 'x', '.'], ['.', '.', '.'], ['.', '.', '.']]
+        self.game.state = [['x', 'x', '.'], ['.', '.', '.'], ['.', '.', '.']]
         self.ai.next_move.reset_mock()
         self.game.make_move(1, 3)
         self.assertEqual(self.ai.next_move.called, False)
 
     def test_make_move_after_winning(self):
-        self.game._state = [['o', 'o', 'o'], ['.', '.', '.'], ['.', '.', '.']]
+        self.game.state = [['o', 'o', 'o'], ['.', '.', '.'], ['.', '.', '.']]
         with self.assertRaises(IllegalMoveError) as ctx:
             self.game.make_move(2, 3)
         self.assertEqual(str(ctx.exception),
@@ -0,0 +1,101 @@
+import unittest
+from unittest import mock
+
+from tic import heuristic
+from tic.board import AI, EMPTY, PLAYER, Board, get_geometry
+from tic.heuristic import LineEvaluator, line_value
+from tic.utils import BoundedCache
+
+
+class LineValueTest(unittest.TestCase):
+
+    def test_empty_line(self):
+        self.assertEqual(line_value([EMPTY] * 3, 3), (0, 0))
+
+    def test_threat(self):
+        pieces = [AI, AI, EMPTY]
+        self.assertEqual(line_value(pieces, 3), (2002, 2))
+
+    def test_blocked_line(self):
+        pieces = [AI, PLAYER, EMPTY]
+        self.assertEqual(line_value(pieces, 3), (0, 0))
+
+    def test_open_line(self):
+        pieces = [EMPTY, PLAYER, EMPTY, EMPTY]
+        self.assertEqual(line_value(pieces, 3), (-2, -1002))
+
+
+class LineEvaluatorTest(unittest.TestCase):
+
+    def setUp(self):
+        self.geometry = get_geometry(4, 4, 3)
+        self.board = Board.from_state(["o...",
+                                       ".x..",
+                                       "..o.",
+                                       "...."], 3)
+
+    def evaluator_at(self, board):
+        evaluator = LineEvaluator(self.geometry)
+        evaluator.reset(board)
+        return evaluator
+
+    def test_is_at(self):
+        evaluator = self.evaluator_at(self.board)
+        self.assertTrue(evaluator.is_at(self.board))
+        self.assertFalse(evaluator.is_at(self.board.play(3, True)))
+
+    def test_play_matches_reset(self):
+        evaluator = self.evaluator_at(self.board)
+        board = self.board
+        for index, ai_move in ((3, False), (6, True), (15, False)):
+            evaluator.play(index, ai_move)
+            board = board.play(index, ai_move)
+            expected = self.evaluator_at(board)
+            self.assertTrue(evaluator.is_at(board))
+            for side in (True, False):
+                self.assertEqual(evaluator.score(side),
+                                 expected.score(side))
+
+    def test_undo(self):
+        evaluator = self.evaluator_at(self.board)
+        scores = evaluator.score(True), evaluator.score(False)
+        evaluator.play(3, True)
+        evaluator.play(12, False)
+        evaluator.undo()
+        evaluator.undo()
+        self.assertTrue(evaluator.is_at(self.board))
+        self.assertEqual((evaluator.score(True), evaluator.score(False)),
+                         scores)
+
+    def test_matches_line_value(self):
+        evaluator = self.evaluator_at(self.board)
+        pieces = {'o': AI, 'x': PLAYER, '.': EMPTY}
+        cells = [pieces[piece] for piece in "o....x....o....."]
+        values = [line_value([cells[index] for index in line], 3)
+                  for line in self.geometry.winning_lines]
+        self.assertEqual(evaluator.score(True),
+                         sum(value[0] for value in values))
+        self.assertEqual(evaluator.score(False),
+                         sum(value[1] for value in values))
+
+    def test_lines_share_values(self):
+        with mock.patch.object(heuristic, '_line_values',
+                               BoundedCache(100, policy='always')) as values:
+            self.evaluator_at(Board(self.geometry))
+            # Rows, columns and the diagonals of the two lengths.
+            self.assertEqual(len(values), 6)
+
+    def test_bounded_values(self):
+        expected = self.evaluator_at(self.board)
+        with mock.patch.object(heuristic, '_line_values',
+                               BoundedCache(2, policy='always')) as values:
+            evaluator = self.evaluator_at(self.board)
+            evaluator.play(3, True)
+            evaluator.undo()
+            self.assertEqual(len(values), 2)
+        self.assertEqual(evaluator.score(True), expected.score(True))
+        self.assertEqual(evaluator.score(False), expected.score(False))
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,69 @@
+import unittest
+
+from tic.board import Board, get_geometry
+from tic.moves import (Neighbourhood, center, center_sorted, near_mask,
+                       neighbourhood, pieces_of)
+from tic.sparse import SparseBoard
+
+
+def cells(mask):
+    return set(pieces_of(mask))
+
+
+class NearMaskTest(unittest.TestCase):
+
+    def test_inside(self):
+        geometry = get_geometry(5, 5, 4)
+        self.assertSetEqual(cells(near_mask(geometry, 1, 12)),
+                            {6, 7, 8, 11, 12, 13, 16, 17, 18})
+
+    def test_corner(self):
+        geometry = get_geometry(5, 5, 4)
+        self.assertSetEqual(cells(near_mask(geometry, 2, 0)),
+                            {0, 1, 2, 5, 6, 7, 10, 11, 12})
+
+
+class CenterTest(unittest.TestCase):
+
+    def test_center(self):
+        for lines, columns in [(3, 3), (4, 4), (3, 6), (5, 2)]:
+            geometry = get_geometry(lines, columns, 2)
+            self.assertEqual(center(geometry), geometry.center_order[0])
+
+    def test_center_sorted(self):
+        geometry = get_geometry(4, 5, 3)
+        cells = 0b1011000100100011001
+        self.assertListEqual(center_sorted(geometry, cells),
+                             [index for index in geometry.center_order
+                              if cells >> index & 1])
+
+
+class NeighbourhoodTest(unittest.TestCase):
+
+    def setUp(self):
+        self.state = ['x....',
+                      '.....',
+                      '.....',
+                      '.....',
+                      '....o']
+
+    def test_neighbourhood(self):
+        board = Board.from_state(self.state, 4)
+        self.assertSetEqual(cells(neighbourhood(board, 1)),
+                            {1, 5, 6, 18, 19, 23})
+
+    def test_sparse(self):
+        board = SparseBoard.from_state(self.state, 4)
+        self.assertSetEqual(cells(neighbourhood(board, 1)),
+                            {1, 5, 6, 18, 19, 23})
+
+    def test_incremental(self):
+        board = Board.from_state(self.state, 4)
+        near = Neighbourhood(board.geometry, 1)
+        near.reset(board)
+        near.play(12)
+        board = board.play(12, True)
+        self.assertTrue(near.is_at(board))
+        self.assertEqual(near.mask, neighbourhood(board, 1))
+        near.undo()
+        self.assertSetEqual(cells(near.mask), {1, 5, 6, 18, 19, 23})
@@ -0,0 +1,82 @@
+import os
+import shutil
+import sqlite3
+import tempfile
+import unittest
+
+from tic import ai, persistent
+from tic.game import Game
+from tic.utils import Entry
+
+
+class PersistentCacheTest(unittest.TestCase):
+
+    def setUp(self):
+        self.directory = tempfile.mkdtemp()
+        self.path = os.path.join(self.directory, 'cache.sqlite')
+
+    def tearDown(self):
+        persistent.close_all()
+        shutil.rmtree(self.directory)
+
+    def test_put_and_load(self):
+        cache = persistent.PersistentCache(self.path, batch_size=2)
+        cache.put('a', 2 ** 64 - 1, Entry(5, 0, 3, 4, 2))
+        self.assertEqual(len(cache), 0)
+        cache.put('a', 7, Entry(-1, 1, 1, 0, 1))
+        self.assertEqual(len(cache), 2)
+        cache.put('b', 7, Entry(0, 0, 1, 0, 1))
+        cache.close()
+
+        cache = persistent.PersistentCache(self.path)
+        entries = dict(cache.load('a'))
+        self.assertSetEqual(set(entries), {2 ** 64 - 1, 7})
+        entry = entries[2 ** 64 - 1]
+        self.assertEqual((entry.score, entry.kind, entry.depth, entry.move,
+                          entry.ply), (5, 0, 3, 4, 2))
+        self.assertListEqual([key for key, _ in cache.load('a', min_ply=2)],
+                             [2 ** 64 - 1])
+        self.assertEqual(len(list(cache.load('b'))), 1)
+        cache.close()
+
+    def test_deeper_result_kept(self):
+        cache = persistent.PersistentCache(self.path)
+        cache.put('a', 1, Entry(5, 0, 3, 4, 2))
+        cache.flush()
+        cache.put('a', 1, Entry(1, 0, 1, 0, 2))
+        cache.flush()
+        cache.put('a', 2, Entry(1, 0, 1, 0, 2))
+        cache.flush()
+        entries = list(cache.load('a'))
+        self.assertEqual(entries[0][0], 1)
+        self.assertEqual(entries[0][1].score, 5)
+        cache.close()
+        with sqlite3.connect(self.path) as connection:
+            hits = connection.execute(
+                'SELECT hits FROM entries WHERE key = 1').fetchone()[0]
+        self.assertEqual(hits, 2)
+
+    def test_ai_shares_results_between_runs(self):
+        ai_class = ai.configure_ai(ai.MinimaxAI,
+                                   persistent_cache=self.path)
+        game = Game(3, 3)
+        game.state = ['x..', '...', '...']
+        first = ai_class(game, 'o')
+        move = first.next_move()
+        stored = len(persistent.get_persistent_cache(self.path))
+        self.assertGreater(stored, 0)
+
+        second = ai_class(game, 'o')
+        second._prepare_cache(game.board)
+        self.assertEqual(len(second._cache), stored)
+        self.assertEqual(second.next_move(), move)
+        self.assertGreater(second._cache.hits, 0)
+
+    def test_namespace(self):
+        game = Game(4, 4, 3)
+        minimax = ai.configure_ai(ai.MinimaxAI, neighbourhood=2)(game, 'o')
+        heuristic = ai.get_heuristic_ai_class(3)(game, 'o')
+        self.assertEqual(minimax.persistent_namespace(game.board.geometry),
+                         'MinimaxAI/4x4x3/near2')
+        self.assertEqual(heuristic.persistent_namespace(game.board.geometry),
+                         'HeuristicAI/4x4x3')
@@ -0,0 +1,81 @@
+import threading
+import time
+import unittest
+
+from tic import ai
+from tic.game import Game
+from tic.ponder import Ponderer
+
+
+class PonderTest(unittest.TestCase):
+
+    def test_minimax_fills_cache(self):
+        game = Game(3, 3)
+        minimax = ai.MinimaxAI(game, 'o')
+        game.state = ['x..', '.o.', '...']
+        stop = threading.Event()
+        minimax.ponder(game.board, stop)
+        reply = minimax.order_moves(game.board, False)[0]
+        board = game.board.play(reply, False)
+        self.assertIsNotNone(minimax._cache.get(board.canonical(True)[0]))
+        self.assertIsNone(minimax._stop)
+
+    def test_stop(self):
+        game = Game(6, 6, 4)
+        ai_class = ai.get_heuristic_ai_class(8)
+        heuristic = ai_class(game, 'o')
+        game.state = ['......', '......', '..xo..', '......', '......',
+                      '......']
+        ponderer = Ponderer(heuristic)
+        ponderer.start(game.board)
+        time.sleep(0.05)
+        self.assertTrue(ponderer.running)
+        start = time.monotonic()
+        ponderer.stop()
+        self.assertLess(time.monotonic() - start, 1)
+        self.assertFalse(ponderer.running)
+        # The AI still searches normally after pondering.
+        game.board = game.board.play(0, False)
+        heuristic = ai.configure_ai(ai_class, max_depth=1)
+        self.assertIsNotNone(heuristic(game, 'o').next_move())
+
+    def test_next_move_after_pondering(self):
+        game = Game(3, 3)
+        game.start(ai_class=ai.MinimaxAI, player_first=True)
+        game.make_move(1, 1)
+        ponderer = Ponderer(game.ai)
+        ponderer.start(game.board)
+        ponderer.stop()
+        game.make_move(3, 3)
+        self.assertEqual(game.board.pieces, 4)
+        self.assertIsNone(game.get_winner())
+
+    def test_mcts_grows_tree(self):
+        game = Game(3, 3)
+        mcts = ai.configure_ai(ai.MCTSAI, playouts=100, seed=1)(game, 'o')
+        game.state = ['x..', '.o.', '...']
+        ponderer = Ponderer(mcts)
+        ponderer.start(game.board)
+        time.sleep(0.05)
+        ponderer.stop()
+        self.assertGreater(mcts._root.visits, 0)
+        reply = next(iter(mcts._root.children))
+        node = mcts.tree_at(game.board.play(reply, False))
+        self.assertGreater(node.visits, 0)
+
+    def test_mcts_budget(self):
+        game = Game(3, 3)
+        mcts = ai.configure_ai(ai.MCTSAI, ponder_playouts=50, seed=1)(
+            game, 'o')
+        game.state = ['x..', '.o.', '...']
+        stop = threading.Event()
+        mcts.ponder(game.board, stop)
+        self.assertEqual(mcts._root.visits, 50)
+        # Pondering again on the same board keeps the tree and its budget.
+        mcts.ponder(game.board, stop)
+        self.assertEqual(mcts._root.visits, 50)
+
+    def test_simple_ai(self):
+        ponderer = Ponderer(ai.SimpleAI(Game(3, 3), 'o'))
+        ponderer.start(Game(3, 3).board)
+        ponderer.stop()
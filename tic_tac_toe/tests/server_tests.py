@@ -0,0 +1,182 @@
+import asyncio
+import json
+import unittest
+import unittest.mock as mock
+from concurrent.futures import ThreadPoolExecutor
+
+from tic import server
+
+
+async def request(port, method, path, data=None):
+    reader, writer = await asyncio.open_connection('127.0.0.1', port)
+    body = b'' if data is None else json.dumps(data).encode()
+    writer.write('{} {} HTTP/1.1\r\nContent-Length: {}\r\n'
+                 'Connection: close\r\n\r\n'.format(method, path, len(body))
+                 .encode() + body)
+    await writer.drain()
+    response = await reader.read()
+    writer.close()
+    head, _, body = response.partition(b'\r\n\r\n')
+    status = int(head.split()[1])
+    return status, json.loads(body) if body else None
+
+
+class GameServerTest(unittest.TestCase):
+
+    def setUp(self):
+        self.executor = ThreadPoolExecutor(2)
+
+    def tearDown(self):
+        self.executor.shutdown()
+
+    def run_server(self, client, **options):
+        async def run():
+            game_server = server.GameServer(executor=self.executor,
+                                            **options)
+            port = (await game_server.start('127.0.0.1', 0))[1]
+            try:
+                return await client(game_server, port)
+            finally:
+                await game_server.close()
+        return asyncio.run(run())
+
+    def test_play(self):
+        async def client(game_server, port):
+            status, game = await request(port, 'POST', '/games',
+                                         {'ai': 'minimax'})
+            self.assertEqual(status, 201)
+            self.assertListEqual(game['state'], ['...', '...', '...'])
+            path = '/games/{}/moves'.format(game['id'])
+            status, game = await request(port, 'POST', path,
+                                         {'line': 2, 'column': 2})
+            self.assertEqual(status, 200)
+            self.assertEqual(''.join(game['state']).count('o'), 1)
+            self.assertIn(game['ai_move'], [[1, 1], [1, 3], [3, 1], [3, 3]])
+            status, error = await request(port, 'POST', path,
+                                          {'line': 2, 'column': 2})
+            self.assertEqual(status, 400)
+            self.assertEqual(error['error'], "Place is already taken.")
+            status, same = await request(port, 'GET',
+                                         '/games/' + game['id'])
+            self.assertEqual(same['state'], game['state'])
+            status, _ = await request(port, 'DELETE', '/games/' + game['id'])
+            self.assertEqual(status, 204)
+            status, _ = await request(port, 'GET', '/games/' + game['id'])
+            self.assertEqual(status, 404)
+        self.run_server(client)
+
+    def test_ai_first(self):
+        async def client(game_server, port):
+            status, game = await request(
+                port, 'POST', '/games', {'lines': 4, 'columns': 4,
+                                         'ai': 'heuristic-2',
+                                         'player_first': False})
+            self.assertEqual(status, 201)
+            self.assertEqual(''.join(game['state']).count('o'), 1)
+        self.run_server(client)
+
+    def test_bad_requests(self):
+        async def client(game_server, port):
+            status, _ = await request(port, 'POST', '/games', {'lines': 0})
+            self.assertEqual(status, 400)
+            status, _ = await request(port, 'POST', '/games', {'ai': 'best'})
+            self.assertEqual(status, 400)
+            status, _ = await request(port, 'GET', '/games')
+            self.assertEqual(status, 405)
+            status, _ = await request(port, 'GET', '/players')
+            self.assertEqual(status, 404)
+        self.run_server(client)
+
+    def test_unbounded_engines(self):
+        async def client(game_server, port):
+            status, error = await request(port, 'POST', '/games',
+                                          {'lines': 5, 'columns': 5,
+                                           'win_count': 4, 'ai': 'minimax'})
+            self.assertEqual(status, 400)
+            self.assertIn("Minimax", error['error'])
+            status, _ = await request(port, 'POST', '/games',
+                                      {'ai': 'heuristic-30'})
+            self.assertEqual(status, 400)
+            self.assertEqual(game_server.sessions, {})
+            status, game = await request(port, 'POST', '/games',
+                                         {'lines': 5, 'columns': 5,
+                                          'ai': 'heuristic-4'})
+            self.assertEqual(status, 201)
+            spec = game_server.sessions[game['id']].spec
+            self.assertEqual(spec[1]['think_time'], 0.5)
+        self.run_server(client, think_time=0.5)
+
+    def test_backpressure(self):
+        async def client(game_server, port):
+            game_server.pending = game_server.max_pending
+            status, _ = await request(port, 'POST', '/games',
+                                      {'player_first': False})
+            self.assertEqual(status, 503)
+            self.assertEqual(game_server.sessions, {})
+        self.run_server(client, max_pending=1)
+
+    def test_backpressure_keeps_game(self):
+        async def client(game_server, port):
+            status, game = await request(port, 'POST', '/games',
+                                         {'ai': 'minimax'})
+            path = '/games/{}/moves'.format(game['id'])
+            game_server.pending = game_server.max_pending
+            status, _ = await request(port, 'POST', path,
+                                      {'line': 1, 'column': 1})
+            self.assertEqual(status, 503)
+            status, game = await request(port, 'GET', '/games/' + game['id'])
+            self.assertListEqual(game['state'], ['...', '...', '...'])
+            game_server.pending = 0
+            status, game = await request(port, 'POST', path,
+                                         {'line': 1, 'column': 1})
+            self.assertEqual(status, 200)
+            self.assertEqual(''.join(game['state']).count('x'), 1)
+            self.assertEqual(''.join(game['state']).count('o'), 1)
+        self.run_server(client, max_pending=1)
+
+    def test_failed_search_keeps_game(self):
+        async def client(game_server, port):
+            status, game = await request(port, 'POST', '/games',
+                                         {'ai': 'minimax'})
+            with mock.patch('tic.server.search_move',
+                            side_effect=RuntimeError), \
+                    self.assertLogs('tic.server'):
+                status, _ = await request(
+                    port, 'POST', '/games/{}/moves'.format(game['id']),
+                    {'line': 1, 'column': 1})
+            self.assertEqual(status, 500)
+            status, game = await request(port, 'GET', '/games/' + game['id'])
+            self.assertListEqual(game['state'], ['...', '...', '...'])
+        self.run_server(client)
+
+    def test_evict_idle(self):
+        async def client(game_server, port):
+            status, game = await request(port, 'POST', '/games')
+            game_server.sessions[game['id']].used -= 100
+            status, other = await request(port, 'POST', '/games')
+            self.assertEqual(status, 201)
+            self.assertListEqual(list(game_server.sessions), [other['id']])
+            status, _ = await request(port, 'POST', '/games')
+            self.assertEqual(status, 503)
+        self.run_server(client, idle_timeout=10, max_sessions=1)
+
+    def test_keep_alive(self):
+        async def client(game_server, port):
+            reader, writer = await asyncio.open_connection('127.0.0.1', port)
+            for _ in range(2):
+                writer.write(b'POST /games HTTP/1.1\r\n'
+                             b'Content-Length: 2\r\n\r\n{}')
+                await writer.drain()
+                self.assertTrue((await reader.readline()).startswith(
+                    b'HTTP/1.1 201'))
+                length = None
+                while True:
+                    line = await reader.readline()
+                    if line == b'\r\n':
+                        break
+                    if line.lower().startswith(b'content-length'):
+                        length = int(line.split(b':')[1])
+                await reader.readexactly(length)
+            writer.close()
+            self.assertEqual(len(game_server.sessions), 2)
+        self.run_server(client)
@@ -0,0 +1,176 @@
+import os
+import tempfile
+import unittest
+from unittest import mock
+
+from tic import ai, solver
+from tic.board import Board
+from tic.game import Game
+from tic.solver import DRAW, LOSS, WIN, ProofNumberSolver
+
+
+class ProofNumberSolverTest(unittest.TestCase):
+
+    def setUp(self):
+        self.solver = ProofNumberSolver()
+
+    def board(self, state, win_count=3):
+        return Board.from_state(state, win_count)
+
+    def test_draw(self):
+        board = self.board(['...', '...', '...'])
+        value, move = self.solver.best_move(board)
+        self.assertEqual(value, DRAW)
+        self.assertEqual(move, 4)
+
+    def test_win(self):
+        board = self.board(['x..', '.o.', '..x'])
+        self.assertEqual(self.solver.solve(board), DRAW)
+        board = self.board(['xx.', '.o.', 'o..'])
+        self.assertEqual(self.solver.best_move(board), (WIN, 2))
+
+    def test_double_threat(self):
+        board = self.board(['o.x', '.x.', 'o..'])
+        self.assertEqual(self.solver.best_move(board), (WIN, 3))
+
+    def test_loss(self):
+        board = self.board(['xx.', '.o.', 'x.o'])
+        self.assertEqual(self.solver.best_move(board), (LOSS, None))
+
+    def test_bigger_board(self):
+        board = self.board(['....', '....', '....', '....'])
+        value, move = self.solver.best_move(board)
+        self.assertEqual(value, WIN)
+        self.assertEqual(self.solver.solve(board.play(move, True)
+                                           .play(0, False)), WIN)
+
+    def test_node_budget(self):
+        board = self.board(['....', '....', '....', '....'], 4)
+        self.assertIsNone(self.solver.best_move(board, max_nodes=100))
+        self.assertNotIn(board.canonical(True)[0],
+                         [key[-1] for key in self.solver.results])
+
+    def test_bounded_memory(self):
+        bounded = ProofNumberSolver(max_entries=300)
+        board = self.board(['...', '...', '...'])
+        self.assertEqual(bounded.solve(board), DRAW)
+        self.assertLessEqual(bounded.cache_stats()['win']['size'], 300)
+
+    def test_results_reuse_symmetry(self):
+        board = self.board(['o..', 'x..', '...'])
+        value, move = self.solver.best_move(board)
+        mirrored = self.board(['..o', '..x', '...'])
+        with mock.patch.object(self.solver, '_prove') as prove:
+            self.assertEqual(self.solver.best_move(mirrored),
+                             (value, mirrored.geometry.symmetries[3][move]))
+        prove.assert_not_called()
+
+
+class SolverResultsTest(unittest.TestCase):
+
+    def setUp(self):
+        handle, self.path = tempfile.mkstemp(suffix='.results')
+        os.close(handle)
+        os.remove(self.path)
+
+    def tearDown(self):
+        if os.path.exists(self.path):
+            os.remove(self.path)
+
+    def test_save_and_load(self):
+        first = ProofNumberSolver(path=self.path)
+        board = Board.from_state(['xx.', '.o.', 'x.o'], 3)
+        first.solve(board)
+        first.solve(Board.from_state(['...', '...', '...'], 3))
+        self.assertFalse(os.path.exists(self.path))
+        first.flush()
+        second = ProofNumberSolver(path=self.path)
+        self.assertEqual(second.results, first.results)
+        self.assertEqual(second.best_move(board), (LOSS, None))
+
+    def test_save_every(self):
+        first = ProofNumberSolver(path=self.path, save_every=2)
+        first.solve(Board.from_state(['xx.', '.o.', 'x.o'], 3))
+        self.assertFalse(os.path.exists(self.path))
+        first.solve(Board.from_state(['x..', '.o.', '...'], 3))
+        self.assertEqual(len(ProofNumberSolver(path=self.path).results), 2)
+        self.assertFalse(os.path.exists(
+            '{}.{}.tmp'.format(self.path, os.getpid())))
+
+    def test_save_keeps_other_results(self):
+        first = ProofNumberSolver(path=self.path)
+        second = ProofNumberSolver(path=self.path)
+        first.solve(Board.from_state(['xx.', '.o.', 'x.o'], 3))
+        second.solve(Board.from_state(['x..', '.o.', '...'], 3))
+        first.flush()
+        second.flush()
+        self.assertEqual(len(ProofNumberSolver(path=self.path).results), 2)
+
+    def test_truncated_file(self):
+        first = ProofNumberSolver(path=self.path)
+        first.solve(Board.from_state(['xx.', '.o.', 'x.o'], 3))
+        first.solve(Board.from_state(['x..', '.o.', '...'], 3))
+        first.flush()
+        with open(self.path, 'rb') as results_file:
+            data = results_file.read()
+        with open(self.path, 'wb') as results_file:
+            results_file.write(data[:-3])
+        self.assertEqual(len(ProofNumberSolver(path=self.path).results), 1)
+        with open(self.path, 'wb') as results_file:
+            results_file.write(data[:5])
+        self.assertEqual(ProofNumberSolver(path=self.path).results, {})
+
+    def test_not_results_file(self):
+        with open(self.path, 'wb') as results_file:
+            results_file.write(b'NOTSOLV1' + bytes(4))
+        with self.assertRaises(ValueError):
+            ProofNumberSolver(path=self.path)
+
+    def test_get_solver(self):
+        self.assertIs(solver.get_solver(self.path),
+                      solver.get_solver(self.path))
+
+
+class SolvedMoveTest(unittest.TestCase):
+
+    def setUp(self):
+        self.game = Game(4, 4, 3)
+        self.game.state = ['x...', '....', '....', '....']
+
+    def test_uses_solver(self):
+        self.game.state = ['....', '....', '....', '....']
+        ai_class = ai.configure_ai(ai.get_heuristic_ai_class(1),
+                                   solver_nodes=10000)
+        ai_player = ai_class(self.game, 'o')
+        with mock.patch.object(ai_class, 'search') as search:
+            line, column = ai_player.next_move()
+        search.assert_not_called()
+        board = self.game.board.play(self.game.board.geometry.index(
+            line, column), True)
+        self.assertEqual(ProofNumberSolver().solve(
+            board.play(next(board.moves()), False)), WIN)
+
+    def test_falls_back_to_search(self):
+        ai_class = ai.configure_ai(ai.get_heuristic_ai_class(1),
+                                   solver_nodes=1)
+        ai_player = ai_class(self.game, 'o')
+        with mock.patch.object(ai_class, 'search',
+                               return_value=5) as search:
+            self.assertEqual(ai_player.next_move(), (1, 1))
+        search.assert_called_once_with(self.game.board)
+
+    def test_not_used_on_sparse_board(self):
+        game = Game(4, 4, 3, sparse=True)
+        ai_player = ai.configure_ai(ai.MinimaxAI, solver_nodes=10000)(
+            game, 'o')
+        with mock.patch.object(ai, 'get_solver') as get_solver:
+            self.assertIsNone(ai_player.solved_move(game.board))
+        get_solver.assert_not_called()
+
+    def test_not_used_by_default(self):
+        self.assertIsNone(ai.MinimaxAI(self.game, 'o').solved_move(
+            self.game.board))
+
+
+if __name__ == '__main__':
+    unittest.main()
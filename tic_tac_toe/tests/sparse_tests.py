@@ -0,0 +1,143 @@
+import random
+from unittest import TestCase
+
+from tic import ai
+from tic.board import AI, EMPTY, PLAYER, Board, get_geometry
+from tic.game import Game
+from tic.sparse import SparseBoard, get_sparse_geometry
+
+
+class SparseGeometryTest(TestCase):
+
+    def test_get_sparse_geometry_is_shared(self):
+        self.assertIs(get_sparse_geometry(19, 19, 5),
+                      get_sparse_geometry(19, 19, 5))
+
+    def test_symmetries(self):
+        for lines, columns in ((3, 3), (4, 4), (3, 5)):
+            geometry = get_geometry(lines, columns, 3)
+            sparse = get_sparse_geometry(lines, columns, 3)
+            for number, perm in enumerate(geometry.symmetries):
+                self.assertListEqual(
+                    [sparse.symmetries[number][index]
+                     for index in range(sparse.size)], list(perm))
+                self.assertListEqual(
+                    [sparse.inverse_symmetries[number][index]
+                     for index in range(sparse.size)],
+                    list(geometry.inverse_symmetries[number]))
+
+    def test_line_tables(self):
+        geometry = get_geometry(5, 4, 3)
+        sparse = get_sparse_geometry(5, 4, 3)
+        self.assertEqual(sparse.winning_lines, geometry.winning_lines)
+        self.assertEqual(sparse.line_masks, geometry.line_masks)
+        self.assertEqual(sparse.cell_lines, geometry.cell_lines)
+        self.assertEqual(sparse.center_order, geometry.center_order)
+
+
+class SparseBoardTest(TestCase):
+
+    def setUp(self):
+        self.state = ["o.x..",
+                      ".ox..",
+                      "..x..",
+                      "...o.",
+                      "....."]
+        self.board = SparseBoard.from_state(self.state, 4)
+
+    def test_from_state(self):
+        self.assertDictEqual(self.board.cells,
+                             {0: AI, 2: PLAYER, 6: AI, 7: PLAYER,
+                              12: PLAYER, 18: AI})
+        self.assertListEqual(self.board.to_state(), self.state)
+        self.assertEqual(self.board.pieces, 6)
+
+    def test_same_as_bitboard(self):
+        board = Board.from_state(self.state, 4)
+        self.assertEqual(self.board.ai, board.ai)
+        self.assertEqual(self.board.player, board.player)
+        self.assertEqual(self.board.empty, board.empty)
+        self.assertListEqual(list(self.board.moves()), list(board.moves()))
+        for ai_move in (True, False):
+            self.assertEqual(self.board.threats(ai_move),
+                             board.threats(ai_move))
+
+    def test_play(self):
+        board = self.board.play(17, False)
+        self.assertEqual(board.piece_at(17), PLAYER)
+        self.assertEqual(self.board.piece_at(17), EMPTY)
+        self.assertEqual(board.last, 17)
+        self.assertEqual(board.winner_after(17), "player")
+        self.assertEqual(board.last_winner(), "player")
+        self.assertEqual(board.winner(), "player")
+        self.assertIsNone(self.board.winner())
+        self.assertEqual(board.keys,
+                         SparseBoard(board.geometry, dict(board.cells)).keys)
+
+    def test_canonical(self):
+        mirrored = SparseBoard.from_state([row[::-1] for row in self.state],
+                                          4)
+        self.assertEqual(mirrored.key_for(True), self.board.key_for(True))
+        self.assertNotEqual(self.board.key_for(True),
+                            self.board.key_for(False))
+
+    def test_random_games(self):
+        rand = random.Random(1)
+        geometry = get_geometry(6, 7, 4)
+        sparse = get_sparse_geometry(6, 7, 4)
+        for _ in range(20):
+            board, sparse_board = Board(geometry), SparseBoard(sparse)
+            moves = list(range(geometry.size))
+            rand.shuffle(moves)
+            for number, index in enumerate(moves):
+                board = board.play(index, number % 2 == 0)
+                sparse_board = sparse_board.play(index, number % 2 == 0)
+                self.assertEqual(sparse_board.last_winner(),
+                                 board.last_winner())
+                if board.last_winner():
+                    break
+            self.assertEqual(sparse_board.is_full(), board.is_full())
+            self.assertListEqual(sparse_board.to_state(), board.to_state())
+
+    def test_play_out(self):
+        self.assertEqual(self.board.play_out([3, 17], True), "player")
+        self.assertIsNone(self.board.play_out([17], True))
+        self.assertEqual(self.board.play_out([17], False), "player")
+        self.assertDictEqual(self.board.cells,
+                             SparseBoard.from_state(self.state, 4).cells)
+
+    def test_is_full(self):
+        board = SparseBoard.from_state(["ox", "xo"], 3)
+        self.assertTrue(board.is_full())
+        self.assertTrue(board.is_game_over())
+        self.assertFalse(self.board.is_full())
+
+
+class SparseGameTest(TestCase):
+
+    def setUp(self):
+        self.game = Game(50, 50, 5, sparse=True)
+
+    def test_board(self):
+        self.assertIsInstance(self.game.board, SparseBoard)
+        self.game.start(player_first=True)
+        self.assertIsInstance(self.game.board, SparseBoard)
+        self.assertIsInstance(self.game.get_board(self.game.state),
+                              SparseBoard)
+
+    def test_make_move(self):
+        ai_class = ai.configure_ai(ai.MCTSAI, playouts=20, seed=1)
+        self.game.start(ai_class=ai_class, player_first=True)
+        self.game.make_move(25, 25)
+        self.assertEqual(self.game.board.pieces, 2)
+        self.assertEqual(self.game.state[24][24], 'x')
+        self.assertIsNone(self.game.get_winner())
+
+    def test_heuristic_ai(self):
+        game = Game(9, 9, 4, sparse=True)
+        game.start(ai_class=ai.get_heuristic_ai_class(1), player_first=True)
+        game.make_move(5, 5)
+        dense = Game(9, 9, 4)
+        dense.start(ai_class=ai.get_heuristic_ai_class(1), player_first=True)
+        dense.make_move(5, 5)
+        self.assertListEqual(game.state, dense.state)
@@ -0,0 +1,77 @@
+import unittest
+
+from tic import ai
+from tic.game import Game
+from tic.stats import SearchStats
+from tic.utils import TranspositionTable
+
+
+class SearchStatsTest(unittest.TestCase):
+
+    def test_visit(self):
+        stats = SearchStats()
+        stats.visit(0)
+        stats.visit(2, terminal=True)
+        stats.visit(1, evaluated=True)
+        self.assertEqual(stats.nodes, 3)
+        self.assertEqual(stats.terminal, 1)
+        self.assertEqual(stats.evaluated, 1)
+        self.assertEqual(stats.max_depth, 2)
+
+    def test_cache_lookups(self):
+        cache = TranspositionTable()
+        cache.get(1)
+        stats = SearchStats()
+        stats.watch(cache)
+        cache.store(1, 0, 0, 1, 0)
+        cache.get(1)
+        cache.get(2)
+        stats.finish("search")
+        self.assertEqual((stats.cache_hits, stats.cache_misses), (1, 1))
+        self.assertEqual(stats.hit_rate, 0.5)
+        self.assertEqual(stats.cache_bytes, cache.size_bytes)
+        self.assertEqual(stats.as_dict()['source'], "search")
+
+    def test_start(self):
+        stats = SearchStats()
+        stats.visit(3)
+        stats.start()
+        self.assertEqual(stats.nodes, 0)
+        self.assertIsNone(stats.hit_rate)
+
+
+class AIStatsTest(unittest.TestCase):
+
+    def test_disabled(self):
+        self.assertIsNone(ai.MinimaxAI(Game(3, 3), 'o').stats)
+
+    def test_minimax(self):
+        game = Game(3, 3)
+        game.state = ['x..', '...', '...']
+        minimax = ai.configure_ai(ai.MinimaxAI, collect_stats=True)(game, 'o')
+        minimax.next_move()
+        stats = minimax.stats
+        self.assertEqual(stats.source, "search")
+        self.assertGreater(stats.nodes, stats.terminal)
+        self.assertGreater(stats.terminal, 0)
+        self.assertEqual(stats.evaluated, 0)
+        self.assertLessEqual(stats.max_depth, 8)
+        self.assertGreater(stats.cache_misses, 0)
+        self.assertGreater(stats.elapsed, 0)
+
+    def test_heuristic(self):
+        game = Game(5, 5, 4)
+        game.state = ['.....', '.x...', '.....', '.....', '.....']
+        ai_class = ai.configure_ai(ai.get_heuristic_ai_class(2),
+                                   collect_stats=True)
+        heuristic = ai_class(game, 'o')
+        heuristic.next_move()
+        self.assertEqual(heuristic.stats.max_depth, 2)
+        self.assertGreater(heuristic.stats.evaluated, 0)
+
+    def test_mcts(self):
+        ai_class = ai.configure_ai(ai.MCTSAI, playouts=50, seed=1,
+                                   collect_stats=True)
+        mcts = ai_class(Game(3, 3), 'o')
+        mcts.next_move()
+        self.assertEqual(mcts.stats.nodes, 50)
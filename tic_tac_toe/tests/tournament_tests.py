@@ -0,0 +1,77 @@
+import random
+import unittest
+
+from tic import ai, tournament
+from tic.board import Board, get_geometry
+
+
+class GetAIClassTest(unittest.TestCase):
+
+    def test_get_ai_class(self):
+        self.assertIs(tournament.get_ai_class('minimax'), ai.MinimaxAI)
+        self.assertIs(tournament.get_ai_class('simple'), ai.SimpleAI)
+        self.assertEqual(tournament.get_ai_class('heuristic-3').max_depth, 3)
+        with self.assertRaises(ValueError):
+            tournament.get_ai_class('heuristic-x')
+
+
+class RandomOpeningTest(unittest.TestCase):
+
+    def test_random_opening(self):
+        moves = tournament.random_opening((3, 3, 3), 4, random.Random(1))
+        self.assertEqual(len(moves), 4)
+        self.assertEqual(len(set(moves)), 4)
+
+    def test_stops_before_game_over(self):
+        for seed in range(20):
+            moves = tournament.random_opening((3, 3, 3), 9,
+                                              random.Random(seed))
+            board = Board(get_geometry(3, 3, 3))
+            for ply, index in enumerate(moves):
+                board = board.play(index, ply % 2 == 0)
+            self.assertFalse(board.is_game_over())
+
+
+class PlayGameTest(unittest.TestCase):
+
+    def test_minimax_wins_simple(self):
+        specs = (ai.get_ai_spec(ai.MinimaxAI), ai.get_ai_spec(ai.SimpleAI))
+        winner, times = tournament.play_game(specs, (3, 3, 3), [])
+        self.assertEqual(winner, 0)
+        self.assertEqual(len(times[0]), len(times[1]) + 1)
+
+    def test_opening(self):
+        specs = (ai.get_ai_spec(ai.SimpleAI), ai.get_ai_spec(ai.SimpleAI))
+        # Simple AIs fill the free cells in order after the opening.
+        winner, times = tournament.play_game(specs, (3, 3, 3), [4, 0, 8])
+        self.assertEqual(winner, 0)
+        self.assertEqual([len(moves) for moves in times], [2, 2])
+
+
+class RunTournamentTest(unittest.TestCase):
+
+    def test_minimax_never_loses(self):
+        report = tournament.run_tournament(ai.MinimaxAI, ai.SimpleAI,
+                                           (3, 3, 3), games=10, seed=1)
+        self.assertEqual(report['losses'], 0)
+        self.assertEqual(report['wins'] + report['draws'], 10)
+        self.assertAlmostEqual(sum(report['rates'].values()), 1.0)
+        self.assertGreater(report['latency'][0]['moves'], 0)
+        self.assertGreater(report['games_per_second'], 0)
+
+    def test_parallel(self):
+        report = tournament.run_tournament(ai.MinimaxAI, ai.MinimaxAI,
+                                           (3, 3, 3), games=4, workers=2,
+                                           opening_plies=0)
+        self.assertEqual(report['draws'], 4)
+
+
+class LatencyTest(unittest.TestCase):
+
+    def test_latency(self):
+        times = [0.1 * value for value in range(1, 21)]
+        result = tournament.latency(times)
+        self.assertEqual(result['moves'], 20)
+        self.assertAlmostEqual(result['p95'], 1.9)
+        self.assertAlmostEqual(result['max'], 2.0)
+        self.assertIsNone(tournament.latency([])['median'])
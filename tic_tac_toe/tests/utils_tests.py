@@ -68,6 +68,142 @@ class StatesCacheTest(TestCase):
         result = self.cache.all_equivalent_states(state)
         self.assertSetEqual(possible, set(result))
 
+    def test_all_equivalent_states_rectangular(self):
+        state = (["ab", "cd", "ef"], False)
+        possible = {
+            ("abcdef", False),
+            ("fedcba", False),
+            ("efcdab", False),
+            ("badcfe", False),
+        }
+        result = self.cache.all_equivalent_states(state)
+        self.assertSetEqual(possible, set(result))
+
+    def test_single_entry_per_symmetric_states(self):
+        self.cache[(["x..", "...", "..."], True)] = 1
+        self.cache[(["..x", "...", "..."], True)] = 2
+        self.assertEqual(len(self.cache._cache), 1)
+        self.assertEqual(self.cache[(["...", "...", "x.."], True)], 2)
+
+
+def table_entry_bytes():
+    return utils.TranspositionTable.entry_bytes
+
+
+class BoundedCacheTest(TestCase):
+
+    def test_unbounded(self):
+        cache = utils.BoundedCache()
+        for key in range(100):
+            cache.put(key, key)
+        self.assertEqual(len(cache), 100)
+        self.assertEqual(cache.evictions, 0)
+
+    def test_stats(self):
+        cache = utils.BoundedCache(max_entries=2)
+        cache.put(1, 'a')
+        cache.get(1)
+        cache.get(2)
+        cache.put(2, 'b')
+        cache.put(3, 'c')
+        self.assertDictEqual(cache.stats(), {
+            'hits': 1, 'misses': 1, 'evictions': 1, 'size': 2,
+            'bytes': 2 * cache.entry_bytes,
+        })
+
+    def test_lru(self):
+        cache = utils.BoundedCache(max_entries=2, policy='lru')
+        cache.put(1, 'a')
+        cache.put(2, 'b')
+        cache.get(1)
+        cache.put(3, 'c')
+        self.assertIn(1, cache)
+        self.assertNotIn(2, cache)
+
+    def test_always_replace(self):
+        cache = utils.BoundedCache(max_entries=2, policy='always')
+        cache.put(1, 'a')
+        cache.put(2, 'b')
+        cache.get(1)
+        cache.put(3, 'c')
+        self.assertNotIn(1, cache)
+        self.assertIn(2, cache)
+        cache.put(2, 'd')
+        self.assertEqual(cache.get(2), 'd')
+
+    def test_depth_preferred(self):
+        table = utils.TranspositionTable(max_entries=2, policy='depth')
+        table.store(1, 0, 0, 5, None)
+        table.store(2, 0, 0, 2, None)
+        table.store(3, 0, 0, 1, None)
+        self.assertNotIn(3, table)
+        table.store(4, 0, 0, 3, None)
+        self.assertIn(1, table)
+        self.assertNotIn(2, table)
+        self.assertIn(4, table)
+
+    def test_policy_instance(self):
+        policy = utils.LRU()
+        cache = utils.BoundedCache(policy=policy)
+        self.assertIs(cache.policy, policy)
+
+
+class TranspositionTableTest(TestCase):
+
+    def setUp(self):
+        self.table = utils.TranspositionTable()
+
+    def test_store(self):
+        self.assertIsNone(self.table.get(7))
+        self.table.store(7, 10, 1, 3, 4)
+        entry = self.table.get(7)
+        self.assertEqual((entry.score, entry.kind, entry.depth, entry.move),
+                         (10, 1, 3, 4))
+        self.assertEqual(len(self.table), 1)
+
+    def test_store_replaces(self):
+        self.table.store(7, 10, 1, 3, 4)
+        self.table.store(7, 5, 0, 3, None)
+        self.assertEqual(self.table.get(7).score, 5)
+        self.assertEqual(len(self.table), 1)
+
+    def test_store_keeps_deeper(self):
+        self.table.store(7, 10, 1, 3, 4)
+        self.table.store(7, 5, 0, 2, None)
+        self.assertEqual(self.table.get(7).score, 10)
+
+    def test_max_bytes(self):
+        table = utils.TranspositionTable(max_bytes=10 * table_entry_bytes())
+        self.assertEqual(table.max_entries, 10)
+        table = utils.TranspositionTable(max_entries=5, max_bytes=10**6)
+        self.assertEqual(table.max_entries, 5)
+
+    def test_age(self):
+        self.table.store(1, 10, 1, 3, 4, ply=2)
+        self.table.store(2, 10, 1, 3, 4, ply=3)
+        self.table.store(3, 10, 1, 3, 4, ply=5)
+        self.table.age(3)
+        self.assertNotIn(1, self.table)
+        self.assertIn(2, self.table)
+        self.assertIn(3, self.table)
+
+    def test_clear(self):
+        self.table.store(7, 10, 1, 3, 4)
+        self.table.clear()
+        self.assertEqual(len(self.table), 0)
+
+
+class CanonicalStateTest(TestCase):
+
+    def test_symmetric_states_rectangular(self):
+        states = utils.symmetric_states(["abc", "def"])
+        self.assertListEqual(states, ["abcdef", "fedcba", "defabc",
+                                      "cbafed"])
+
+    def test_canonical_state(self):
+        self.assertEqual(utils.canonical_state([".x", ".."]), ("...x", 2))
+        self.assertEqual(utils.canonical_state(["..", "x."])[0], "...x")
+
 
 class RotateTest(TestCase):
 
@@ -0,0 +1,101 @@
+import random
+import unittest
+from unittest import mock
+
+from tic import vectorized
+from tic.board import Board, get_geometry
+from tic.game import Game
+from tic.heuristic import LineEvaluator
+
+
+@unittest.skipIf(not vectorized.AVAILABLE, "NumPy is not installed")
+class VectorizedTest(unittest.TestCase):
+
+    def random_boards(self, lines, columns, win_count, count=30):
+        geometry = get_geometry(lines, columns, win_count)
+        rand = random.Random(1)
+        for _ in range(count):
+            board = Board(geometry)
+            for ply in range(rand.randrange(geometry.size + 1)):
+                board = board.play(rand.choice(list(board.moves())),
+                                   ply % 2 == 0)
+            yield board
+
+    def test_winner(self):
+        state = [".......",
+                 ".x.....",
+                 "..x....",
+                 "...x...",
+                 "....x..",
+                 ".....x.",
+                 "ooooxoo"]
+        self.assertEqual(vectorized.winner(Board.from_state(state, 5)),
+                         "player")
+        state[1] = "......."
+        self.assertIsNone(vectorized.winner(Board.from_state(state, 5)))
+        state[6] = "..ooooo"
+        self.assertEqual(vectorized.winner(Board.from_state(state, 5)), "ai")
+
+    def test_winner_matches_board(self):
+        for config in ((7, 7, 5), (8, 5, 4), (1, 6, 3)):
+            for board in self.random_boards(*config):
+                winner = board.winner()
+                if winner is not None:
+                    self.assertIsNotNone(vectorized.winner(board))
+                else:
+                    self.assertIsNone(vectorized.winner(board))
+
+    def test_score(self):
+        state = ["oo.",
+                 "...",
+                 "..."]
+        board = Board.from_state(state, 3)
+        self.assertEqual(vectorized.score(board, True), 2005)
+        self.assertEqual(vectorized.score(board, False), 5)
+
+    def test_score_matches_evaluator(self):
+        for config in ((7, 7, 5), (8, 5, 4), (3, 3, 3), (1, 6, 3)):
+            evaluator = LineEvaluator(get_geometry(*config))
+            for board in self.random_boards(*config):
+                evaluator.reset(board)
+                for ai_move in (True, False):
+                    self.assertEqual(vectorized.score(board, ai_move),
+                                     evaluator.score(ai_move))
+
+    def test_winners(self):
+        boards = list(self.random_boards(7, 7, 5))
+        self.assertListEqual(vectorized.winners(boards),
+                             [vectorized.winner(board) for board in boards])
+
+    def test_scores(self):
+        boards = list(self.random_boards(7, 7, 5))
+        for ai_move in (True, False):
+            self.assertListEqual(
+                vectorized.scores(boards, ai_move),
+                [vectorized.score(board, ai_move) for board in boards])
+
+
+class ShouldUseTest(unittest.TestCase):
+
+    def test_small_board(self):
+        self.assertFalse(vectorized.should_use(get_geometry(3, 3, 3)))
+
+    def test_big_board(self):
+        self.assertEqual(vectorized.should_use(get_geometry(15, 15, 5)),
+                         vectorized.AVAILABLE)
+        self.assertFalse(vectorized.should_use(get_geometry(14, 14, 5)))
+        self.assertEqual(vectorized.should_use(get_geometry(14, 14, 5), 3),
+                         vectorized.AVAILABLE)
+
+    def test_big_batch(self):
+        self.assertEqual(vectorized.should_use(get_geometry(3, 3, 3), 100),
+                         vectorized.AVAILABLE)
+
+    @mock.patch.object(vectorized, 'AVAILABLE', False)
+    def test_not_available(self):
+        self.assertFalse(vectorized.should_use(get_geometry(30, 30, 5)))
+        self.assertIsNone(Game(30, 30, 5).get_winner())
+
+
+if __name__ == '__main__':
+    unittest.main()
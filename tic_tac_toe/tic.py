@@ -3,8 +3,15 @@ import time
 import argparse
 
 from tic.game import Game
-from tic.ai import MinimaxAI, get_heuristic_ai_class
+from tic.ai import (MCTSAI, MinimaxAI, configure_ai,
+                    get_heuristic_ai_class)
 from tic.exceptions import IllegalMoveError
+from tic.ponder import Ponderer
+
+# Boards with more cells are sparse by default.
+SPARSE_CELLS = 400
+# Distance from the pieces of the moves searched on the sparse boards.
+SPARSE_NEIGHBOURHOOD = 2
 
 
 def print_state(state):
@@ -27,18 +34,115 @@ you want to place your piece, counting from 1."""
     parser.add_argument('--win', '-w', dest='win_count', type=int,
                         default=3, help="number of pieces on a straight line "
                                         "required to win (default 3)")
+    parser.add_argument('--book', '-b', dest='book', default=None,
+                        help="opening book built with tic.build_book, used "
+                             "by the minimax and heuristic AIs")
+    parser.add_argument('--think-time', '-t', dest='think_time', type=float,
+                        default=None, help="seconds the heuristic or mcts "
+                                           "AI may think on a move (default "
+                                           "is search depth of 3 or the "
+                                           "number of playouts)")
+    parser.add_argument('--ai', dest='ai', default=None,
+                        choices=['minimax', 'heuristic', 'mcts'],
+                        help="AI to play against (default is minimax on "
+                             "boards up to 12 cells and heuristic on bigger "
+                             "ones)")
+    parser.add_argument('--playouts', '-p', dest='playouts', type=int,
+                        default=None, help="number of random games the mcts "
+                                           "AI plays out on a move (default "
+                                           "{})".format(MCTSAI.playouts))
+    parser.add_argument('--solve', '-s', dest='solver_nodes', type=int,
+                        default=None, help="number of positions the "
+                                           "proof-number solver may visit to "
+                                           "find a move that never loses, "
+                                           "before the minimax or heuristic "
+                                           "AI searches")
+    parser.add_argument('--solver-results', dest='solver_results',
+                        default=None, help="file keeping the positions "
+                                           "solved between the runs")
+    parser.add_argument('--sparse', dest='sparse', action='store_true',
+                        help="keep only the occupied cells of the board, "
+                             "default on boards over {} cells".format(
+                                 SPARSE_CELLS))
+    parser.add_argument('--neighbourhood', '-n', dest='neighbourhood',
+                        type=int, default=None,
+                        help="search only the moves at most this many lines "
+                             "and columns away from the pieces, and the "
+                             "forced ones (default {} on the sparse boards, "
+                             "all the moves on the other ones)".format(
+                                 SPARSE_NEIGHBOURHOOD))
+    parser.add_argument('--stats', dest='stats', action='store_true',
+                        help="print statistics of the search after every AI "
+                             "move")
+    parser.add_argument('--cache-file', dest='cache_file', default=None,
+                        help="SQLite file keeping the search results of the "
+                             "minimax and heuristic AIs between the runs")
+    parser.add_argument('--ponder', dest='ponder', action='store_true',
+                        help="let the AI think while you do")
+    parser.add_argument('--workers', dest='workers', type=int, default=1,
+                        help="number of processes searching the AI move "
+                             "(default 1)")
     args = parser.parse_args()
 
     if not (args.lines > 0 and args.columns > 0 and args.win_count > 0):
         print("Neither one of the parameters can be <= 0.")
         exit(1)
+    if args.workers <= 0:
+        print("Number of workers should be positive.")
+        exit(1)
+    if args.think_time is not None and args.think_time <= 0:
+        print("Think time should be positive.")
+        exit(1)
+    if args.playouts is not None and args.playouts <= 0:
+        print("Number of playouts should be positive.")
+        exit(1)
+    if args.solver_nodes is not None and args.solver_nodes <= 0:
+        print("Solver budget should be positive.")
+        exit(1)
+    if args.neighbourhood is not None and args.neighbourhood <= 0:
+        print("Neighbourhood should be positive.")
+        exit(1)
 
-    game = Game(args.lines, args.columns, args.win_count)
+    sparse = args.sparse or args.lines*args.columns > SPARSE_CELLS
+    if sparse and args.solver_nodes:
+        print("Solver can't be used on the sparse boards.")
+        exit(1)
+    if sparse and args.book:
+        print("Opening book can't be used on the sparse boards.")
+        exit(1)
+    game = Game(args.lines, args.columns, args.win_count, sparse=sparse)
 
-    if args.lines*args.columns <= 12:
+    ai_name = args.ai
+    if ai_name is None:
+        ai_name = 'minimax' if args.lines*args.columns <= 12 else 'heuristic'
+    if ai_name == 'minimax':
         ai_class = MinimaxAI
+    elif ai_name == 'mcts':
+        playouts = args.playouts
+        if playouts is None and args.think_time is None:
+            playouts = MCTSAI.playouts
+        ai_class = configure_ai(MCTSAI, playouts=playouts,
+                                think_time=args.think_time)
+    elif args.think_time is not None:
+        ai_class = get_heuristic_ai_class(None, think_time=args.think_time)
     else:
         ai_class = get_heuristic_ai_class(3)
+    if args.book and ai_name != 'mcts':
+        ai_class = configure_ai(ai_class, book=args.book)
+    if args.solver_nodes and ai_name != 'mcts':
+        ai_class = configure_ai(ai_class, solver_nodes=args.solver_nodes,
+                                solver_results=args.solver_results)
+    neighbourhood = args.neighbourhood
+    if neighbourhood is None and sparse:
+        neighbourhood = SPARSE_NEIGHBOURHOOD
+    if neighbourhood is not None:
+        ai_class = configure_ai(ai_class, neighbourhood=neighbourhood)
+    if args.cache_file and ai_name != 'mcts':
+        ai_class = configure_ai(ai_class, persistent_cache=args.cache_file)
+    if args.workers > 1:
+        ai_class = configure_ai(ai_class, workers=args.workers)
+    if args.stats:
+        ai_class = configure_ai(ai_class, collect_stats=True)
 
     while True:
         choice = input("Would you like to make first move? (Y/n)")
@@ -55,18 +159,27 @@ you want to place your piece, counting from 1."""
     end_time = time.time()
     if not player_first:
         print("AI thought for {} seconds.".format(end_time - start_time))
+        if args.stats:
+            print(game.ai.stats)
+    ponderer = Ponderer(game.ai) if args.ponder else None
     while not game.is_game_over():
         print_state(game.state)
         print("It's your move now. Enter line and column where you'd like "
               "to put your piece, counting from 1.")
         while True:
+            if ponderer:
+                ponderer.start(game.board)
+            text = input()
+            if ponderer:
+                ponderer.stop()
             try:
-                line, column = map(int, input().split(' '))
+                line, column = map(int, text.split(' '))
             except ValueError as e:
                 print("Couldn't parse your input :(")
                 print(e)
                 continue
             start_time = time.time()
+            pieces = game.board.pieces
             try:
                 game.make_move(line, column)
             except IllegalMoveError as e:
@@ -75,6 +188,9 @@ you want to place your piece, counting from 1."""
                 continue
             end_time = time.time()
             print("AI thought for {} seconds.".format(end_time - start_time))
+            # The AI doesn't move after the game ending move of the player.
+            if args.stats and game.board.pieces == pieces + 2:
+                print(game.ai.stats)
             break
     winner = game.get_winner()
     print_state(game.state)
@@ -1,27 +1,147 @@
-from .utils import StatesCache, shrink
+import math
+import random
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor, wait
 
-from .exceptions import NoLegalMoveError
+from . import batch
+from .board import AI, Board, get_geometry
+from .book import get_book
+from .heuristic import LineEvaluator
+from .moves import (Neighbourhood, center, center_sorted, neighbourhood,
+                    pieces_of)
+from .persistent import get_persistent_cache
+from .solver import get_solver
+from .stats import SearchStats
+from .utils import TranspositionTable
+
+from .exceptions import NoLegalMoveError, SearchAborted
+
+# Kinds of the scores stored in the search cache.
+EXACT = 0
+LOWER = 1
+UPPER = 2
+
+INF = float('inf')
+
+# Search caches shared between the games, by AI class and board geometry.
+_shared_caches = {}
+# Process pools of the parallel search, by number of workers.
+_executors = {}
+# AIs searching the root moves in the worker processes, by their spec.
+_worker_ais = {}
 
 
 def get_default_ai(game, ai_pieces):
     return SimpleAI(game, ai_pieces)
 
 
-def get_heuristic_ai_class(depth):
-    class HeuristicAIDepth(HeuristicAI):
-        max_depth = depth
-    return HeuristicAIDepth
+def get_heuristic_ai_class(depth, think_time=None, max_nodes=None):
+    return configure_ai(HeuristicAI, max_depth=depth, think_time=think_time,
+                        max_nodes=max_nodes)
+
+
+def configure_ai(ai_class, **options):
+    """
+    Returns subclass of the ai_class with the options set as its attributes.
+    """
+    return type(ai_class.__name__, (ai_class,), options)
+
+
+def get_executor(workers):
+    if workers not in _executors:
+        _executors[workers] = ProcessPoolExecutor(workers)
+    return _executors[workers]
+
+
+def get_ai_spec(ai_class):
+    """
+    Returns the nearest base class of the ai_class importable by its name,
+    together with the attributes set by the subclasses in between, so that
+    the class can be recreated in another process.
+    """
+    options = {}
+    for cls in ai_class.__mro__:
+        module = sys.modules.get(cls.__module__)
+        if getattr(module, cls.__qualname__, None) is cls:
+            return cls, options
+        for name, value in vars(cls).items():
+            if not name.startswith('__'):
+                options.setdefault(name, value)
+    raise TypeError("{} has no importable base class.".format(ai_class))
+
+
+def get_worker_ai(spec, config):
+    """
+    Returns the [ai, root] pair of the AI recreated from the spec in the
+    worker process. AIs are kept between the calls together with their
+    caches, and the root is the board the caches were prepared for.
+    """
+    base, options = spec
+    options = dict(options, workers=1, collect_stats=False)
+    key = (base, tuple(sorted(options.items())), config)
+    if key not in _worker_ais:
+        _worker_ais[key] = [configure_ai(base, **options)(None, AI), None]
+    return _worker_ais[key]
+
+
+def search_root_move(spec, config, ai, player, root_depth, move, limits):
+    """
+    Searches the AI move on the board in the worker process and returns its
+    score and the number of the nodes searched within the limits.
+    """
+    worker = get_worker_ai(spec, config)
+    worker_ai, root = worker
+    board = Board(get_geometry(*config), ai, player)
+    if root != board:
+        worker_ai._prepare_cache(board)
+        worker[1] = board
+    worker_ai._root_depth = root_depth
+    deadline = limits.get('deadline')
+    if deadline is not None and time.monotonic() > deadline:
+        # The job waited in the queue past the end of the think time.
+        raise SearchAborted("Think time ran out.")
+    worker_ai.set_search_limits(limits)
+    try:
+        score = worker_ai.minimax(board.play(move, True), False,
+                                  root_depth + 1)[0]
+        return score, worker_ai.searched_nodes()
+    finally:
+        worker_ai.set_search_limits({})
+        worker_ai.save_persistent()
+
+
+def run_playouts(spec, config, ai, player, playouts, deadline, seed):
+    """
+    Runs the Monte Carlo search of the board in the worker process and
+    returns visits of the root moves.
+    """
+    worker_ai = get_worker_ai(spec, config)[0]
+    worker_ai._random.seed(seed)
+    return worker_ai.search(Board(get_geometry(*config), ai, player),
+                            playouts, deadline)
 
 
 class BasicAI:
+    # Collect SearchStats of every move in the stats attribute.
+    collect_stats = False
 
     def __init__(self, game, pieces):
         self._game = game
         self._pieces = pieces
+        self.stats = SearchStats() if self.collect_stats else None
 
     def next_move(self):
         raise NotImplementedError
 
+    def ponder(self, board, stop):
+        """
+        Thinks on the board with the player to move, until the stop event is
+        set, so that the next move is found faster. Called in a background
+        thread, and next_move is called only after it returns.
+        """
+        pass
+
 
 class SimpleAI(BasicAI):
 
@@ -34,22 +154,296 @@ class SimpleAI(BasicAI):
 
 
 class MinimaxAI(BasicAI):
+    """
+    Searches the whole game tree on the bitboard of the game. Moves inside of
+    the search are indexes of the cells.
+
+    Depth of the root is the number of pieces on the board, so the scores
+    don't depend on the position the search started from, and the search
+    cache is kept between the moves.
+    """
     max_score = 10000
     min_score = -10000
+    # Budget and replacement policy of the caches, unlimited by default.
+    cache_entries = None
+    cache_bytes = None
+    cache_policy = 'depth'
+    # Keep the search cache between the moves of the game, and also between
+    # the games on the same board when shared_cache is set.
+    keep_cache = True
+    shared_cache = False
+    # Path to the opening book consulted before searching.
+    book = None
+    # Number of processes searching the root moves, 1 searches serially.
+    workers = 1
+    # Node budget of the proof-number solver tried before searching, and the
+    # file keeping the solved positions between the runs.
+    solver_nodes = None
+    solver_results = None
+    # Distance from the pieces of the cells searched, None searches all the
+    # empty cells. Moves winning or blocking a win at once are always tried.
+    neighbourhood = None
+    # Number of the likely player replies searched while pondering.
+    ponder_moves = 3
+    # SQLite file keeping the search results between the runs, shared by
+    # the processes, and the most results loaded from it into the cache.
+    persistent_cache = None
+    persistent_entries = 100000
 
     def __init__(self, *args, **kwargs):
-        self._cache = StatesCache()
+        self._cache = self._new_cache()
+        self._root_depth = 0
+        self._neighbourhood = None
+        self._stop = None
+        self._loaded_cache = None
+        self._namespace = None
         super(MinimaxAI, self).__init__(*args, **kwargs)
 
+    def _new_cache(self):
+        return TranspositionTable(self.cache_entries, self.cache_bytes,
+                                  self.cache_policy)
+
+    def _prepare_cache(self, board):
+        """
+        Picks the search cache for the move and ages out the positions which
+        can't be reached from the board.
+        """
+        if self.shared_cache:
+            key = (type(self), board.geometry)
+            if key not in _shared_caches:
+                _shared_caches[key] = self._new_cache()
+            self._cache = _shared_caches[key]
+        elif self.keep_cache:
+            self._cache.age(board.pieces)
+        else:
+            self._cache = self._new_cache()
+        if self.persistent_cache is not None:
+            self._load_persistent(board)
+
+    def persistent_namespace(self, geometry):
+        """
+        Returns the name the results of the AI on the geometry are kept
+        under in the persistent cache. The results depend on the AI, the
+        board config, the board keys and the searched moves.
+        """
+        namespace = '{}/{}x{}x{}'.format(
+            get_ai_spec(type(self))[0].__name__, geometry.lines,
+            geometry.columns, geometry.win_count)
+        if geometry.sparse:
+            namespace += '/sparse'
+        if self.neighbourhood is not None:
+            namespace += '/near{}'.format(self.neighbourhood)
+        return namespace
+
+    def _load_persistent(self, board):
+        """
+        Loads the hottest results still reachable from the board into the
+        search cache, once for every cache.
+        """
+        cache = self._cache
+        namespace = self.persistent_namespace(board.geometry)
+        if cache is self._loaded_cache and namespace == self._namespace:
+            return
+        limit = self.persistent_entries
+        if cache.max_entries is not None:
+            limit = min(limit, cache.max_entries)
+        persistent = get_persistent_cache(self.persistent_cache)
+        for key, entry in persistent.load(namespace, board.pieces, limit):
+            cache.put(key, entry)
+        cache.written = set()
+        self._loaded_cache = cache
+        self._namespace = namespace
+
+    def save_persistent(self):
+        """
+        Writes the results stored in the search cache since the last call
+        to the persistent cache, in one transaction.
+        """
+        cache = self._cache
+        if self.persistent_cache is None or not cache.written:
+            return
+        persistent = get_persistent_cache(self.persistent_cache)
+        for key in cache.written:
+            entry = cache.peek(key)
+            if entry is not None:
+                persistent.put(self._namespace, key, entry)
+        cache.written.clear()
+        persistent.flush()
+
+    def cache_stats(self):
+        return {'search': self._cache.stats()}
+
     def next_move(self):
-        if ''.join(self._game.state).count(self._game.empty_place) == 0:
+        board = self._game.board
+        if board.is_full():
             raise NoLegalMoveError("AI found no legal move to make.")
-        self._cache = StatesCache()
-        score, move = self.minimax(self._game.state, True, 0)
+        stats = self.stats
+        if stats is not None:
+            stats.start()
+        move, source = self.book_move(board), "book"
+        if move is None:
+            move, source = self.solved_move(board), "solver"
+        if move is None:
+            self._prepare_cache(board)
+            self._root_depth = board.pieces
+            if stats is not None:
+                stats.watch(self._cache)
+            move, source = self.search(board), "search"
+            self.save_persistent()
+        if stats is not None:
+            stats.finish(source)
+        return divmod(move, board.geometry.columns)
+
+    def search(self, board):
+        """
+        Returns the best move for the AI on the board.
+        """
+        return self.root_search(board)[1]
+
+    def ponder(self, board, stop):
+        """
+        Searches the positions after the likely replies of the player, in the
+        order of order_moves, filling the search cache. Doesn't ponder when
+        the cache is not kept between the moves, or the search runs in the
+        worker processes.
+        """
+        if (not self.keep_cache or self.workers > 1 or
+                board.is_game_over()):
+            return
+        self._stop = stop
+        try:
+            for index in self.order_moves(board, False)[:self.ponder_moves]:
+                reply = board.play(index, False)
+                if stop.is_set():
+                    break
+                if reply.is_game_over():
+                    continue
+                self._prepare_cache(reply)
+                self._root_depth = reply.pieces
+                self.search(reply)
+        except SearchAborted:
+            pass
+        finally:
+            self._stop = None
+            self.save_persistent()
+
+    def root_search(self, board):
+        """
+        Returns the score and the best move of the board, searched in the
+        worker processes when there is more than one.
+        """
+        if self.workers > 1:
+            return self.parallel_root_search(board)
+        return self.minimax(board, True, self._root_depth)
+
+    def search_limits(self, jobs):
+        """
+        Returns the limits of the running search to pass to every one of the
+        jobs of the workers.
+        """
+        return {}
+
+    def set_search_limits(self, limits):
+        pass
+
+    def searched_nodes(self):
+        """
+        Returns the number of the nodes counted against the limits.
+        """
+        return 0
+
+    def add_searched_nodes(self, nodes):
+        """
+        Counts the nodes searched by the workers against the limits.
+        """
+        pass
+
+    def parallel_root_search(self, board):
+        """
+        Searches every root move with the full window in the worker processes.
+        The moves are ordered as in the serial search and the first best one
+        is picked, so the result is the same.
+        """
+        geometry = board.geometry
+        key, symmetry = board.canonical(True)
+        entry = self._cache.get(key)
+        first = None
+        if entry is not None:
+            first = geometry.inverse_symmetries[symmetry][entry.move]
+        moves = self.order_moves(board, True, first)
+
+        spec = get_ai_spec(type(self))
+        config = (geometry.lines, geometry.columns, geometry.win_count)
+        limits = self.search_limits(len(moves))
+        executor = get_executor(self.workers)
+        jobs = [executor.submit(search_root_move, spec, config, board.ai,
+                                board.player, self._root_depth, move, limits)
+                for move in moves]
+        try:
+            results = [job.result() for job in jobs]
+        finally:
+            # The running jobs can't be cancelled, but they stop at the same
+            # deadline, so they are waited for to leave the pool free.
+            for job in jobs:
+                job.cancel()
+            wait(jobs)
+        self.add_searched_nodes(sum(nodes for _, nodes in results))
+
+        result = None
+        for (score, _), move in zip(results, moves):
+            if result is None or score > result[0]:
+                result = (score, move)
+        depth = self._root_depth + 1
+        self._cache.store(key, result[0], EXACT,
+                          self.search_depth(board, depth),
+                          geometry.symmetries[symmetry][result[1]],
+                          board.pieces)
+        return result
+
+    def book_move(self, board):
+        """
+        Returns the move from the opening book, or None if there's no book or
+        the position is not in it. The book is opened on the first use.
+        """
+        # The book is keyed by the bitboard keys, the sparse boards have
+        # different ones.
+        if self.book is None or board.geometry.sparse:
+            return None
+        move = get_book(self.book).move(board)
+        if move is None or not board.empty >> move & 1:
+            return None
         return move
 
-    def score(self, state, depth):
-        winner = self._game.get_winner(state)
+    def solved_move(self, board):
+        """
+        Returns the move keeping the win or the draw proven by the solver.
+        Returns None if the solver is not used, the board is sparse, the
+        position is lost, or it was not solved within solver_nodes positions.
+        """
+        # The solver walks the win masks, which the sparse boards don't have.
+        if self.solver_nodes is None or board.geometry.sparse:
+            return None
+        result = get_solver(self.solver_results).best_move(
+            board, self.solver_nodes)
+        if result is None:
+            return None
+        return result[1]
+
+    def is_game_over(self, board):
+        """
+        Checks only the last move of the board, since the search never goes
+        on from finished positions.
+        """
+        return board.is_full() or board.last_winner() is not None
+
+    def search_depth(self, board, depth):
+        """
+        Number of moves the position on the given depth is searched to.
+        """
+        return board.geometry.size
+
+    def score(self, board, depth):
+        winner = board.last_winner()
         if winner is None:
             score = 0
         elif winner == "ai":
@@ -58,32 +452,130 @@ class MinimaxAI(BasicAI):
             score = self.min_score + depth
         return score
 
-    def minimax(self, state, ai_move, depth):
-        depth += 1
-        if self._game.is_game_over(state):
-            return (self.score(state, depth), (-1, -1))
+    def _neighbourhood_at(self, board):
+        """
+        Returns the neighbourhood of the pieces set to the board.
+        """
+        near = self._neighbourhood
+        if (near is None or near.geometry is not board.geometry or
+                near.distance != self.neighbourhood):
+            near = self._neighbourhood = Neighbourhood(board.geometry,
+                                                       self.neighbourhood)
+            near.reset(board)
+        elif not near.is_at(board):
+            near.reset(board)
+        return near
 
-        try:
-            return self._cache[(state, ai_move)]
-        except KeyError:
-            pass
+    def make_move(self, board, index, ai_move):
+        """
+        Called by the search before going to the move on the board.
+        """
+        if self.neighbourhood is not None:
+            self._neighbourhood_at(board).play(index)
 
-        scoremoves = []
+    def unmake_move(self):
+        """
+        Called by the search after returning from the last made move.
+        """
+        if self.neighbourhood is not None:
+            self._neighbourhood.undo()
 
-        for i, row in enumerate(state):
-            for j, val in enumerate(row):
-                if val != self._game.empty_place:
-                    continue
-                piece = self._pieces if ai_move else self._game.player_piece
-                next_state = self._game.get_next_state(state, i, j, piece)
-                sm = (self.minimax(next_state, not ai_move, depth)[0], (i, j))
-                scoremoves.append(sm)
+    def candidate_moves(self, board, wins, blocks):
+        """
+        Returns bit mask of the empty cells worth searching: all of them, or
+        with the neighbourhood set only the ones near the pieces, the center
+        of the empty board, and the forced ones.
+        """
+        empty = board.empty
+        if self.neighbourhood is None:
+            return empty
+        if not board.pieces:
+            return 1 << center(board.geometry)
+        near = self._neighbourhood_at(board).mask | wins | blocks
+        return (near & empty) or empty
 
-        if ai_move:
-            result = max(scoremoves, key=lambda x: x[0])
+    def order_moves(self, board, ai_move, first=None):
+        """
+        Returns empty cells in the order they are worth searching: the best
+        move found before, then winning moves, then moves blocking the
+        opponent's win, then the rest from the center of the board outwards.
+        """
+        wins, blocks = board.threats(ai_move)
+        empty = self.candidate_moves(board, wins, blocks)
+        if first is not None:
+            empty &= ~(1 << first)
+        winning, blocking, rest = [], [], []
+        for index in center_sorted(board.geometry, empty):
+            bit = 1 << index
+            if wins & bit:
+                winning.append(index)
+            elif blocks & bit:
+                blocking.append(index)
+            else:
+                rest.append(index)
+        head = [first] if first is not None else []
+        return head + winning + blocking + rest
+
+    def minimax(self, board, ai_move, depth, alpha=-INF, beta=INF):
+        """
+        Fail-soft alpha-beta search. Returns the score and the best move.
+        The score is exact when it lies between alpha and beta, otherwise it
+        is only a bound of the real one.
+        """
+        if self._stop is not None and self._stop.is_set():
+            raise SearchAborted("Pondering was stopped.")
+        depth += 1
+        game_over = self.is_game_over(board)
+        if self.stats is not None:
+            self.stats.visit(depth - self._root_depth - 1, game_over)
+        if game_over:
+            return (self.score(board, depth), None)
+
+        # Symmetric positions share the entry, which keeps the best move as
+        # a cell of the canonical board.
+        key, symmetry = board.canonical(ai_move)
+        search_depth = self.search_depth(board, depth)
+        first = None
+        entry = self._cache.get(key)
+        if entry is not None:
+            first = board.geometry.inverse_symmetries[symmetry][entry.move]
+            score, kind = entry.score, entry.kind
+            if entry.depth >= search_depth and (
+                    kind == EXACT or
+                    (kind == LOWER and score >= beta) or
+                    (kind == UPPER and score <= alpha)):
+                return (score, first)
+
+        low, high = alpha, beta
+        result = None
+        for index in self.order_moves(board, ai_move, first):
+            next_board = board.play(index, ai_move)
+            self.make_move(board, index, ai_move)
+            try:
+                score = self.minimax(next_board, not ai_move, depth,
+                                     alpha, beta)[0]
+            finally:
+                self.unmake_move()
+            if ai_move:
+                if result is None or score > result[0]:
+                    result = (score, index)
+                alpha = max(alpha, score)
+            else:
+                if result is None or score < result[0]:
+                    result = (score, index)
+                beta = min(beta, score)
+            if alpha >= beta:
+                break
+
+        if result[0] <= low:
+            kind = UPPER
+        elif result[0] >= high:
+            kind = LOWER
         else:
-            result = min(scoremoves, key=lambda x: x[0])
-        self._cache[(state, ai_move)] = result
+            kind = EXACT
+        move = board.geometry.symmetries[symmetry][result[1]]
+        self._cache.store(key, result[0], kind, search_depth, move,
+                          board.pieces)
         return result
 
 
@@ -92,61 +584,365 @@ class HeuristicAI(MinimaxAI):
     Makes move based on heuristic positions evaluation. With the value of
     max_depth set to 4 thinks approximately for 10 seconds on the move with 5x5
     board and 4 in a row.
+
+    When think_time (in seconds) or max_nodes is set, deepens the search one
+    move at a time up to max_depth, or until the end of the game if it is
+    None, and plays the best move of the last search finished within the
+    budget. With several workers max_nodes is shared out between the root
+    moves searched by them, so they search at most as many nodes in total.
     """
     max_depth = 4
+    think_time = None
+    max_nodes = None
 
     def __init__(self, *args, **kwargs):
-        self._score_cache = StatesCache()
+        self._evaluator = None
+        self._depth_limit = self.max_depth
+        self._deadline = None
+        self._node_limit = None
+        self._nodes = 0
         super(HeuristicAI, self).__init__(*args, **kwargs)
 
-    def score(self, state, ai_move, depth):
-        if self._game.is_game_over(state):
-            return super(HeuristicAI, self).score(state, depth)
+    def _evaluator_at(self, board):
+        """
+        Returns the line evaluator set to the board.
+        """
+        evaluator = self._evaluator
+        if evaluator is None or evaluator.geometry is not board.geometry:
+            evaluator = self._evaluator = LineEvaluator(board.geometry)
+            evaluator.reset(board)
+        elif not evaluator.is_at(board):
+            evaluator.reset(board)
+        return evaluator
+
+    def make_move(self, board, index, ai_move):
+        self._evaluator_at(board).play(index, ai_move)
+        super(HeuristicAI, self).make_move(board, index, ai_move)
+
+    def unmake_move(self):
+        self._evaluator.undo()
+        super(HeuristicAI, self).unmake_move()
+
+    def score(self, board, ai_move, depth):
+        if self.is_game_over(board):
+            return super(HeuristicAI, self).score(board, depth)
+        return self._evaluator_at(board).score(ai_move)
+
+    def scores(self, boards, ai_move, depth):
+        """
+        Returns list of the scores of all the boards, the same as calling
+        score on every one of them. The boards are evaluated together, so
+        prefer it to score for many positions outside of the search.
+        """
+        boards = list(boards)
+        winners = batch.winners(boards)
+        finished = [winner is not None or board.is_full()
+                    for board, winner in zip(boards, winners)]
+        values = iter(batch.scores(
+            [board for board, done in zip(boards, finished) if not done],
+            ai_move))
+        return [super(HeuristicAI, self).score(board, depth) if done
+                else next(values)
+                for board, done in zip(boards, finished)]
+
+    def search(self, board):
+        if self.think_time is None and self.max_nodes is None:
+            return super(HeuristicAI, self).search(board)
+
+        start = time.monotonic()
+        self._nodes = 0
+        last_depth = board.geometry.size - board.pieces
+        if self.max_depth is not None:
+            last_depth = min(last_depth, self.max_depth)
+        move = None
         try:
-            return self._score_cache[(state, ai_move)]
-        except KeyError:
+            for depth in range(1, last_depth + 1):
+                self._depth_limit = depth
+                # Best move of the previous depth is kept in the search cache
+                # and searched first.
+                move = self.root_search(board)[1]
+                # The first search always finishes, so there is a move.
+                if self.think_time is not None:
+                    self._deadline = start + self.think_time
+                self._node_limit = self.max_nodes
+        except SearchAborted:
             pass
+        finally:
+            self._depth_limit = self.max_depth
+            self._deadline = None
+            self._node_limit = None
+        return move
+
+    def search_limits(self, jobs):
+        # The monotonic clock is shared by the processes of the system, so
+        # the workers stop at the same time as the main one. The nodes left
+        # are shared out between the jobs.
+        node_limit = self._node_limit
+        if node_limit is not None:
+            node_limit = max(0, node_limit - self._nodes) // jobs
+        return {'depth_limit': self._depth_limit, 'deadline': self._deadline,
+                'node_limit': node_limit}
+
+    def set_search_limits(self, limits):
+        self._depth_limit = limits.get('depth_limit', self.max_depth)
+        self._node_limit = limits.get('node_limit')
+        self._nodes = 0
+        self._deadline = limits.get('deadline')
+
+    def searched_nodes(self):
+        return self._nodes
+
+    def add_searched_nodes(self, nodes):
+        self._nodes += nodes
+
+    def _check_budget(self):
+        self._nodes += 1
+        if self._node_limit is not None and self._nodes > self._node_limit:
+            raise SearchAborted("Node budget ran out.")
+        if (self._deadline is not None and not self._nodes & 255 and
+                time.monotonic() > self._deadline):
+            raise SearchAborted("Think time ran out.")
+
+    def search_depth(self, board, depth):
+        if self._depth_limit is None:
+            # Searched until the end of the game.
+            return super(HeuristicAI, self).search_depth(board, depth)
+        return self._depth_limit - (depth - self._root_depth)
+
+    def minimax(self, board, ai_move, depth, alpha=-INF, beta=INF):
+        self._check_budget()
+        game_over = self.is_game_over(board)
+        limit = self._depth_limit
+        if game_over or (limit is not None and
+                         depth - self._root_depth >= limit):
+            if self.stats is not None:
+                self.stats.visit(depth - self._root_depth, game_over,
+                                 not game_over)
+            return (self.score(board, ai_move, depth), None)
+        return super(HeuristicAI, self).minimax(board, ai_move, depth,
+                                                alpha, beta)
 
-        if ai_move:
-            piece_move = self._game.ai_piece
+
+class MCTSNode:
+    """
+    Node of the Monte Carlo search tree. Wins are counted for the side which
+    made the move leading to the node, a draw is half a win.
+
+    When the side to move can win at once, only the winning moves are tried,
+    and when it has to block a line of the other side, only the blocks. With
+    the distance set, other moves are tried only near the pieces.
+    """
+    __slots__ = ('board', 'ai_move', 'parent', 'children', 'untried',
+                 'visits', 'wins', 'winner', 'distance')
+
+    def __init__(self, board, ai_move, parent=None, distance=None):
+        self.board = board
+        self.ai_move = ai_move
+        self.parent = parent
+        self.distance = distance
+        self.children = {}
+        self.visits = 0
+        self.wins = 0.0
+        self.winner = board.last_winner()
+        self.untried = []
+        if self.winner is None and not board.is_full():
+            wins, blocks = board.threats(ai_move)
+            cells = wins or blocks
+            if not cells and distance is not None and board.pieces:
+                cells = neighbourhood(board, distance)
+            if cells:
+                self.untried = list(pieces_of(cells))
+            else:
+                self.untried = list(board.moves())
+
+    def select(self, exploration):
+        """
+        Returns the child with the best upper confidence bound.
+        """
+        log_visits = math.log(self.visits)
+        return max(self.children.values(),
+                   key=lambda child: (child.wins / child.visits +
+                                      exploration *
+                                      math.sqrt(log_visits / child.visits)))
+
+    def expand(self, rand):
+        """
+        Adds the child of the random untried move and returns it.
+        """
+        number = rand.randrange(len(self.untried))
+        untried = self.untried
+        untried[number], untried[-1] = untried[-1], untried[number]
+        index = untried.pop()
+        child = MCTSNode(self.board.play(index, self.ai_move),
+                         not self.ai_move, self, self.distance)
+        self.children[index] = child
+        return child
+
+
+class MCTSAI(BasicAI):
+    """
+    Monte Carlo tree search with the UCT selection and random playouts. Its
+    cost depends on the budget, playouts and think_time (in seconds), instead
+    of the size of the board; with both set, the first one to run out ends
+    the search. The most visited move is played.
+
+    The tree is kept between the moves. With several workers every process
+    grows its own tree with its share of the playouts, and the visits of the
+    root moves are added up.
+
+    Every playout counts as a searched node in the stats, at the depth of
+    the tree node it started from.
+    """
+    playouts = 2000
+    think_time = None
+    exploration = math.sqrt(2)
+    keep_tree = True
+    workers = 1
+    # Seed of the random playouts, for reproducible games.
+    seed = None
+    # Distance from the pieces of the moves added to the tree, None adds
+    # all the empty cells.
+    neighbourhood = None
+    # Visits of the player's position after which pondering stops, so the
+    # tree doesn't grow for as long as the player thinks.
+    ponder_playouts = 2000
+
+    def __init__(self, *args, **kwargs):
+        if self.playouts is None and self.think_time is None:
+            raise ValueError("MCTS AI needs playouts or think_time set.")
+        self._root = None
+        self._random = random.Random(self.seed)
+        super(MCTSAI, self).__init__(*args, **kwargs)
+
+    def next_move(self):
+        board = self._game.board
+        if board.is_full():
+            raise NoLegalMoveError("AI found no legal move to make.")
+        if self.stats is not None:
+            self.stats.start()
+        deadline = None
+        if self.think_time is not None:
+            deadline = time.monotonic() + self.think_time
+        if self.workers > 1:
+            visits = self.parallel_search(board, deadline)
         else:
-            piece_move = self._game.player_piece
-        win_count = self._game.win_count
-        scores = {
-            self._game.ai_piece: 0,
-            self._game.player_piece: 0
-        }
-        for line in self._game.possible_winning_lines(state):
-            line = shrink(line)
-            for i, (piece, count) in enumerate(line):
-                if piece != self._game.empty_place:
-                    prev = line[i-1] if i > 0 else None
-                    next = line[i+1] if i+1 < len(line) else None
-                    mult = 0
-                    total_empty = 0
-                    if prev and prev[0] == self._game.empty_place:
-                        total_empty += prev[1]
-                        mult += 1
-                    if next and next[0] == self._game.empty_place:
-                        total_empty += next[1]
-                        mult += 1
-                    if ((mult > 0 and count == win_count - 1 and
-                        piece_move == piece) or
-                       (mult > 1 and count == win_count-1) or
-                       (mult > 1 and count == win_count-2 and
-                       piece_move == piece and total_empty > 2)):
-                        mult += 1000
-
-                    if total_empty + count < win_count:
-                        mult = 0
-
-                    scores[piece] += count * mult
-        score = scores[self._game.ai_piece] -\
-            scores[self._game.player_piece]
-        self._score_cache[(state, ai_move)] = score
-        return score
+            visits = self.search(board, self.playouts, deadline)
+        move = max(visits, key=visits.get)
+        if self.stats is not None:
+            self.stats.finish("search")
+        return divmod(move, board.geometry.columns)
+
+    def tree_at(self, board):
+        """
+        Returns the node of the board from the kept tree, looking up to two
+        moves below its root, or a new tree.
+        """
+        nodes = [self._root] if self.keep_tree and self._root else []
+        for _ in range(3):
+            for node in nodes:
+                if node.ai_move and node.board == board:
+                    node.parent = None
+                    return node
+            nodes = [child for node in nodes
+                     for child in node.children.values()]
+        return MCTSNode(board, True, distance=self.neighbourhood)
 
-    def minimax(self, state, ai_move, depth):
-        if self._game.is_game_over(state) or depth >= self.max_depth:
-            return (self.score(state, ai_move, depth), (-1, -1))
-        return super(HeuristicAI, self).minimax(state, ai_move, depth)
+    def search(self, board, playouts, deadline=None):
+        """
+        Runs the playouts from the board, with the AI to move, and returns
+        number of visits of every move.
+        """
+        root = self._root = self.tree_at(board)
+        self.grow(root, playouts, deadline)
+        if not root.children:
+            # Not even one playout fitted in the budget.
+            root.expand(self._random)
+        return {move: child.visits for move, child in root.children.items()}
+
+    def grow(self, root, playouts, deadline=None, stop=None):
+        """
+        Runs the playouts from the root node, until the deadline or the stop
+        event is set, if they are given.
+        """
+        rand = self._random
+        count = 0
+        while playouts is None or count < playouts:
+            if (deadline is not None and not count & 15 and
+                    time.monotonic() > deadline):
+                break
+            if stop is not None and stop.is_set():
+                break
+            count += 1
+            node = root
+            depth = 0
+            while not node.untried and node.children:
+                node = node.select(self.exploration)
+                depth += 1
+            if node.untried:
+                node = node.expand(rand)
+                depth += 1
+            if self.stats is not None:
+                self.stats.visit(depth, node.winner is not None)
+            result = self.playout(node)
+            while node is not None:
+                node.visits += 1
+                node.wins += result if not node.ai_move else 1 - result
+                node = node.parent
+
+    def ponder(self, board, stop):
+        """
+        Grows the tree of the board with the player to move, so that the
+        node of the player's move is found by tree_at with its playouts,
+        until the board has ponder_playouts visits.
+        """
+        if not self.keep_tree or self.workers > 1 or board.is_game_over():
+            return
+        root = self._root
+        if root is not None and root.board != board:
+            root = root.children.get(board.last)
+        if root is None or root.board != board:
+            root = MCTSNode(board, False, distance=self.neighbourhood)
+        root.parent = None
+        self._root = root
+        self.grow(root, max(0, self.ponder_playouts - root.visits),
+                  stop=stop)
+
+    def parallel_search(self, board, deadline=None):
+        """
+        Runs the playouts in the worker processes and adds up the visits.
+        """
+        geometry = board.geometry
+        spec = get_ai_spec(type(self))
+        config = (geometry.lines, geometry.columns, geometry.win_count)
+        playouts = self.playouts
+        if playouts is not None:
+            playouts = -(-playouts // self.workers)
+        executor = get_executor(self.workers)
+        jobs = [executor.submit(run_playouts, spec, config, board.ai,
+                                board.player, playouts, deadline,
+                                self._random.getrandbits(32))
+                for _ in range(self.workers)]
+        visits = {}
+        try:
+            for job in jobs:
+                for move, count in job.result().items():
+                    visits[move] = visits.get(move, 0) + count
+        finally:
+            for job in jobs:
+                job.cancel()
+            wait(jobs)
+        return visits
+
+    def playout(self, node):
+        """
+        Plays random moves from the node until the end of the game. Returns
+        1 if the AI wins, 0 if it loses and 0.5 for a draw.
+        """
+        if node.winner is not None:
+            return 1.0 if node.winner == "ai" else 0.0
+        moves = list(node.board.moves())
+        self._random.shuffle(moves)
+        winner = node.board.play_out(moves, node.ai_move)
+        if winner is None:
+            return 0.5
+        return 1.0 if winner == "ai" else 0.0
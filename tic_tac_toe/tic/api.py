@@ -0,0 +1,120 @@
+"""
+Stateless API answering the AI moves of the positions, without the games.
+
+Answers are kept in a process-wide cache by the canonical key of the
+position, so the positions asked for before, and the ones symmetric to them,
+are answered without searching. The AIs searching the rest are kept too,
+together with their own search caches.
+"""
+from .ai import configure_ai, get_ai_spec, get_executor
+from .board import Board, get_geometry
+from .game import Game
+from .tournament import get_ai_class
+from .utils import BoundedCache
+
+# Size of the cache of the answered positions.
+CACHE_ENTRIES = 100000
+# Most cells of the boards searched to the end by default.
+MINIMAX_CELLS = 12
+
+# Canonical moves by the engine, the board config and the canonical key.
+_moves = BoundedCache(CACHE_ENTRIES, policy='lru')
+# Games of the AIs searching the moves in this process, by their spec and
+# the board config.
+_worker_games = {}
+
+
+def default_engine(lines, columns):
+    """
+    Returns name of the AI used when none is asked for: the exhaustive
+    search on the small boards, and the heuristic one on the others.
+    """
+    return 'minimax' if lines * columns <= MINIMAX_CELLS else 'heuristic-3'
+
+
+def search_move(spec, config, ai, player):
+    """
+    Returns the move of the AI of the spec on the board, counting from 0.
+    Run in the worker processes, where the AI is kept between the calls
+    with its caches.
+    """
+    base, options = spec
+    key = (base, tuple(sorted(options.items())), config)
+    game = _worker_games.get(key)
+    if game is None:
+        game = _worker_games[key] = Game(*config)
+        game.start(ai_class=configure_ai(base, **options), player_first=True)
+    game.board = Board(get_geometry(*config), ai, player)
+    return game.ai.next_move()
+
+
+def _search(job):
+    return search_move(*job)
+
+
+def best_moves(states, lines, columns, win_count, engine=None, workers=1):
+    """
+    Returns the moves of the AI, playing 'o', for the list of strings
+    states, as lines and columns counting from 0. The move is None for the
+    finished games.
+
+    Symmetric positions are searched only once, and with several workers
+    the positions not in the cache are searched in parallel.
+    """
+    if engine is None:
+        engine = default_engine(lines, columns)
+    spec = get_ai_spec(get_ai_class(engine))
+    config = (lines, columns, win_count)
+
+    boards = []
+    for state in states:
+        if len(state) != lines or any(len(row) != columns for row in state):
+            raise ValueError("State should have {} lines of {} columns."
+                             .format(lines, columns))
+        boards.append(Board.from_state(state, win_count))
+
+    # Canonical moves by the cache key, and the boards to search for the
+    # keys not in the cache.
+    answers, searched = {}, {}
+    keys = []
+    for board in boards:
+        if board.is_game_over():
+            keys.append(None)
+            continue
+        canonical, symmetry = board.canonical(True)
+        key = (engine, config, canonical)
+        keys.append((key, symmetry))
+        if key not in answers and key not in searched:
+            move = _moves.get(key)
+            if move is None:
+                searched[key] = (board, symmetry)
+            else:
+                answers[key] = move
+    if searched:
+        jobs = [(spec, config, board.ai, board.player)
+                for board, _ in searched.values()]
+        if workers > 1:
+            moves = get_executor(workers).map(_search, jobs)
+        else:
+            moves = map(_search, jobs)
+        for (key, (board, symmetry)), (line, column) in zip(searched.items(),
+                                                            moves):
+            geometry = board.geometry
+            move = geometry.symmetries[symmetry][geometry.index(line, column)]
+            answers[key] = move
+            _moves.put(key, move)
+
+    geometry = get_geometry(*config)
+    result = []
+    for item in keys:
+        if item is None:
+            result.append(None)
+            continue
+        key, symmetry = item
+        move = geometry.inverse_symmetries[symmetry][answers[key]]
+        result.append(divmod(move, columns))
+    return result
+
+
+def cache_stats():
+    return _moves.stats()
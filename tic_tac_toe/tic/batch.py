@@ -0,0 +1,58 @@
+"""
+Evaluation of many boards in one call. Boards with the same geometry are
+evaluated together with NumPy when it is installed and the batch is big
+enough, otherwise one by one with the bitboard and the line values shared by
+the geometry.
+"""
+from collections import OrderedDict
+
+from . import vectorized
+from .heuristic import LineEvaluator
+
+
+def _by_geometry(boards):
+    groups = OrderedDict()
+    for number, board in enumerate(boards):
+        groups.setdefault(board.geometry, []).append(number)
+    return groups
+
+
+def _evaluate(boards, vectorized_function, python_function):
+    boards = list(boards)
+    results = [None] * len(boards)
+    for geometry, numbers in _by_geometry(boards).items():
+        group = [boards[number] for number in numbers]
+        if vectorized.should_use(geometry, len(group)):
+            values = vectorized_function(group)
+        else:
+            values = python_function(geometry, group)
+        for number, value in zip(numbers, values):
+            results[number] = value
+    return results
+
+
+def winners(boards):
+    """
+    Returns list with the winner of every board: "ai", "player" or None.
+    """
+    return _evaluate(boards, vectorized.winners,
+                     lambda geometry, group: [board.winner()
+                                              for board in group])
+
+
+def scores(boards, ai_move):
+    """
+    Returns list with the heuristic score of every board, the same as
+    LineEvaluator.score gives.
+    """
+    def python_scores(geometry, group):
+        evaluator = LineEvaluator(geometry)
+        values = []
+        for board in group:
+            evaluator.reset(board)
+            values.append(evaluator.score(ai_move))
+        return values
+
+    return _evaluate(boards,
+                     lambda group: vectorized.scores(group, ai_move),
+                     python_scores)
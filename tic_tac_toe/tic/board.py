@@ -0,0 +1,399 @@
+import random
+from functools import lru_cache
+from operator import itemgetter
+
+EMPTY = 0
+AI = 1
+PLAYER = 2
+
+
+if hasattr(int, 'bit_count'):
+    popcount = int.bit_count
+else:
+    def popcount(bits):
+        return bin(bits).count('1')
+
+
+def symmetry_functions(lines, columns):
+    """
+    Returns functions mapping the line and the column of the cell to its
+    index on the board turned by every symmetry, starting with the identity.
+    Square boards have 8 symmetries, rectangular ones only 4.
+    """
+    last_line, last_column = lines - 1, columns - 1
+    functions = [
+        lambda i, j: i*columns + j,
+        lambda i, j: (last_line - i)*columns + last_column - j,
+        lambda i, j: (last_line - i)*columns + j,
+        lambda i, j: i*columns + last_column - j,
+    ]
+    if lines == columns:
+        functions += [
+            lambda i, j: j*columns + i,
+            lambda i, j: (last_column - j)*columns + last_line - i,
+            lambda i, j: j*columns + last_line - i,
+            lambda i, j: (last_column - j)*columns + i,
+        ]
+    return functions
+
+
+@lru_cache(maxsize=None)
+def get_symmetries(lines, columns):
+    """
+    Returns permutations of the cell indexes for every symmetry of the board,
+    starting with the identity. Cell i moves to perm[i].
+    """
+    return tuple(
+        tuple(function(*divmod(index, columns))
+              for index in range(lines * columns))
+        for function in symmetry_functions(lines, columns)
+    )
+
+
+class Geometry:
+    """
+    Precomputed data for the board configuration, shared by all the boards
+    with the same number of lines, columns and pieces required to win.
+
+    Cell with the line i and column j has index i*columns + j, which is also
+    the number of the bit representing this cell in the bitboard.
+    """
+    sparse = False
+
+    def __init__(self, lines, columns, win_count):
+        self.lines = lines
+        self.columns = columns
+        self.win_count = win_count
+        self.size = lines * columns
+        self.full = (1 << self.size) - 1
+        self.winning_lines = tuple(self._winning_lines())
+        self._line_getter = self._make_line_getter()
+        self.line_masks = tuple(sum(1 << index for index in line)
+                                for line in self.winning_lines)
+        self.cell_lines = tuple(
+            tuple(number for number, mask in enumerate(self.line_masks)
+                  if mask >> index & 1)
+            for index in range(self.size)
+        )
+        self.win_masks = tuple(self._win_masks())
+        self.cell_masks = tuple(
+            tuple(mask for mask in self.win_masks if mask >> index & 1)
+            for index in range(self.size)
+        )
+        self.center_order = tuple(sorted(range(self.size),
+                                         key=self.distance_to_center))
+        # Seeded by the configuration, so the keys are the same in every
+        # process.
+        rand = random.Random('{}x{}x{}'.format(lines, columns, win_count))
+        self.zobrist = tuple((rand.getrandbits(64), rand.getrandbits(64))
+                             for _ in range(self.size))
+        self.turn_key = rand.getrandbits(64)
+        self.symmetries = get_symmetries(lines, columns)
+        self.inverse_symmetries = tuple(
+            tuple(perm.index(index) for index in range(self.size))
+            for perm in self.symmetries
+        )
+        # Zobrist keys of the cell in every symmetric position, used to
+        # update the hashes of all the symmetric boards at once.
+        self.symmetric_zobrist = tuple(
+            tuple(tuple(self.zobrist[perm[index]][side]
+                        for perm in self.symmetries)
+                  for side in range(2))
+            for index in range(self.size)
+        )
+
+    def index(self, line, column):
+        return line * self.columns + column
+
+    def extract_lines(self, cells):
+        """
+        Returns tuples of the items of the flat sequence of cells for every
+        winning line, in the order of winning_lines.
+        """
+        return self._line_getter(cells)
+
+    def _make_line_getter(self):
+        getters = []
+        for line in self.winning_lines:
+            if len(line) == 1:
+                getters.append(lambda cells, index=line[0]: (cells[index],))
+            else:
+                getters.append(itemgetter(*line))
+        return lambda cells: [getter(cells) for getter in getters]
+
+    def distance_to_center(self, index):
+        line, column = divmod(index, self.columns)
+        return ((2*line - self.lines + 1)**2 +
+                (2*column - self.columns + 1)**2)
+
+    def _winning_lines(self):
+        """
+        Yields tuples of cell indexes of all rows, columns and diagonals long
+        enough to contain win_count pieces. The order is the same as in
+        Game.possible_winning_lines.
+        """
+        lines, columns = self.lines, self.columns
+        for i in range(lines):
+            yield tuple(self.index(i, j) for j in range(columns))
+        for j in range(columns):
+            yield tuple(self.index(i, j) for i in range(lines))
+        for offset in range(-(lines - 1), lines + columns - 1):
+            main = tuple(self.index(i, i + offset)
+                         for i in range(lines)
+                         if 0 <= i + offset < columns)
+            counter = tuple(self.index(i, offset - i)
+                            for i in range(lines)
+                            if 0 <= offset - i < columns)
+            if len(main) >= self.win_count:
+                yield main
+            if len(counter) >= self.win_count:
+                yield counter
+
+    def _win_masks(self):
+        """
+        Yields bit masks of every win_count cells in a row.
+        """
+        for line in self.winning_lines:
+            for start in range(len(line) - self.win_count + 1):
+                mask = 0
+                for index in line[start:start + self.win_count]:
+                    mask |= 1 << index
+                yield mask
+
+
+@lru_cache(maxsize=None)
+def get_geometry(lines, columns, win_count):
+    return Geometry(lines, columns, win_count)
+
+
+class BaseBoard:
+    """
+    Part of the board interface shared by the bitboard and the sparse board.
+    The subclasses keep the geometry, the index of the last move and the
+    Zobrist hashes of the position turned by every symmetry in keys.
+    """
+    __slots__ = ()
+
+    def __hash__(self):
+        return self.key
+
+    @property
+    def key(self):
+        """
+        Zobrist hash of the position.
+        """
+        return self.keys[0]
+
+    def canonical(self, ai_move):
+        """
+        Returns the hash shared by all the symmetric positions together with
+        the side to move, and the number of the symmetry turning this board
+        into the canonical one. Geometry.symmetries[symmetry] maps the cells
+        of the board to the canonical board, and the inverse_symmetries map
+        them back.
+        """
+        key = min(self.keys)
+        symmetry = self.keys.index(key)
+        if ai_move:
+            key ^= self.geometry.turn_key
+        return key, symmetry
+
+    def key_for(self, ai_move):
+        return self.canonical(ai_move)[0]
+
+    def __repr__(self):
+        return '{}({})'.format(type(self).__name__, self.to_state())
+
+    def line(self, cells):
+        """
+        Returns pieces on the given cells.
+        """
+        return [self.piece_at(index) for index in cells]
+
+    def last_winner(self):
+        """
+        Returns the winner checking only the last move, when it is known.
+        """
+        if self.last is None:
+            return self.winner()
+        return self.winner_after(self.last)
+
+    def is_game_over(self):
+        return self.is_full() or self.winner() is not None
+
+
+class Board(BaseBoard):
+    """
+    Immutable bitboard of the game. Keeps one integer per side, where every
+    set bit is a piece of that side.
+
+    Boards made by play remember the index of the last move in order to check
+    only the lines going through it, and update the 64 bit Zobrist hashes of
+    the position and all its symmetric copies instead of computing them from
+    scratch.
+    """
+    __slots__ = ('geometry', 'ai', 'player', 'last', 'keys')
+
+    def __init__(self, geometry, ai=0, player=0, last=None, keys=None):
+        self.geometry = geometry
+        self.ai = ai
+        self.player = player
+        self.last = last
+        if keys is None:
+            keys = [0] * len(geometry.symmetries)
+            for index, sides in enumerate(geometry.symmetric_zobrist):
+                if ai >> index & 1:
+                    keys = [k ^ z for k, z in zip(keys, sides[0])]
+                elif player >> index & 1:
+                    keys = [k ^ z for k, z in zip(keys, sides[1])]
+            keys = tuple(keys)
+        self.keys = keys
+
+    @classmethod
+    def from_state(cls, state, win_count, ai_piece='o', player_piece='x'):
+        """
+        Builds the board from the list of strings representation.
+        All the characters other than the pieces are considered empty places.
+        """
+        geometry = get_geometry(len(state), len(state[0]), win_count)
+        ai = player = 0
+        for i, row in enumerate(state):
+            for j, val in enumerate(row):
+                if val == ai_piece:
+                    ai |= 1 << geometry.index(i, j)
+                elif val == player_piece:
+                    player |= 1 << geometry.index(i, j)
+        return cls(geometry, ai, player)
+
+    def to_state(self, ai_piece='o', player_piece='x', empty_place='.'):
+        pieces = {EMPTY: empty_place, AI: ai_piece, PLAYER: player_piece}
+        columns = self.geometry.columns
+        cells = [pieces[self.piece_at(index)]
+                 for index in range(self.geometry.size)]
+        return [''.join(cells[i:i + columns])
+                for i in range(0, len(cells), columns)]
+
+    def __eq__(self, other):
+        return (isinstance(other, Board) and
+                self.geometry is other.geometry and
+                self.ai == other.ai and self.player == other.player)
+
+    __hash__ = BaseBoard.__hash__
+
+    @property
+    def pieces(self):
+        """
+        Number of pieces on the board.
+        """
+        return popcount(self.ai | self.player)
+
+    @property
+    def empty(self):
+        return self.geometry.full & ~(self.ai | self.player)
+
+    def piece_at(self, index):
+        bit = 1 << index
+        if self.ai & bit:
+            return AI
+        if self.player & bit:
+            return PLAYER
+        return EMPTY
+
+    def moves(self):
+        """
+        Yields indexes of the empty cells in ascending order.
+        """
+        empty = self.empty
+        while empty:
+            bit = empty & -empty
+            yield bit.bit_length() - 1
+            empty ^= bit
+
+    def play(self, index, ai_move):
+        """
+        Returns new board with the piece placed on the index.
+        Makes no checks if the move is legal.
+        """
+        bit = 1 << index
+        if ai_move:
+            zobrist = self.geometry.symmetric_zobrist[index][0]
+            keys = tuple([k ^ z for k, z in zip(self.keys, zobrist)])
+            return Board(self.geometry, self.ai | bit, self.player, index,
+                         keys)
+        zobrist = self.geometry.symmetric_zobrist[index][1]
+        keys = tuple([k ^ z for k, z in zip(self.keys, zobrist)])
+        return Board(self.geometry, self.ai, self.player | bit, index, keys)
+
+    def winner(self):
+        """
+        Returns "ai", "player" or None. If both sides have a winning line,
+        may return any of them.
+        """
+        ai, player = self.ai, self.player
+        for mask in self.geometry.win_masks:
+            if ai & mask == mask:
+                return "ai"
+            if player & mask == mask:
+                return "player"
+        return None
+
+    def winner_after(self, index):
+        """
+        Returns the winner looking only at the lines going through the index.
+        Correct when there was no winner before the piece on the index was
+        placed.
+        """
+        bit = 1 << index
+        if self.ai & bit:
+            pieces, winner = self.ai, "ai"
+        elif self.player & bit:
+            pieces, winner = self.player, "player"
+        else:
+            return None
+        for mask in self.geometry.cell_masks[index]:
+            if pieces & mask == mask:
+                return winner
+        return None
+
+    def threats(self, ai_move):
+        """
+        Returns bit masks of the empty cells which win immediately for the
+        side to move, and of the ones where the other side would win.
+        """
+        if ai_move:
+            mine, theirs = self.ai, self.player
+        else:
+            mine, theirs = self.player, self.ai
+        need = self.geometry.win_count - 1
+        wins = blocks = 0
+        for mask in self.geometry.win_masks:
+            if not mask & theirs:
+                if popcount(mask & mine) == need:
+                    wins |= mask & ~mine
+            elif not mask & mine:
+                if popcount(mask & theirs) == need:
+                    blocks |= mask & ~theirs
+        return wins, blocks
+
+    def play_out(self, moves, ai_move):
+        """
+        Plays the moves in turn, starting with the side of ai_move, until one
+        of the sides wins. Returns the winner or None.
+        """
+        cell_masks = self.geometry.cell_masks
+        ai, player = self.ai, self.player
+        for index in moves:
+            if ai_move:
+                ai |= 1 << index
+                pieces = ai
+            else:
+                player |= 1 << index
+                pieces = player
+            for mask in cell_masks[index]:
+                if pieces & mask == mask:
+                    return "ai" if ai_move else "player"
+            ai_move = not ai_move
+        return None
+
+    def is_full(self):
+        return (self.ai | self.player) == self.geometry.full
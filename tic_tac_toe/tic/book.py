@@ -0,0 +1,86 @@
+"""
+Opening book: best AI moves for the first plies of the game, precomputed
+offline and stored in a file which is read through mmap.
+
+The file has a header with the board configuration and the number of
+records, followed by records sorted by the canonical key of the position with
+the AI to move, and the best move as a cell of the canonical board.
+
+Books are built by tic.build_book.
+"""
+import mmap
+import struct
+
+MAGIC = b'TICBOOK1'
+HEADER = struct.Struct('<8sHHHI')
+RECORD = struct.Struct('<QH')
+
+# Opened books by path, so the AIs share them.
+_books = {}
+
+
+class OpeningBook:
+    """
+    Looks up the moves in the book file with the binary search, without
+    reading the whole file into the memory.
+    """
+
+    def __init__(self, path):
+        self.path = path
+        with open(path, 'rb') as book_file:
+            self._data = mmap.mmap(book_file.fileno(), 0,
+                                   access=mmap.ACCESS_READ)
+        magic, lines, columns, win_count, count = \
+            HEADER.unpack_from(self._data)
+        if magic != MAGIC:
+            raise ValueError("{} is not an opening book.".format(path))
+        self.config = (lines, columns, win_count)
+        self._count = count
+
+    def __len__(self):
+        return self._count
+
+    def _find(self, key):
+        low, high = 0, self._count
+        while low < high:
+            middle = (low + high) // 2
+            found, move = RECORD.unpack_from(
+                self._data, HEADER.size + middle * RECORD.size)
+            if found == key:
+                return move
+            if found < key:
+                low = middle + 1
+            else:
+                high = middle
+        return None
+
+    def move(self, board):
+        """
+        Returns index of the best move for the AI on the board, or None if
+        the position is not in the book.
+        """
+        geometry = board.geometry
+        if self.config != (geometry.lines, geometry.columns,
+                           geometry.win_count):
+            return None
+        key, symmetry = board.canonical(True)
+        move = self._find(key)
+        if move is None:
+            return None
+        return geometry.inverse_symmetries[symmetry][move]
+
+    def close(self):
+        self._data.close()
+
+
+def get_book(path):
+    if path not in _books:
+        _books[path] = OpeningBook(path)
+    return _books[path]
+
+
+def write_book(path, config, book):
+    with open(path, 'wb') as book_file:
+        book_file.write(HEADER.pack(MAGIC, *config, len(book)))
+        for key in sorted(book):
+            book_file.write(RECORD.pack(key, book[key]))
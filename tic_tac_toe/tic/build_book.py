@@ -0,0 +1,81 @@
+"""
+Builds the opening book by searching every position of the first plies.
+
+    python -m tic.build_book --lines 4 --columns 4 --win 4 --plies 4 4x4.book
+"""
+import argparse
+
+from .ai import MinimaxAI, get_heuristic_ai_class
+from .book import write_book
+from .game import Game
+
+
+def build_book(lines, columns, win_count, plies, ai_class=None):
+    """
+    Returns dict of the canonical key to the canonical best move for every
+    position of the first plies reachable when the AI plays the book moves,
+    no matter who moves first.
+    """
+    if ai_class is None:
+        if lines * columns <= 16:
+            ai_class = MinimaxAI
+        else:
+            ai_class = get_heuristic_ai_class(4)
+    game = Game(lines, columns, win_count)
+    ai = ai_class(game, game.ai_piece)
+    book = {}
+    # Positions go ply by ply, so the search cache is only aged out when
+    # the shallower positions are done.
+    positions = [(game.board, True), (game.board, False)]
+    for _ in range(plies):
+        next_positions = {}
+        for board, ai_move in positions:
+            if board.is_game_over():
+                continue
+            if ai_move:
+                key, symmetry = board.canonical(True)
+                if key not in book:
+                    game.board = board
+                    line, column = ai.next_move()
+                    move = board.geometry.index(line, column)
+                    book[key] = board.geometry.symmetries[symmetry][move]
+                inverse = board.geometry.inverse_symmetries[symmetry]
+                moves = [inverse[book[key]]]
+            else:
+                moves = board.moves()
+            for index in moves:
+                next_board = board.play(index, ai_move)
+                key = next_board.canonical(not ai_move)[0]
+                next_positions[key] = (next_board, not ai_move)
+        positions = list(next_positions.values())
+    return book
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(
+        description="Builds the opening book of the tic-tac-toe AI."
+    )
+    parser.add_argument('path', help="file to write the book to")
+    parser.add_argument('--lines', '-l', dest='lines', type=int,
+                        default=3, help="number of lines (default 3)")
+    parser.add_argument('--columns', '-c', dest='columns', type=int,
+                        default=3, help="number of columns (default 3)")
+    parser.add_argument('--win', '-w', dest='win_count', type=int,
+                        default=3, help="number of pieces on a straight line "
+                                        "required to win (default 3)")
+    parser.add_argument('--plies', '-p', dest='plies', type=int,
+                        default=4, help="number of plies to precompute "
+                                        "(default 4)")
+    parser.add_argument('--depth', '-d', dest='depth', type=int,
+                        default=None, help="search depth of the heuristic "
+                                           "AI, exhaustive search if not "
+                                           "given on boards up to 16 cells")
+    args = parser.parse_args()
+
+    ai_class = None
+    if args.depth is not None:
+        ai_class = get_heuristic_ai_class(args.depth)
+    config = (args.lines, args.columns, args.win_count)
+    book = build_book(*config, plies=args.plies, ai_class=ai_class)
+    write_book(args.path, config, book)
+    print("Wrote {} positions to {}.".format(len(book), args.path))
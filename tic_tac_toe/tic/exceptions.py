@@ -27,3 +27,10 @@ class NoLegalMoveError(ValueError):
     Raised by AI when there are no legal moves left.
     """
     pass
+
+
+class SearchAborted(Exception):
+    """
+    Raised inside of the AI search when its budget runs out.
+    """
+    pass
@@ -1,7 +1,8 @@
-from collections import defaultdict
-
+from . import batch
 from .ai import get_default_ai
+from .board import EMPTY, Board, get_geometry
 from .exceptions import IllegalMoveError, ImpossibleGameError, InvalidAIError
+from .sparse import SparseBoard, get_sparse_geometry
 
 
 class Game:
@@ -10,21 +11,24 @@ class Game:
     Interacts with AI and gives interface to interact with player.
 
     Assumes that player is playing with 'x' and ai - 'o'
+
+    The position is kept as a bitboard, list of strings state is only a view
+    of it. Sparse games keep only the occupied cells instead, for the boards
+    too big for the bitboard tables.
     """
 
-    def __init__(self, lines, columns, win_count=3):
+    def __init__(self, lines, columns, win_count=3, sparse=False):
         if lines <= 0 or columns <= 0:
             raise ImpossibleGameError
         self._player_piece = "x"
         self._ai_piece = "o"
         self._ai = None
         self._win_count = win_count
-        self._state = []
-        for _ in range(lines):
-            line = []
-            for _ in range(columns):
-                line.append(self.empty_place)
-            self._state.append(line)
+        if sparse:
+            self._board = SparseBoard(
+                get_sparse_geometry(lines, columns, win_count))
+        else:
+            self._board = Board(get_geometry(lines, columns, win_count))
 
     @staticmethod
     def get_next_state(state, line, column, piece):
@@ -43,21 +47,39 @@ class Game:
             next_state.append(new_row)
         return next_state
 
+    def _on_board(self, line, column):
+        geometry = self._board.geometry
+        return 0 <= line < geometry.lines and 0 <= column < geometry.columns
+
+    def _is_empty(self, line, column):
+        index = self._board.geometry.index(line, column)
+        return self._board.piece_at(index) == EMPTY
+
     def _ai_make_move(self):
         line, column = self._ai.next_move()
-        if not (0 <= line < len(self._state) and
-                0 <= column < len(self._state[0])):
+        if not self._on_board(line, column):
             raise InvalidAIError("AI tried to make a move outside the board.")
-        if self._state[line][column] != self.empty_place:
+        if not self._is_empty(line, column):
             msg = "AI tried to place piece in already occupied place."
             raise InvalidAIError(msg)
 
-        self._state[line][column] = self._ai_piece
+        index = self._board.geometry.index(line, column)
+        self._board = self._board.play(index, True)
+        return line, column
+
+    def make_ai_move(self):
+        """
+        Makes the move of the AI, when the other side is not a human.
+        Returns the line and column of the move, counting from 1.
+        Throws IllegalMoveError in end of game position.
+        """
+        if self.is_game_over():
+            raise IllegalMoveError("Can't make move in end of game position.")
+        line, column = self._ai_make_move()
+        return line + 1, column + 1
 
     def start(self, ai_class=None, player_first=False):
-        for i, row in enumerate(self._state):
-            for j, _ in enumerate(row):
-                self._state[i][j] = self.empty_place
+        self._board = type(self._board)(self._board.geometry)
 
         if ai_class:
             self._ai = ai_class(self, self._ai_piece)
@@ -73,24 +95,58 @@ class Game:
         Throws IllegalMoveError when place is already taken or the move is
         outside of the board.
         """
+        self.make_player_move(line, column)
+        if not self.is_game_over():
+            self._ai_make_move()
+
+    def make_player_move(self, line, column):
+        """
+        Makes move on behalf of the player like make_move, but leaves the
+        reply of the AI to make_ai_move.
+        """
         if self.is_game_over():
             raise IllegalMoveError("Can't make move in end of game position.")
         line -= 1
         column -= 1
-        if not (0 <= line < len(self._state) and
-                0 <= column < len(self._state[0])):
+        if not self._on_board(line, column):
             raise IllegalMoveError("Value is outside of the box.")
-        if self._state[line][column] != self.empty_place:
+        if not self._is_empty(line, column):
             raise IllegalMoveError("Place is already taken.")
 
-        self._state[line][column] = self._player_piece
-
-        if not self.is_game_over():
-            self._ai_make_move()
+        index = self._board.geometry.index(line, column)
+        self._board = self._board.play(index, False)
 
     @property
     def state(self):
-        return [''.join(line) for line in self._state]
+        return self._board.to_state(self._ai_piece, self._player_piece,
+                                    self.empty_place)
+
+    @state.setter
+    def state(self, state):
+        self._board = self.get_board(state)
+
+    @property
+    def ai(self):
+        return self._ai
+
+    @property
+    def board(self):
+        return self._board
+
+    @board.setter
+    def board(self, board):
+        self._board = board
+
+    def get_board(self, state=None):
+        """
+        Returns bitboard of the state, or of the current position if the
+        state is not given.
+        """
+        if state is None:
+            return self._board
+        return type(self._board).from_state(state, self._win_count,
+                                            self._ai_piece,
+                                            self._player_piece)
 
     @property
     def empty_place(self):
@@ -109,37 +165,17 @@ class Game:
         return self._win_count
 
     def is_game_over(self, state=None):
-        if state is None:
-            state = self.state
-        return (self.get_winner(state) is not None or
-                ''.join(state).count(self.empty_place) == 0)
+        board = self.get_board(state)
+        return board.is_full() or self._winner(board) is not None
 
     def possible_winning_lines(self, state):
-        for line in state:
-            yield line
-
-        cols = defaultdict(lambda: "")
-        for line in state:
-            for i, col in enumerate(line):
-                cols[i] += col
-        for line in cols.values():
-            yield line
-
-        # Going through diagonals
-        columns = len(state[0])
-        for offset in range(-2*columns, 2*columns):
-            main = [row[i+offset]
-                    for i, row in enumerate(state)
-                    if 0 <= i+offset < columns
-                    ]
-            counter = [row[-i+offset]
-                       for i, row in enumerate(state)
-                       if 0 <= -i+offset < columns
-                       ]
-            if len(main) >= self._win_count:
-                yield ''.join(main)
-            if len(counter) >= self._win_count:
-                yield ''.join(counter)
+        """
+        Yields strings of all the rows, columns and diagonals of the state
+        long enough to contain win_count pieces.
+        """
+        geometry = get_geometry(len(state), len(state[0]), self._win_count)
+        for line in geometry.extract_lines(''.join(state)):
+            yield ''.join(line)
 
     def get_winner(self, state=None):
         """
@@ -147,23 +183,22 @@ class Game:
         If the game state contains several winners, function may return any
         value.
         """
-        if state is None:
-            state = self.state
-
-        for line in self.possible_winning_lines(state):
-            count = 1
-            cur_piece = line[0]
-            for piece in line[1:]:
-                if piece == cur_piece:
-                    count += 1
-                    continue
-                if cur_piece != self.empty_place and count >= self._win_count:
-                    break
-                count = 1
-                cur_piece = piece
-            if count >= self._win_count:
-                if cur_piece == self._ai_piece:
-                    return "ai"
-                elif cur_piece == self._player_piece:
-                    return "player"
-        return None
+        return self._winner(self.get_board(state))
+
+    def get_winners(self, states):
+        """
+        Returns winners of all the states at once, as get_winner would.
+        """
+        return batch.winners([self.get_board(state) for state in states])
+
+    @staticmethod
+    def _winner(board):
+        return batch.winners([board])[0]
+
+    def get_winner_after(self, state, line, column):
+        """
+        Returns the winner checking only the lines going through the line and
+        column of the last move. Assumes there was no winner before it.
+        """
+        board = self.get_board(state)
+        return board.winner_after(board.geometry.index(line, column))
@@ -0,0 +1,133 @@
+from .board import AI, EMPTY, PLAYER
+from .utils import BoundedCache, shrink
+
+# Budget of the values of the line contents already seen.
+LINE_VALUE_ENTRIES = 200000
+
+# Values of the line contents, shared by all the lines and geometries. The
+# key is the win count, the step between the cells and the length of the
+# line, and the pieces shifted to the first cell, so the lines of the same
+# shape get the same key for the same contents. The oldest values are
+# dropped once the budget is reached.
+_line_values = BoundedCache(LINE_VALUE_ENTRIES, policy='always')
+
+
+def line_value(pieces, win_count):
+    """
+    Returns heuristic value of the pieces on one line when the AI is to move
+    and when the player is. Value is the score of the AI pieces minus the
+    score of the player pieces.
+
+    Every run of pieces scores its length for every empty end, and a lot
+    more if it threatens to win, unless it has no room to grow to win_count.
+    """
+    values = []
+    for piece_move in (AI, PLAYER):
+        scores = {
+            AI: 0,
+            PLAYER: 0
+        }
+        line = shrink(pieces)
+        for i, (piece, count) in enumerate(line):
+            if piece != EMPTY:
+                prev = line[i-1] if i > 0 else None
+                next = line[i+1] if i+1 < len(line) else None
+                mult = 0
+                total_empty = 0
+                if prev and prev[0] == EMPTY:
+                    total_empty += prev[1]
+                    mult += 1
+                if next and next[0] == EMPTY:
+                    total_empty += next[1]
+                    mult += 1
+                if ((mult > 0 and count == win_count - 1 and
+                    piece_move == piece) or
+                   (mult > 1 and count == win_count-1) or
+                   (mult > 1 and count == win_count-2 and
+                   piece_move == piece and total_empty > 2)):
+                    mult += 1000
+
+                if total_empty + count < win_count:
+                    mult = 0
+
+                scores[piece] += count * mult
+        values.append(scores[AI] - scores[PLAYER])
+    return tuple(values)
+
+
+class LineEvaluator:
+    """
+    Keeps heuristic values of all the winning lines of the board and their
+    sums. Playing and undoing a move updates only the lines going through its
+    cell, so the score of the position is always at hand.
+    """
+
+    def __init__(self, geometry):
+        self.geometry = geometry
+        self._shapes = [(line[0], (geometry.win_count,
+                                   line[1] - line[0] if len(line) > 1 else 0,
+                                   len(line)))
+                        for line in geometry.winning_lines]
+        self.ai = self.player = 0
+        self._values = []
+        self._totals = [0, 0]
+        self._history = []
+
+    def _line_value(self, line):
+        mask = self.geometry.line_masks[line]
+        start, shape = self._shapes[line]
+        key = (shape, (self.ai & mask) >> start, (self.player & mask) >> start)
+        value = _line_values.peek(key)
+        if value is None:
+            pieces = []
+            for index in self.geometry.winning_lines[line]:
+                if self.ai >> index & 1:
+                    pieces.append(AI)
+                elif self.player >> index & 1:
+                    pieces.append(PLAYER)
+                else:
+                    pieces.append(EMPTY)
+            value = line_value(pieces, self.geometry.win_count)
+            _line_values.put(key, value)
+        return value
+
+    def reset(self, board):
+        self.ai, self.player = board.ai, board.player
+        self._values = [self._line_value(line)
+                        for line in range(len(self.geometry.winning_lines))]
+        self._totals = [sum(value[0] for value in self._values),
+                        sum(value[1] for value in self._values)]
+        self._history = []
+
+    def is_at(self, board):
+        return self.ai == board.ai and self.player == board.player
+
+    def play(self, index, ai_move):
+        if ai_move:
+            self.ai |= 1 << index
+        else:
+            self.player |= 1 << index
+        values, totals = self._values, self._totals
+        changes = []
+        for line in self.geometry.cell_lines[index]:
+            old = values[line]
+            new = values[line] = self._line_value(line)
+            totals[0] += new[0] - old[0]
+            totals[1] += new[1] - old[1]
+            changes.append((line, old))
+        self._history.append((index, changes))
+
+    def undo(self):
+        index, changes = self._history.pop()
+        mask = ~(1 << index)
+        self.ai &= mask
+        self.player &= mask
+        values, totals = self._values, self._totals
+        for line, old in changes:
+            new = values[line]
+            totals[0] -= new[0] - old[0]
+            totals[1] -= new[1] - old[1]
+            values[line] = old
+
+    def score(self, ai_move):
+        return self._totals[0] if ai_move else self._totals[1]
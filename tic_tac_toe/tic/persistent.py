@@ -0,0 +1,141 @@
+"""
+Search results kept in an SQLite file between the runs, and shared by the
+processes using the same file.
+
+The results are keyed by the namespace, which tells the AI and the board
+config they were searched with, and the canonical key of the position. The
+file is in the WAL mode, so the readers don't wait for the writer. The AIs
+load the hottest entries into their search cache when they start, and write
+their new results back in batches.
+"""
+import atexit
+import os
+import sqlite3
+
+from .utils import Entry
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS entries (
+    namespace TEXT NOT NULL,
+    key INTEGER NOT NULL,
+    score INTEGER NOT NULL,
+    kind INTEGER NOT NULL,
+    depth INTEGER NOT NULL,
+    move INTEGER NOT NULL,
+    ply INTEGER NOT NULL,
+    hits INTEGER NOT NULL DEFAULT 1,
+    PRIMARY KEY (namespace, key)
+) WITHOUT ROWID
+"""
+
+# Results searched deeper replace the stored ones, and every write counts as
+# a hit, so the often searched positions are loaded first.
+UPSERT = """
+INSERT INTO entries (namespace, key, score, kind, depth, move, ply)
+VALUES (?, ?, ?, ?, ?, ?, ?)
+ON CONFLICT (namespace, key) DO UPDATE SET
+    score = CASE WHEN excluded.depth >= depth THEN excluded.score
+                 ELSE score END,
+    kind = CASE WHEN excluded.depth >= depth THEN excluded.kind
+                ELSE kind END,
+    move = CASE WHEN excluded.depth >= depth THEN excluded.move
+                ELSE move END,
+    depth = MAX(depth, excluded.depth),
+    hits = hits + 1
+"""
+
+SIGN_BIT = 1 << 63
+
+# Opened caches by path and process, so the AIs of the process share the
+# connection, and the forked workers don't use the one of their parent.
+_caches = {}
+
+
+def _to_signed(key):
+    """
+    Maps the 64 bit key onto the signed integers stored by SQLite.
+    """
+    return key - (SIGN_BIT << 1) if key >= SIGN_BIT else key
+
+
+def _to_unsigned(key):
+    return key + (SIGN_BIT << 1) if key < 0 else key
+
+
+class PersistentCache:
+    """
+    Search results in the SQLite file at the path. Written entries are kept
+    in memory until batch_size of them are pending, or flush is called.
+    """
+
+    def __init__(self, path, batch_size=1000):
+        self.path = path
+        self.batch_size = batch_size
+        # The AI may be used from the pondering thread, never at the same
+        # time as from the main one.
+        self._connection = sqlite3.connect(path, timeout=30,
+                                           check_same_thread=False)
+        self._connection.execute('PRAGMA journal_mode=WAL')
+        self._connection.execute('PRAGMA synchronous=NORMAL')
+        self._connection.execute(SCHEMA)
+        self._connection.commit()
+        self._pending = {}
+
+    def load(self, namespace, min_ply=0, limit=None):
+        """
+        Yields the key and the Entry of the most often written results of
+        the namespace with at least min_ply pieces, up to limit of them.
+        """
+        query = ('SELECT key, score, kind, depth, move, ply FROM entries '
+                 'WHERE namespace = ? AND ply >= ? '
+                 'ORDER BY hits DESC, depth DESC')
+        parameters = [namespace, min_ply]
+        if limit is not None:
+            query += ' LIMIT ?'
+            parameters.append(limit)
+        for key, score, kind, depth, move, ply in self._connection.execute(
+                query, parameters):
+            yield _to_unsigned(key), Entry(score, kind, depth, move, ply)
+
+    def put(self, namespace, key, entry):
+        self._pending[(namespace, key)] = entry
+        if len(self._pending) >= self.batch_size:
+            self.flush()
+
+    def flush(self):
+        """
+        Writes the pending entries in one transaction.
+        """
+        if not self._pending:
+            return
+        rows = [(namespace, _to_signed(key), entry.score, entry.kind,
+                 entry.depth, entry.move, entry.ply)
+                for (namespace, key), entry in self._pending.items()]
+        with self._connection:
+            self._connection.executemany(UPSERT, rows)
+        self._pending = {}
+
+    def __len__(self):
+        return self._connection.execute(
+            'SELECT COUNT(*) FROM entries').fetchone()[0]
+
+    def close(self):
+        self.flush()
+        self._connection.close()
+
+
+def get_persistent_cache(path):
+    key = (path, os.getpid())
+    if key not in _caches:
+        _caches[key] = PersistentCache(path)
+    return _caches[key]
+
+
+@atexit.register
+def close_all():
+    """
+    Writes the pending entries of the opened caches on exit.
+    """
+    pid = os.getpid()
+    for key in [key for key in _caches if key[1] == pid]:
+        _caches.pop(key).close()
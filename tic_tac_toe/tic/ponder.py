@@ -0,0 +1,45 @@
+"""
+Pondering: the AI thinks while the player does, in a background thread, so
+the search of its next move starts from a warm cache.
+"""
+import threading
+
+
+class Ponderer:
+    """
+    Runs ponder of the AI in the background. Start it once the AI has moved
+    and the player is to move, and stop it before the move of the player is
+    made; the AI must not be used in between.
+
+        ponderer = Ponderer(ai)
+        ponderer.start(game.board)
+        line, column = read_move()
+        ponderer.stop()
+        game.make_move(line, column)
+    """
+
+    def __init__(self, ai):
+        self.ai = ai
+        self._stop = threading.Event()
+        self._thread = None
+
+    @property
+    def running(self):
+        return self._thread is not None and self._thread.is_alive()
+
+    def start(self, board):
+        self.stop()
+        self._stop.clear()
+        self._thread = threading.Thread(target=self.ai.ponder,
+                                        args=(board, self._stop),
+                                        daemon=True)
+        self._thread.start()
+
+    def stop(self):
+        """
+        Stops pondering and waits until the AI is free to move.
+        """
+        if self._thread is not None:
+            self._stop.set()
+            self._thread.join()
+            self._thread = None
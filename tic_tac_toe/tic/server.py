@@ -0,0 +1,414 @@
+"""
+HTTP server of the games, with JSON requests and responses:
+
+    POST /games                 {"lines": 3, "columns": 3, "win_count": 3,
+                                 "ai": "minimax", "player_first": true}
+    GET /games/<id>
+    POST /games/<id>/moves      {"line": 1, "column": 2}
+    DELETE /games/<id>
+
+Lines and columns of the moves count from 1, as in the CLI. The server runs
+on asyncio, and the AI moves are searched in a bounded process pool, so a
+long search doesn't hold up the other games. When all the workers are busy
+and the queue is full, the requests needing the AI are refused with 503.
+Games not played for idle_timeout seconds are dropped.
+
+So that no request holds a worker for long, the exhaustive minimax search is
+served only on the small boards, the heuristic search only to MAX_DEPTH, and
+the heuristic and Monte Carlo searches stop after think_time seconds.
+
+    python -m tic.server --port 8000 --workers 4
+"""
+import argparse
+import asyncio
+import json
+import logging
+import multiprocessing
+import time
+import uuid
+from concurrent.futures import ProcessPoolExecutor
+
+from .ai import (MCTSAI, BasicAI, HeuristicAI, MinimaxAI, configure_ai,
+                 get_ai_spec)
+from .api import MINIMAX_CELLS, default_engine, search_move
+from .exceptions import IllegalMoveError
+from .game import Game
+from .tournament import get_ai_class
+
+logger = logging.getLogger(__name__)
+
+# Biggest number of lines and columns of the served boards.
+MAX_SIZE = 20
+# Longest request body accepted, in bytes.
+MAX_BODY = 4096
+# Deepest heuristic search served.
+MAX_DEPTH = 4
+
+REASONS = {200: 'OK', 201: 'Created', 204: 'No Content', 400: 'Bad Request',
+           404: 'Not Found', 405: 'Method Not Allowed', 409: 'Conflict',
+           413: 'Payload Too Large', 500: 'Internal Server Error',
+           503: 'Service Unavailable'}
+
+
+class RemoteAI(BasicAI):
+    """
+    Plays the move searched in the worker process, so that it goes through
+    the checks of Game like any other AI move.
+    """
+    move = None
+
+    def next_move(self):
+        return self.move
+
+
+class HTTPError(Exception):
+
+    def __init__(self, status, message):
+        super(HTTPError, self).__init__(message)
+        self.status = status
+
+
+class Session:
+    """
+    Game played through the server, and the spec of its AI.
+    """
+
+    def __init__(self, game, spec):
+        self.id = uuid.uuid4().hex
+        self.game = game
+        self.spec = spec
+        self.last_move = None
+        self.busy = False
+        self.used = time.monotonic()
+
+    def view(self):
+        return {
+            'id': self.id,
+            'state': self.game.state,
+            'over': self.game.is_game_over(),
+            'winner': self.game.get_winner(),
+            'ai_move': self.last_move,
+        }
+
+
+class GameServer:
+    """
+    Keeps the sessions in memory and answers the requests. At most
+    max_pending AI searches wait for or run in the workers at a time, and at
+    most max_sessions games are kept.
+
+    The workers are spawned rather than forked, since the forked ones would
+    keep the connections of the server open.
+    """
+
+    def __init__(self, workers=2, max_pending=None, max_sessions=10000,
+                 idle_timeout=600, think_time=2.0, executor=None):
+        self.sessions = {}
+        self.workers = workers
+        self.think_time = think_time
+        self.max_pending = max_pending or workers * 4
+        self.max_sessions = max_sessions
+        self.idle_timeout = idle_timeout
+        self.pending = 0
+        self.executor = executor
+        self._own_executor = executor is None
+        self._server = None
+        self._evictor = None
+
+    async def start(self, host='127.0.0.1', port=8000):
+        if self.executor is None:
+            self.executor = ProcessPoolExecutor(
+                self.workers, mp_context=multiprocessing.get_context('spawn'))
+        self._server = await asyncio.start_server(self.handle, host, port)
+        self._evictor = asyncio.ensure_future(self._evict_forever())
+        return self._server.sockets[0].getsockname()[:2]
+
+    async def close(self):
+        if self._evictor is not None:
+            self._evictor.cancel()
+        if self._server is not None:
+            self._server.close()
+            await self._server.wait_closed()
+        if self._own_executor and self.executor is not None:
+            self.executor.shutdown(cancel_futures=True)
+            self.executor = None
+
+    async def _evict_forever(self):
+        while True:
+            await asyncio.sleep(max(1, self.idle_timeout / 4))
+            self.evict_idle()
+
+    def evict_idle(self):
+        """
+        Drops the sessions not used for idle_timeout seconds.
+        """
+        oldest = time.monotonic() - self.idle_timeout
+        for key in [key for key, session in self.sessions.items()
+                    if session.used < oldest and not session.busy]:
+            del self.sessions[key]
+
+    async def handle(self, reader, writer):
+        """
+        Answers the requests of the connection until it is closed.
+        """
+        try:
+            while True:
+                try:
+                    request = await self._read_request(reader)
+                except HTTPError as e:
+                    self._write_response(writer, e.status,
+                                         {'error': str(e)}, False)
+                    await writer.drain()
+                    break
+                if request is None:
+                    break
+                method, path, body, keep_alive = request
+                try:
+                    status, payload = await self.respond(method, path, body)
+                except HTTPError as e:
+                    status, payload = e.status, {'error': str(e)}
+                except Exception:
+                    logger.exception("Request %s %s failed.", method, path)
+                    status, payload = 500, {'error': "Internal error."}
+                self._write_response(writer, status, payload, keep_alive)
+                await writer.drain()
+                if not keep_alive:
+                    break
+        except (ConnectionError, asyncio.IncompleteReadError):
+            pass
+        finally:
+            writer.close()
+
+    async def _read_request(self, reader):
+        line = await reader.readline()
+        if not line:
+            return None
+        try:
+            method, path, version = line.decode('latin-1').split()
+        except ValueError:
+            return None
+        headers = {}
+        while True:
+            line = await reader.readline()
+            if line in (b'\r\n', b'\n', b''):
+                break
+            name, _, value = line.decode('latin-1').partition(':')
+            headers[name.strip().lower()] = value.strip()
+        try:
+            length = int(headers.get('content-length') or 0)
+        except ValueError:
+            raise HTTPError(400, "Content-Length is not a number.")
+        if length > MAX_BODY:
+            raise HTTPError(413, "Body is too long.")
+        body = await reader.readexactly(length) if length else b''
+        connection = headers.get('connection', '').lower()
+        keep_alive = (connection != 'close' if version == 'HTTP/1.1'
+                      else connection == 'keep-alive')
+        return method, path, body, keep_alive
+
+    def _write_response(self, writer, status, payload, keep_alive):
+        body = b'' if payload is None else json.dumps(payload).encode()
+        head = ['HTTP/1.1 {} {}'.format(status, REASONS[status]),
+                'Content-Type: application/json',
+                'Content-Length: {}'.format(len(body)),
+                'Connection: {}'.format('keep-alive' if keep_alive
+                                        else 'close')]
+        if status == 503:
+            head.append('Retry-After: 1')
+        writer.write('\r\n'.join(head).encode() + b'\r\n\r\n' + body)
+
+    async def respond(self, method, path, body):
+        """
+        Returns the status and the JSON payload of the response.
+        """
+        parts = [part for part in path.split('?')[0].split('/') if part]
+        if not parts or parts[0] != 'games' or len(parts) > 3:
+            raise HTTPError(404, "Unknown path {}.".format(path))
+        if len(parts) == 1:
+            if method != 'POST':
+                raise HTTPError(405, "Games can only be created.")
+            return 201, await self.create_game(self._parse(body))
+        session = self.sessions.get(parts[1])
+        if session is None:
+            raise HTTPError(404, "No game {}.".format(parts[1]))
+        session.used = time.monotonic()
+        if len(parts) == 3:
+            if parts[2] != 'moves' or method != 'POST':
+                raise HTTPError(404, "Unknown path {}.".format(path))
+            return 200, await self.make_move(session, self._parse(body))
+        if method == 'GET':
+            return 200, session.view()
+        if method == 'DELETE':
+            del self.sessions[session.id]
+            return 204, None
+        raise HTTPError(405, "Method {} is not allowed.".format(method))
+
+    @staticmethod
+    def _parse(body):
+        try:
+            data = json.loads(body.decode() or '{}')
+        except ValueError:
+            raise HTTPError(400, "Body is not JSON.")
+        if not isinstance(data, dict):
+            raise HTTPError(400, "Body should be a JSON object.")
+        return data
+
+    @staticmethod
+    def _number(data, name, default=None):
+        value = data.get(name, default)
+        if not isinstance(value, int) or isinstance(value, bool):
+            raise HTTPError(400, "{} should be a number.".format(name))
+        return value
+
+    async def create_game(self, data):
+        lines = self._number(data, 'lines', 3)
+        columns = self._number(data, 'columns', 3)
+        win_count = self._number(data, 'win_count', 3)
+        if not (0 < lines <= MAX_SIZE and 0 < columns <= MAX_SIZE and
+                win_count > 0):
+            raise HTTPError(400, "Lines and columns should be between 1 and "
+                                 "{}.".format(MAX_SIZE))
+        name = data.get('ai')
+        if name is None:
+            name = default_engine(lines, columns)
+        ai_class = self._ai_class(str(name), lines * columns)
+        if len(self.sessions) >= self.max_sessions:
+            self.evict_idle()
+            if len(self.sessions) >= self.max_sessions:
+                raise HTTPError(503, "Too many games.")
+
+        game = Game(lines, columns, win_count)
+        game.start(ai_class=RemoteAI, player_first=True)
+        session = Session(game, get_ai_spec(ai_class))
+        # The game is kept only once the first AI move is made, so the
+        # refused requests don't leave it behind.
+        if not data.get('player_first', True):
+            await self._with_session(session, self._ai_move(session))
+        self.sessions[session.id] = session
+        return session.view()
+
+    def _ai_class(self, name, cells):
+        """
+        Returns the AI class of the name, limited to the searches that end
+        in a bounded time on the board of the number of cells.
+        """
+        try:
+            ai_class = get_ai_class(name)
+        except ValueError as e:
+            raise HTTPError(400, str(e))
+        if issubclass(ai_class, HeuristicAI):
+            if ai_class.max_depth > MAX_DEPTH:
+                raise HTTPError(400, "Heuristic AI searches at most {} moves "
+                                     "deep.".format(MAX_DEPTH))
+            return configure_ai(ai_class, think_time=self.think_time)
+        if issubclass(ai_class, MCTSAI):
+            return configure_ai(ai_class, think_time=self.think_time)
+        if issubclass(ai_class, MinimaxAI) and cells > MINIMAX_CELLS:
+            raise HTTPError(400, "Minimax AI plays only on the boards of at "
+                                 "most {} cells.".format(MINIMAX_CELLS))
+        return ai_class
+
+    async def make_move(self, session, data):
+        line = self._number(data, 'line')
+        column = self._number(data, 'column')
+
+        async def move():
+            self._check_pending()
+            board = session.game.board
+            try:
+                session.game.make_player_move(line, column)
+            except IllegalMoveError as e:
+                raise HTTPError(400, str(e))
+            if session.game.is_game_over():
+                session.last_move = None
+                return
+            # The move is taken back when the AI can't answer it, so it can
+            # be sent again.
+            try:
+                await self._ai_move(session)
+            except BaseException:
+                session.game.board = board
+                raise
+
+        await self._with_session(session, move())
+        return session.view()
+
+    async def _with_session(self, session, coroutine):
+        if session.busy:
+            coroutine.close()
+            raise HTTPError(409, "AI is still thinking on the game.")
+        session.busy = True
+        try:
+            await coroutine
+        finally:
+            session.busy = False
+            session.used = time.monotonic()
+
+    def _check_pending(self):
+        if self.pending >= self.max_pending:
+            raise HTTPError(503, "All the AI workers are busy.")
+
+    async def _ai_move(self, session):
+        """
+        Searches the AI move in the workers and plays it.
+        """
+        self._check_pending()
+        board = session.game.board
+        geometry = board.geometry
+        config = (geometry.lines, geometry.columns, geometry.win_count)
+        self.pending += 1
+        try:
+            move = await asyncio.get_running_loop().run_in_executor(
+                self.executor, search_move, session.spec, config, board.ai,
+                board.player)
+        finally:
+            self.pending -= 1
+        session.game.ai.move = move
+        session.last_move = list(session.game.make_ai_move())
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(
+        description="Serves the tic-tac-toe games over HTTP."
+    )
+    parser.add_argument('--host', dest='host', default='127.0.0.1',
+                        help="address to listen on (default 127.0.0.1)")
+    parser.add_argument('--port', '-p', dest='port', type=int, default=8000,
+                        help="port to listen on (default 8000)")
+    parser.add_argument('--workers', dest='workers', type=int, default=2,
+                        help="number of processes searching the AI moves "
+                             "(default 2)")
+    parser.add_argument('--max-pending', dest='max_pending', type=int,
+                        default=None, help="AI searches running or waiting "
+                                           "before the requests are refused "
+                                           "(default 4 per worker)")
+    parser.add_argument('--think-time', '-t', dest='think_time', type=float,
+                        default=2.0, help="seconds the heuristic and MCTS AIs "
+                                          "search a move (default 2)")
+    parser.add_argument('--idle-timeout', dest='idle_timeout', type=float,
+                        default=600, help="seconds an unplayed game is kept "
+                                          "(default 600)")
+    args = parser.parse_args()
+
+    if args.workers <= 0:
+        print("Number of workers should be positive.")
+        exit(1)
+    if args.think_time <= 0:
+        print("Think time should be positive.")
+        exit(1)
+
+    async def serve():
+        server = GameServer(args.workers, args.max_pending,
+                            idle_timeout=args.idle_timeout,
+                            think_time=args.think_time)
+        host, port = await server.start(args.host, args.port)
+        print("Serving the games on http://{}:{}/".format(host, port))
+        try:
+            await asyncio.Event().wait()
+        finally:
+            await server.close()
+
+    try:
+        asyncio.run(serve())
+    except KeyboardInterrupt:
+        pass
@@ -0,0 +1,297 @@
+"""
+Proof-number solver: proves the positions won, drawn or lost for the AI
+with the depth-first proof-number search (df-pn), usually visiting far fewer
+positions than the minimax.
+
+Every game value is found with two proofs: whether the AI wins, and whether
+it at least draws. Proof and disproof numbers are kept in bounded caches, and
+the proven values of the positions the solver was asked about can be kept in
+a file between the runs. The file is written every save_every new results
+and on exit, replacing the old one at once, so it is never left half
+written.
+"""
+import atexit
+import os
+import struct
+
+from .exceptions import SearchAborted
+from .utils import BoundedCache
+
+WIN = 1
+DRAW = 0
+LOSS = -1
+
+# Proof and disproof numbers of the proven and disproven positions.
+INF = 10 ** 9
+
+# The best child is searched until its delta grows this many times bigger
+# than the one of the second best, instead of just bigger, so the search
+# doesn't switch back and forth between them (1 + epsilon trick).
+EPSILON = 1.25
+
+MAGIC = b'TICSOLV1'
+HEADER = struct.Struct('<8sI')
+RECORD = struct.Struct('<HHHQbH')
+NO_MOVE = 0xFFFF
+
+# Solvers by the path of their results, so the AIs share them.
+_solvers = {}
+
+
+class ProofNumberSolver:
+    """
+    Solves positions with the AI to move.
+
+    Nodes are stored by their phi and delta numbers: the proof and disproof
+    numbers of the position for the side to move. The AI nodes try to prove
+    the target, the player nodes to disprove it. Positions where the side to
+    move wins at once are not expanded, and when the other side threatens to
+    win only the blocking moves are tried.
+    """
+
+    def __init__(self, max_entries=200000, path=None, save_every=100):
+        self._tables = {
+            WIN: BoundedCache(max_entries, policy='lru'),
+            DRAW: BoundedCache(max_entries, policy='lru'),
+        }
+        self.results = {}
+        self.path = path
+        self.save_every = save_every
+        self._unsaved = 0
+        self._nodes = 0
+        self._node_limit = None
+        if path is not None and os.path.exists(path):
+            self.load(path)
+
+    def solve(self, board, max_nodes=None):
+        """
+        Returns WIN, DRAW or LOSS for the AI to move on the board, or None
+        if the position was not solved within max_nodes visited positions.
+        """
+        result = self.best_move(board, max_nodes)
+        return None if result is None else result[0]
+
+    def best_move(self, board, max_nodes=None):
+        """
+        Returns the value of the board with the AI to move and the index of
+        the move keeping it, None for lost positions. Returns None if the
+        position was not solved within max_nodes visited positions. The
+        proof numbers are kept, so the next call goes on with the work.
+        """
+        key, symmetry = board.canonical(True)
+        geometry = board.geometry
+        config = (geometry.lines, geometry.columns, geometry.win_count)
+        result = self.results.get(config + (key,))
+        if result is not None:
+            value, move = result
+            if move is not None:
+                move = geometry.inverse_symmetries[symmetry][move]
+            return value, move
+
+        self._nodes = 0
+        self._node_limit = max_nodes
+        try:
+            if self._prove(board, True, WIN):
+                value, target = WIN, WIN
+            elif self._prove(board, True, DRAW):
+                value, target = DRAW, DRAW
+            else:
+                value, target = LOSS, None
+            move = None
+            if target is not None:
+                move = self._proving_move(board, target)
+        except SearchAborted:
+            return None
+        finally:
+            self._node_limit = None
+
+        stored = None if move is None else geometry.symmetries[symmetry][move]
+        self.results[config + (key,)] = (value, stored)
+        self._unsaved += 1
+        if self._unsaved >= self.save_every:
+            self.flush()
+        return value, move
+
+    def flush(self):
+        """
+        Saves the results not saved yet to the path of the solver.
+        """
+        if self.path is not None and self._unsaved:
+            self.save(self.path)
+        self._unsaved = 0
+
+    def _prove(self, board, ai_move, target):
+        """
+        Returns True if the target is reached from the board: the AI wins,
+        or at least draws for the DRAW target.
+        """
+        phi, delta = self._mid(board, ai_move, INF, INF, target)
+        # The AI proves the target on its move, the player disproves it.
+        return (phi == 0) == ai_move
+
+    def _proving_move(self, board, target):
+        for index in self._moves(board, True):
+            if self._prove(board.play(index, True), False, target):
+                return index
+        return None
+
+    def _check_budget(self):
+        self._nodes += 1
+        if self._node_limit is not None and self._nodes > self._node_limit:
+            raise SearchAborted("Node budget of the solver ran out.")
+
+    def _terminal(self, board, ai_move, target):
+        """
+        Returns phi and delta of the position decided already, or None. The
+        position is decided when the game is over, or when the side the
+        target needs can't complete any line anymore.
+        """
+        winner = board.last_winner()
+        if winner is not None:
+            reached = winner == "ai"
+        elif board.is_full():
+            reached = target == DRAW
+        elif target == WIN and not self._has_free_line(board, board.player):
+            reached = False
+        elif target == DRAW and not self._has_free_line(board, board.ai):
+            reached = True
+        else:
+            return None
+        return (0, INF) if reached == ai_move else (INF, 0)
+
+    def _has_free_line(self, board, other):
+        """
+        Tells if there are win_count cells in a row without pieces of the
+        other side.
+        """
+        for mask in board.geometry.win_masks:
+            if not mask & other:
+                return True
+        return False
+
+    def _moves(self, board, ai_move):
+        """
+        Returns the moves worth trying. A cell on no line still free for
+        either side is as good as a pass, and an extra piece never hurts, so
+        such cells are tried only when there are no other ones.
+        """
+        wins, blocks = board.threats(ai_move)
+        cells = wins or blocks
+        if not cells:
+            ai, player = board.ai, board.player
+            for mask in board.geometry.win_masks:
+                if not mask & ai or not mask & player:
+                    cells |= mask
+        cells &= board.empty
+        if not cells:
+            cells = board.empty
+        return [index for index in board.geometry.center_order
+                if cells >> index & 1]
+
+    def _mid(self, board, ai_move, phi_limit, delta_limit, target):
+        """
+        Multiple iterative deepening step of df-pn: searches the board until
+        its phi or delta number reaches the limit, and returns both.
+        """
+        self._check_budget()
+        table = self._tables[target]
+        key = board.key_for(ai_move)
+        numbers = table.get(key)
+        if numbers is not None and 0 in numbers:
+            return numbers
+        numbers = self._terminal(board, ai_move, target)
+        if numbers is not None:
+            table.put(key, numbers)
+            return numbers
+        wins = board.threats(ai_move)[0]
+        if wins:
+            # The side to move wins with the next move.
+            numbers = (0, INF)
+            table.put(key, numbers)
+            return numbers
+
+        children = [board.play(index, ai_move)
+                    for index in self._moves(board, ai_move)]
+        keys = [child.key_for(not ai_move) for child in children]
+        moves_left = board.geometry.size - board.pieces - 1
+        initial = [self._terminal(child, not ai_move, target) or
+                   (1, moves_left) for child in children]
+        while True:
+            phi, delta = INF, 0
+            best = None
+            second_delta = INF
+            for number, child_key in enumerate(keys):
+                child_phi, child_delta = (table.get(child_key) or
+                                          initial[number])
+                delta += child_phi
+                if child_delta < phi:
+                    second_delta = phi
+                    phi, best, best_phi = child_delta, number, child_phi
+                elif child_delta < second_delta:
+                    second_delta = child_delta
+            delta = min(delta, INF)
+            if phi >= phi_limit or delta >= delta_limit:
+                break
+            self._mid(children[best], not ai_move,
+                      delta_limit - delta + best_phi,
+                      min(phi_limit, int(second_delta * EPSILON) + 1),
+                      target)
+        table.put(key, (phi, delta))
+        return phi, delta
+
+    def cache_stats(self):
+        return {'win': self._tables[WIN].stats(),
+                'draw': self._tables[DRAW].stats(),
+                'results': len(self.results)}
+
+    def load(self, path):
+        """
+        Adds the results of the file. A file cut short by an interrupted
+        write gives the results stored in full before the cut.
+        """
+        with open(path, 'rb') as results_file:
+            data = results_file.read()
+        if len(data) < HEADER.size:
+            return
+        magic, count = HEADER.unpack_from(data)
+        if magic != MAGIC:
+            raise ValueError("{} is not a solver results file.".format(path))
+        count = min(count, (len(data) - HEADER.size) // RECORD.size)
+        for number in range(count):
+            lines, columns, win_count, key, value, move = RECORD.unpack_from(
+                data, HEADER.size + number * RECORD.size)
+            self.results[(lines, columns, win_count, key)] = (
+                value, None if move == NO_MOVE else move)
+
+    def save(self, path):
+        """
+        Writes the results to a temporary file and puts it in place of the
+        one at the path. Results saved there by the other processes since
+        it was loaded are kept too.
+        """
+        if os.path.exists(path):
+            self.load(path)
+        temporary = '{}.{}.tmp'.format(path, os.getpid())
+        with open(temporary, 'wb') as results_file:
+            results_file.write(HEADER.pack(MAGIC, len(self.results)))
+            for (lines, columns, win_count, key), (value, move) in \
+                    sorted(self.results.items()):
+                results_file.write(RECORD.pack(
+                    lines, columns, win_count, key, value,
+                    NO_MOVE if move is None else move))
+        os.replace(temporary, path)
+
+
+def get_solver(path=None):
+    if path not in _solvers:
+        _solvers[path] = ProofNumberSolver(path=path)
+    return _solvers[path]
+
+
+@atexit.register
+def flush_all():
+    """
+    Saves the results not saved yet by the shared solvers on exit.
+    """
+    for solver in _solvers.values():
+        solver.flush()
@@ -0,0 +1,322 @@
+"""
+Sparse board for the very large boards, like 19x19 or 50x50 with 5 in a row.
+
+Only the occupied cells are stored, and nothing is precomputed per cell, so
+the memory and the cost of the moves, the win checks and the threats depend
+on the number of pieces instead of the size of the board. The interface is
+the same as the one of the bitboard in tic.board.
+"""
+import random
+from functools import cached_property, lru_cache
+
+from .board import AI, EMPTY, PLAYER, BaseBoard, Geometry, symmetry_functions
+
+MASK_64 = (1 << 64) - 1
+
+# Steps of the lines and the columns along the rows, the columns and both
+# diagonals.
+DIRECTIONS = ((0, 1), (1, 0), (1, 1), (1, -1))
+
+
+def mix(value):
+    """
+    Returns 64 bit hash of the integer (splitmix64 finalizer).
+    """
+    value = (value + 0x9E3779B97F4A7C15) & MASK_64
+    value = ((value ^ (value >> 30)) * 0xBF58476D1CE4E5B9) & MASK_64
+    value = ((value ^ (value >> 27)) * 0x94D049BB133111EB) & MASK_64
+    return value ^ (value >> 31)
+
+
+class Symmetry:
+    """
+    Maps the cell indexes like the permutations of Geometry.symmetries, but
+    computes them instead of keeping a table for every cell.
+    """
+
+    def __init__(self, function, columns):
+        self._function = function
+        self._columns = columns
+
+    def __getitem__(self, index):
+        return self._function(*divmod(index, self._columns))
+
+
+class SparseGeometry:
+    """
+    Board configuration of the sparse boards. Zobrist keys of the cells are
+    hashed from their indexes when needed.
+
+    Tables of the winning lines, used by the heuristic evaluation, are built
+    on the first use only.
+    """
+    sparse = True
+
+    def __init__(self, lines, columns, win_count):
+        self.lines = lines
+        self.columns = columns
+        self.win_count = win_count
+        self.size = lines * columns
+        rand = random.Random('{}x{}x{}'.format(lines, columns, win_count))
+        self._seed = rand.getrandbits(64)
+        self.turn_key = rand.getrandbits(64)
+        functions = symmetry_functions(lines, columns)
+        self.symmetries = tuple(Symmetry(function, columns)
+                                for function in functions)
+        # Every symmetry is its own inverse, except for the rotations by 90
+        # degrees, which are the inverses of each other.
+        inverse = list(self.symmetries)
+        if len(inverse) == 8:
+            inverse[6], inverse[7] = inverse[7], inverse[6]
+        self.inverse_symmetries = tuple(inverse)
+
+    def index(self, line, column):
+        return line * self.columns + column
+
+    def zobrist(self, index, side):
+        return mix(self._seed ^ (2*index + side))
+
+    def symmetric_zobrist(self, index, side):
+        """
+        Returns Zobrist keys of the cell in every symmetric position.
+        """
+        return tuple(self.zobrist(symmetry[index], side)
+                     for symmetry in self.symmetries)
+
+    @cached_property
+    def full(self):
+        return (1 << self.size) - 1
+
+    @cached_property
+    def center_order(self):
+        return tuple(sorted(range(self.size), key=self.distance_to_center))
+
+    @cached_property
+    def winning_lines(self):
+        return tuple(Geometry._winning_lines(self))
+
+    @cached_property
+    def line_masks(self):
+        return tuple(sum(1 << index for index in line)
+                     for line in self.winning_lines)
+
+    @cached_property
+    def cell_lines(self):
+        cell_lines = [[] for _ in range(self.size)]
+        for number, line in enumerate(self.winning_lines):
+            for index in line:
+                cell_lines[index].append(number)
+        return tuple(tuple(lines) for lines in cell_lines)
+
+    distance_to_center = Geometry.distance_to_center
+
+
+@lru_cache(maxsize=None)
+def get_sparse_geometry(lines, columns, win_count):
+    return SparseGeometry(lines, columns, win_count)
+
+
+class SparseBoard(BaseBoard):
+    """
+    Immutable board keeping the sides of the occupied cells in a dict by
+    their indexes. Wins are checked by walking from the pieces along the
+    lines, so only the neighbourhood of the pieces is ever looked at.
+    """
+    __slots__ = ('geometry', 'cells', 'last', 'keys')
+
+    def __init__(self, geometry, cells=None, last=None, keys=None):
+        self.geometry = geometry
+        self.cells = {} if cells is None else cells
+        self.last = last
+        if keys is None:
+            keys = [0] * len(geometry.symmetries)
+            for index, side in self.cells.items():
+                zobrist = geometry.symmetric_zobrist(index, side - 1)
+                keys = [k ^ z for k, z in zip(keys, zobrist)]
+            keys = tuple(keys)
+        self.keys = keys
+
+    @classmethod
+    def from_state(cls, state, win_count, ai_piece='o', player_piece='x'):
+        """
+        Builds the board from the list of strings representation.
+        All the characters other than the pieces are considered empty places.
+        """
+        geometry = get_sparse_geometry(len(state), len(state[0]), win_count)
+        cells = {}
+        for i, row in enumerate(state):
+            for j, val in enumerate(row):
+                if val == ai_piece:
+                    cells[geometry.index(i, j)] = AI
+                elif val == player_piece:
+                    cells[geometry.index(i, j)] = PLAYER
+        return cls(geometry, cells)
+
+    def to_state(self, ai_piece='o', player_piece='x', empty_place='.'):
+        pieces = {AI: ai_piece, PLAYER: player_piece}
+        columns = self.geometry.columns
+        state = [[empty_place] * columns for _ in range(self.geometry.lines)]
+        for index, side in self.cells.items():
+            line, column = divmod(index, columns)
+            state[line][column] = pieces[side]
+        return [''.join(row) for row in state]
+
+    def __eq__(self, other):
+        return (isinstance(other, SparseBoard) and
+                self.geometry is other.geometry and
+                self.cells == other.cells)
+
+    __hash__ = BaseBoard.__hash__
+
+    def _bits(self, side):
+        bits = 0
+        for index, piece in self.cells.items():
+            if piece == side:
+                bits |= 1 << index
+        return bits
+
+    @property
+    def ai(self):
+        """
+        Bit mask of the AI pieces, as in the bitboard.
+        """
+        return self._bits(AI)
+
+    @property
+    def player(self):
+        return self._bits(PLAYER)
+
+    @property
+    def pieces(self):
+        """
+        Number of pieces on the board.
+        """
+        return len(self.cells)
+
+    @property
+    def empty(self):
+        return self.geometry.full & ~(self.ai | self.player)
+
+    def piece_at(self, index):
+        return self.cells.get(index, EMPTY)
+
+    def moves(self):
+        """
+        Yields indexes of the empty cells in ascending order, going over the
+        gaps between the pieces instead of looking up every cell.
+        """
+        start = 0
+        for index in sorted(self.cells):
+            yield from range(start, index)
+            start = index + 1
+        yield from range(start, self.geometry.size)
+
+    def play(self, index, ai_move):
+        """
+        Returns new board with the piece placed on the index.
+        Makes no checks if the move is legal.
+        """
+        side = AI if ai_move else PLAYER
+        cells = dict(self.cells)
+        cells[index] = side
+        zobrist = self.geometry.symmetric_zobrist(index, side - 1)
+        keys = tuple([k ^ z for k, z in zip(self.keys, zobrist)])
+        return SparseBoard(self.geometry, cells, index, keys)
+
+    def _run(self, cells, index, side, step_line, step_column):
+        """
+        Returns number of the side pieces next to the cell in the direction.
+        """
+        lines, columns = self.geometry.lines, self.geometry.columns
+        line, column = divmod(index, columns)
+        count = 0
+        while True:
+            line += step_line
+            column += step_column
+            if not (0 <= line < lines and 0 <= column < columns):
+                return count
+            if cells.get(line * columns + column) != side:
+                return count
+            count += 1
+
+    def _wins_at(self, cells, index, side):
+        """
+        Tells if the side has win_count pieces in a row through the index,
+        counting the index as its piece.
+        """
+        need = self.geometry.win_count - 1
+        for step_line, step_column in DIRECTIONS:
+            count = self._run(cells, index, side, step_line, step_column)
+            if count >= need:
+                return True
+            count += self._run(cells, index, side, -step_line, -step_column)
+            if count >= need:
+                return True
+        return False
+
+    def winner(self):
+        """
+        Returns "ai", "player" or None. If both sides have a winning line,
+        may return any of them.
+        """
+        for index, side in self.cells.items():
+            if self._wins_at(self.cells, index, side):
+                return "ai" if side == AI else "player"
+        return None
+
+    def winner_after(self, index):
+        """
+        Returns the winner looking only at the lines going through the index.
+        Correct when there was no winner before the piece on the index was
+        placed.
+        """
+        side = self.cells.get(index)
+        if side is None or not self._wins_at(self.cells, index, side):
+            return None
+        return "ai" if side == AI else "player"
+
+    def threats(self, ai_move):
+        """
+        Returns bit masks of the empty cells which win immediately for the
+        side to move, and of the ones where the other side would win. Only
+        the empty cells within win_count of the pieces can be such.
+        """
+        mine, theirs = (AI, PLAYER) if ai_move else (PLAYER, AI)
+        cells = self.cells
+        lines, columns = self.geometry.lines, self.geometry.columns
+        reach = self.geometry.win_count - 1
+        candidates = set()
+        for index in cells:
+            line, column = divmod(index, columns)
+            for step_line, step_column in DIRECTIONS:
+                for distance in range(-reach, reach + 1):
+                    i = line + distance * step_line
+                    j = column + distance * step_column
+                    if 0 <= i < lines and 0 <= j < columns:
+                        candidates.add(i * columns + j)
+        wins = blocks = 0
+        for index in candidates:
+            if index in cells:
+                continue
+            if self._wins_at(cells, index, mine):
+                wins |= 1 << index
+            if self._wins_at(cells, index, theirs):
+                blocks |= 1 << index
+        return wins, blocks
+
+    def play_out(self, moves, ai_move):
+        """
+        Plays the moves in turn, starting with the side of ai_move, until one
+        of the sides wins. Returns the winner or None.
+        """
+        cells = dict(self.cells)
+        for index in moves:
+            side = AI if ai_move else PLAYER
+            cells[index] = side
+            if self._wins_at(cells, index, side):
+                return "ai" if ai_move else "player"
+            ai_move = not ai_move
+        return None
+
+    def is_full(self):
+        return len(self.cells) == self.geometry.size
@@ -0,0 +1,94 @@
+"""
+Counters of the AI search, collected when the AI class has collect_stats
+set. The search checks only that the stats are there, so it costs next to
+nothing when they are not collected.
+"""
+import time
+
+
+class SearchStats:
+    """
+    Statistics of the last AI move. Depth is the number of moves below the
+    position searched, cache counters are the lookups in the search cache
+    during the move, and cache_bytes the approximate memory it takes.
+    Source tells where the move came from: "book", "solver" or "search".
+    """
+
+    def __init__(self):
+        self.start()
+
+    def start(self):
+        self.nodes = 0
+        self.terminal = 0
+        self.evaluated = 0
+        self.max_depth = 0
+        self.cache_hits = 0
+        self.cache_misses = 0
+        self.cache_bytes = 0
+        self.elapsed = 0.0
+        self.source = None
+        self._started = time.perf_counter()
+        self._cache = None
+
+    def watch(self, cache):
+        """
+        Counts the lookups of the cache from now on.
+        """
+        self._cache = cache
+        self.cache_hits = -cache.hits
+        self.cache_misses = -cache.misses
+
+    def visit(self, depth, terminal=False, evaluated=False):
+        """
+        Counts the position searched on the depth, which is terminal when
+        the game is over, and evaluated when the heuristic scored it.
+        """
+        self.nodes += 1
+        if depth > self.max_depth:
+            self.max_depth = depth
+        if terminal:
+            self.terminal += 1
+        elif evaluated:
+            self.evaluated += 1
+
+    def finish(self, source):
+        self.elapsed = time.perf_counter() - self._started
+        self.source = source
+        cache = self._cache
+        if cache is not None:
+            self.cache_hits += cache.hits
+            self.cache_misses += cache.misses
+            self.cache_bytes = cache.size_bytes
+            self._cache = None
+
+    @property
+    def hit_rate(self):
+        lookups = self.cache_hits + self.cache_misses
+        return self.cache_hits / lookups if lookups else None
+
+    @property
+    def nodes_per_second(self):
+        return self.nodes / self.elapsed if self.elapsed else None
+
+    def as_dict(self):
+        return {
+            'source': self.source,
+            'nodes': self.nodes,
+            'terminal': self.terminal,
+            'evaluated': self.evaluated,
+            'max_depth': self.max_depth,
+            'cache_hits': self.cache_hits,
+            'cache_misses': self.cache_misses,
+            'cache_bytes': self.cache_bytes,
+            'elapsed': self.elapsed,
+        }
+
+    def __str__(self):
+        hit_rate = self.hit_rate
+        return ("{} move in {:.3f} s: {} nodes ({} terminal, {} evaluated), "
+                "depth {}, cache hits {}, {} KB".format(
+                    self.source, self.elapsed, self.nodes, self.terminal,
+                    self.evaluated, self.max_depth,
+                    '-' if hit_rate is None
+                    else '{:.0%}'.format(hit_rate),
+                    self.cache_bytes // 1024))
@@ -0,0 +1,217 @@
+"""
+Plays AIs against each other, to compare them by the results of many games
+instead of by hand.
+
+    python -m tic.tournament minimax heuristic-3 --lines 4 --columns 4 \
+        --win 3 --games 1000 --workers 4
+
+Every game starts from a few random moves, so the deterministic AIs don't
+play the same game over and over. The games run in the worker processes,
+every one with new AIs.
+"""
+import argparse
+import random
+import statistics
+import time
+
+from .ai import (MCTSAI, MinimaxAI, SimpleAI, configure_ai, get_ai_spec,
+                 get_executor, get_heuristic_ai_class)
+from .board import Board, get_geometry
+from .game import Game
+
+
+def get_ai_class(name):
+    """
+    Returns the AI class by its name: simple, minimax, mcts, or heuristic-N
+    for the heuristic AI with the search depth N.
+    """
+    if name == 'simple':
+        return SimpleAI
+    if name == 'minimax':
+        return MinimaxAI
+    if name == 'mcts':
+        return MCTSAI
+    if name.startswith('heuristic-') and name[10:].isdigit():
+        return get_heuristic_ai_class(int(name[10:]))
+    raise ValueError("Unknown AI {}.".format(name))
+
+
+def random_opening(config, plies, rand):
+    """
+    Returns list of the random moves made by the sides in turn. Stops early
+    if a move ends the game, so there's always a game left to play.
+    """
+    board = Board(get_geometry(*config))
+    moves = []
+    for ply in range(plies):
+        index = rand.choice(list(board.moves()))
+        next_board = board.play(index, ply % 2 == 0)
+        if next_board.is_game_over():
+            break
+        board = next_board
+        moves.append(index)
+    return moves
+
+
+def play_game(specs, config, opening):
+    """
+    Plays the game of the AIs of the specs, the first one moving first,
+    after the opening moves. Returns the number of the winner, or None for
+    a draw, and the seconds every AI took on its moves.
+
+    Each AI gets its own game where it is the AI and the other one is the
+    player, so both of them go through the checks of Game.
+    """
+    games = []
+    for base, options in specs:
+        game = Game(*config)
+        game.start(ai_class=configure_ai(base, **options), player_first=True)
+        games.append(game)
+    for ply, index in enumerate(opening):
+        side = ply % 2
+        games[side].board = games[side].board.play(index, True)
+        games[1 - side].board = games[1 - side].board.play(index, False)
+
+    times = ([], [])
+    side = len(opening) % 2
+    while not games[side].is_game_over():
+        start = time.perf_counter()
+        line, column = games[side].make_ai_move()
+        times[side].append(time.perf_counter() - start)
+        games[1 - side].make_player_move(line, column)
+        side = 1 - side
+
+    winner = games[0].get_winner()
+    if winner is None:
+        return None, times
+    return (0 if winner == "ai" else 1), times
+
+
+def _play(job):
+    return play_game(*job)
+
+
+def run_tournament(first, second, config, games=100, workers=1,
+                   opening_plies=2, seed=None):
+    """
+    Plays the games of the AI classes on the board config of lines, columns
+    and win count, and returns the report. Results are counted for the first
+    AI: wins, draws and losses, and the rates of each.
+    """
+    rand = random.Random(seed)
+    specs = (get_ai_spec(first), get_ai_spec(second))
+    jobs = []
+    for number in range(games):
+        # The AIs take turns moving first, and play every opening from both
+        # sides, so the luck of the random moves evens out.
+        if number % 2 == 0:
+            opening = random_opening(config, opening_plies, rand)
+        if number % 2:
+            jobs.append(((specs[1], specs[0]), config, opening))
+        else:
+            jobs.append((specs, config, opening))
+
+    start = time.perf_counter()
+    if workers > 1:
+        chunk = max(1, games // (workers * 4))
+        results = list(get_executor(workers).map(_play, jobs,
+                                                 chunksize=chunk))
+    else:
+        results = [_play(job) for job in jobs]
+    elapsed = time.perf_counter() - start
+
+    counts = {'wins': 0, 'draws': 0, 'losses': 0}
+    times = ([], [])
+    for number, (winner, game_times) in enumerate(results):
+        swapped = number % 2
+        if winner is None:
+            counts['draws'] += 1
+        elif winner == swapped:
+            counts['wins'] += 1
+        else:
+            counts['losses'] += 1
+        times[0].extend(game_times[swapped])
+        times[1].extend(game_times[1 - swapped])
+
+    report = dict(counts)
+    report.update({
+        'games': games,
+        'board': '{}x{}x{}'.format(*config),
+        'rates': {name: count / games if games else 0.0
+                  for name, count in counts.items()},
+        'latency': [latency(side_times) for side_times in times],
+        'elapsed': elapsed,
+        'games_per_second': games / elapsed if elapsed else None,
+    })
+    return report
+
+
+def latency(times):
+    """
+    Returns the distribution of the move times in seconds.
+    """
+    if not times:
+        return {'moves': 0, 'median': None, 'p95': None, 'max': None}
+    times = sorted(times)
+    return {
+        'moves': len(times),
+        'median': statistics.median(times),
+        'p95': times[max(0, -(-95 * len(times) // 100) - 1)],
+        'max': times[-1],
+    }
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(
+        description="Plays two tic-tac-toe AIs against each other."
+    )
+    parser.add_argument('first', help="simple, minimax, mcts or heuristic-N "
+                                      "with the search depth N")
+    parser.add_argument('second', help="AI to play against")
+    parser.add_argument('--lines', '-l', dest='lines', type=int,
+                        default=3, help="number of lines (default 3)")
+    parser.add_argument('--columns', '-c', dest='columns', type=int,
+                        default=3, help="number of columns (default 3)")
+    parser.add_argument('--win', '-w', dest='win_count', type=int,
+                        default=3, help="number of pieces on a straight line "
+                                        "required to win (default 3)")
+    parser.add_argument('--games', '-g', dest='games', type=int,
+                        default=100, help="number of games (default 100)")
+    parser.add_argument('--opening', '-o', dest='opening', type=int,
+                        default=2, help="number of random moves every game "
+                                        "starts with (default 2)")
+    parser.add_argument('--seed', dest='seed', type=int, default=None,
+                        help="seed of the random openings")
+    parser.add_argument('--workers', dest='workers', type=int, default=1,
+                        help="number of processes playing the games "
+                             "(default 1)")
+    args = parser.parse_args()
+
+    if not (args.lines > 0 and args.columns > 0 and args.win_count > 0):
+        print("Neither one of the parameters can be <= 0.")
+        exit(1)
+    if args.games <= 0 or args.workers <= 0 or args.opening < 0:
+        print("Number of games and workers should be positive.")
+        exit(1)
+    try:
+        ai_classes = [get_ai_class(args.first), get_ai_class(args.second)]
+    except ValueError as e:
+        print(e)
+        exit(1)
+
+    config = (args.lines, args.columns, args.win_count)
+    report = run_tournament(*ai_classes, config=config, games=args.games,
+                            workers=args.workers,
+                            opening_plies=args.opening, seed=args.seed)
+    print("{} against {} on {} in {} games:".format(
+        args.first, args.second, report['board'], report['games']))
+    for name in ['wins', 'draws', 'losses']:
+        print("  {}: {} ({:.1%})".format(name, report[name],
+                                         report['rates'][name]))
+    for name, moves in zip([args.first, args.second], report['latency']):
+        if moves['moves']:
+            print("  {} moves: median {:.2f} ms, p95 {:.2f} ms, "
+                  "max {:.2f} ms".format(name, moves['median'] * 1000,
+                                         moves['p95'] * 1000,
+                                         moves['max'] * 1000))
+    print("  {:.1f} games per second".format(report['games_per_second']))
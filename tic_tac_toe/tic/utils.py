@@ -1,3 +1,7 @@
+from collections import OrderedDict
+from itertools import islice
+
+from .board import get_symmetries
 
 
 def shrink(line):
@@ -39,41 +43,227 @@ def back_rotate(state):
     return new_state
 
 
+def symmetric_states(state):
+    """
+    Returns joined states of all the symmetries valid for the board shape, in
+    the order of board.get_symmetries.
+    """
+    cells = ''.join(state)
+    result = []
+    for perm in get_symmetries(len(state), len(state[0])):
+        new_cells = [None] * len(cells)
+        for index, cell in enumerate(cells):
+            new_cells[perm[index]] = cell
+        result.append(''.join(new_cells))
+    return result
+
+
+def canonical_state(state):
+    """
+    Returns the key shared by all the symmetric states and the number of the
+    symmetry turning the state into it.
+    """
+    states = symmetric_states(state)
+    key = min(states)
+    return key, states.index(key)
+
+
 class StatesCache():
     """
-    Cache for saving states of the game.
+    Cache for saving states of the game. Symmetric states share one entry,
+    stored under their canonical key.
     """
 
     def all_equivalent_states(self, state):
         state, is_max = state
-        if (''.join(state), is_max) in self._eq_cache:
-            return self._eq_cache[(''.join(state), is_max)]
-        result = set()
-        for _ in range(4):
-            new_state = []
-            for line in state:
-                new_state.append(line[::-1])
-            result.add((''.join(new_state), is_max))
-            new_state = rotate(state)
-            result.add((''.join(new_state), is_max))
-            state = new_state
-        self._eq_cache[(''.join(state), is_max)] = result
-        return result
+        return {(key, is_max) for key in symmetric_states(state)}
 
     def __init__(self, *args):
-        self._eq_cache = {}
         self._cache = {}
 
     def __setitem__(self, key, value):
-        for state in self.all_equivalent_states(key):
-            if state in self._cache:
-                self._cache[state] = value
-                return
-        self._cache[state] = value
+        state, is_max = key
+        self._cache[(canonical_state(state)[0], is_max)] = value
 
     def __getitem__(self, key):
-        for state in self.all_equivalent_states(key):
-            if state in self._cache:
-                return self._cache[state]
-        # Let it raise error.
-        return self._cache[state]
+        state, is_max = key
+        return self._cache[(canonical_state(state)[0], is_max)]
+
+
+class AlwaysReplace():
+    """
+    Replacement policy which always stores new results. When the cache is
+    full, the oldest stored entry is evicted.
+    """
+
+    def touch(self, entries, key):
+        pass
+
+    def replace(self, old, new):
+        return True
+
+    def victim(self, entries, new):
+        return next(iter(entries))
+
+
+class LRU(AlwaysReplace):
+    """
+    Evicts the least recently used entry.
+    """
+
+    def touch(self, entries, key):
+        entries.move_to_end(key)
+
+
+class DepthPreferred(AlwaysReplace):
+    """
+    Keeps results of the deeper searches. When the cache is full, evicts the
+    shallowest of the sample oldest entries, unless the new one is shallower
+    still, in which case it is not stored.
+    """
+    sample = 8
+
+    def replace(self, old, new):
+        return new.depth >= old.depth
+
+    def victim(self, entries, new):
+        oldest = islice(entries.items(), self.sample)
+        key, entry = min(oldest, key=lambda item: item[1].depth)
+        if entry.depth > new.depth:
+            return None
+        return key
+
+
+POLICIES = {
+    'always': AlwaysReplace,
+    'lru': LRU,
+    'depth': DepthPreferred,
+}
+
+
+def get_policy(policy):
+    if isinstance(policy, str):
+        return POLICIES[policy]()
+    return policy
+
+
+class BoundedCache():
+    """
+    Mapping with an optional budget of entries or bytes. Which entries are
+    kept once the budget is reached is decided by the replacement policy,
+    either an instance or one of the POLICIES names.
+
+    Counts hits, misses and evictions, so the budget can be tuned.
+    """
+    # Approximate memory taken by an entry with an int key and value,
+    # including the dict overhead.
+    entry_bytes = 175
+
+    def __init__(self, max_entries=None, max_bytes=None, policy='lru'):
+        if max_bytes is not None:
+            by_bytes = max(1, max_bytes // self.entry_bytes)
+            if max_entries is None or by_bytes < max_entries:
+                max_entries = by_bytes
+        self.max_entries = max_entries
+        self.policy = get_policy(policy)
+        self._entries = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def __len__(self):
+        return len(self._entries)
+
+    def __contains__(self, key):
+        return key in self._entries
+
+    def get(self, key):
+        value = self._entries.get(key)
+        if value is None:
+            self.misses += 1
+        else:
+            self.hits += 1
+            self.policy.touch(self._entries, key)
+        return value
+
+    def peek(self, key):
+        """
+        Returns the value without counting the lookup or touching the entry.
+        """
+        return self._entries.get(key)
+
+    def put(self, key, value):
+        entries = self._entries
+        old = entries.get(key)
+        if old is not None:
+            if self.policy.replace(old, value):
+                entries[key] = value
+                self.policy.touch(entries, key)
+            return
+        if self.max_entries is not None and len(entries) >= self.max_entries:
+            victim = self.policy.victim(entries, value)
+            if victim is None:
+                return
+            del entries[victim]
+            self.evictions += 1
+        entries[key] = value
+
+    def clear(self):
+        self._entries.clear()
+
+    @property
+    def size_bytes(self):
+        return len(self._entries) * self.entry_bytes
+
+    def stats(self):
+        return {
+            'hits': self.hits,
+            'misses': self.misses,
+            'evictions': self.evictions,
+            'size': len(self),
+            'bytes': self.size_bytes,
+        }
+
+
+class Entry:
+    """
+    Search result of a position. Depth is the number of moves the position
+    was searched to, kind tells if the score is exact or only a bound, ply is
+    the number of pieces on the board.
+    """
+    __slots__ = ('score', 'kind', 'depth', 'move', 'ply')
+
+    def __init__(self, score, kind, depth, move, ply=0):
+        self.score = score
+        self.kind = kind
+        self.depth = depth
+        self.move = move
+        self.ply = ply
+
+
+class TranspositionTable(BoundedCache):
+    """
+    Search results keyed by the integer hash of the position and the side to
+    move. When written is a set, the keys of the stored results are added to
+    it, so they can be written back to the persistent cache.
+    """
+    entry_bytes = 240
+
+    def __init__(self, max_entries=None, max_bytes=None, policy='depth'):
+        super(TranspositionTable, self).__init__(max_entries, max_bytes,
+                                                 policy)
+        self.written = None
+
+    def store(self, key, score, kind, depth, move, ply=0):
+        self.put(key, Entry(score, kind, depth, move, ply))
+        if self.written is not None:
+            self.written.add(key)
+
+    def age(self, ply):
+        """
+        Removes the entries with less than ply pieces on the board. Pieces are
+        never removed, so these positions can't be reached anymore.
+        """
+        entries = self._entries
+        for key in [key for key, entry in entries.items() if entry.ply < ply]:
+            del entries[key]
@@ -0,0 +1,163 @@
+"""
+Evaluation of big boards with NumPy: the winner and the heuristic score of
+the whole position in a handful of array operations instead of Python loops
+over every winning line.
+
+NumPy is optional. When it is not installed AVAILABLE is False and callers
+stay with the pure Python code of tic.board and tic.heuristic.
+"""
+from functools import lru_cache
+
+try:
+    import numpy as np
+except ImportError:
+    np = None
+
+from .board import AI, EMPTY, PLAYER
+
+AVAILABLE = np is not None
+
+# Boards with fewer cells are faster to evaluate in pure Python. Batches of
+# smaller boards need more cells in total, to pay for converting every board.
+MIN_CELLS = 225
+MIN_BATCH_CELLS = 500
+
+# Value of the cells past the ends of the lines.
+WALL = 3
+
+
+def should_use(geometry, count=1):
+    """
+    Tells if count boards of the geometry are faster to evaluate together
+    with NumPy.
+    """
+    if not AVAILABLE or geometry.sparse:
+        return False
+    return (geometry.size >= MIN_CELLS or
+            geometry.size * count >= MIN_BATCH_CELLS)
+
+
+class VectorGeometry:
+    """
+    Index arrays of the geometry. Cell number size is the wall sentinel,
+    so lines of different lengths fit in one array.
+    """
+
+    def __init__(self, geometry):
+        self.geometry = geometry
+        size = geometry.size
+        width = max(len(line) for line in geometry.winning_lines) + 2
+        # Every line starts and ends with the wall, so the runs of pieces
+        # never continue from one line to the next one in the flat array.
+        self.lines = np.full((len(geometry.winning_lines), width), size,
+                             dtype=np.intp)
+        for number, line in enumerate(geometry.winning_lines):
+            self.lines[number, 1:len(line) + 1] = line
+        win_count = geometry.win_count
+        self.windows = np.array(
+            [line[start:start + win_count]
+             for line in geometry.winning_lines
+             for start in range(len(line) - win_count + 1)],
+            dtype=np.intp
+        )
+        self.bytes = (size + 7) // 8
+
+    def cells(self, boards):
+        """
+        Returns int8 array with a row of the pieces on the cells followed by
+        the wall for every board.
+        """
+        cells = np.empty((len(boards), self.geometry.size + 1),
+                         dtype=np.int8)
+        cells[:, :-1] = self._bits([board.ai for board in boards])
+        cells[:, :-1] += self._bits([board.player for board in boards]) * \
+            np.int8(PLAYER)
+        cells[:, -1] = WALL
+        return cells
+
+    def _bits(self, sides):
+        data = b''.join(pieces.to_bytes(self.bytes, 'little')
+                        for pieces in sides)
+        data = np.frombuffer(data, dtype=np.uint8).reshape(len(sides), -1)
+        bits = np.unpackbits(data, axis=1, bitorder='little')
+        return bits[:, :self.geometry.size].view(np.int8)
+
+
+@lru_cache(maxsize=None)
+def get_vector_geometry(geometry):
+    return VectorGeometry(geometry)
+
+
+def _cells(boards):
+    """
+    Returns 2D array with the cells of every board in a row, and the vector
+    geometry shared by all the boards.
+    """
+    vector = get_vector_geometry(boards[0].geometry)
+    return vector.cells(boards), vector
+
+
+def winner(board):
+    """
+    Same as Board.winner: returns "ai", "player" or None.
+    """
+    return winners([board])[0]
+
+
+def winners(boards):
+    """
+    Returns winners of the list of boards with the same geometry.
+    """
+    cells, vector = _cells(boards)
+    windows = cells[:, vector.windows]
+    ai_wins = (windows == AI).all(axis=2).any(axis=1)
+    player_wins = (windows == PLAYER).all(axis=2).any(axis=1)
+    return ["ai" if ai_win else "player" if player_win else None
+            for ai_win, player_win in zip(ai_wins.tolist(),
+                                          player_wins.tolist())]
+
+
+def score(board, ai_move):
+    """
+    Returns the same value as the sum of tic.heuristic.line_value over all
+    the winning lines of the board.
+    """
+    return scores([board], ai_move)[0]
+
+
+def scores(boards, ai_move):
+    """
+    Returns heuristic scores of the list of boards with the same geometry.
+    """
+    cells, vector = _cells(boards)
+    win_count = vector.geometry.win_count
+    flat = cells[:, vector.lines].ravel()
+
+    # Runs of equal cells. Every line starts and ends with the wall, so the
+    # first and the last runs are walls, every other run has both
+    # neighbours, and no run of pieces goes on from one board to the next.
+    starts = np.flatnonzero(np.concatenate(([True], flat[1:] != flat[:-1])))
+    run_counts = np.diff(np.append(starts, flat.size))
+    run_pieces = flat[starts]
+    counts, pieces = run_counts[1:-1], run_pieces[1:-1]
+    board_numbers = starts[1:-1] // vector.lines.size
+    prev_empty = run_pieces[:-2] == EMPTY
+    next_empty = run_pieces[2:] == EMPTY
+    mult = prev_empty.astype(np.int64) + next_empty
+    total_empty = (np.where(prev_empty, run_counts[:-2], 0) +
+                   np.where(next_empty, run_counts[2:], 0))
+
+    piece_move = AI if ai_move else PLAYER
+    mine = pieces == piece_move
+    threat = (((mult > 0) & (counts == win_count - 1) & mine) |
+              ((mult > 1) & (counts == win_count - 1)) |
+              ((mult > 1) & (counts == win_count - 2) & mine &
+               (total_empty > 2)))
+    mult = np.where(threat, mult + 1000, mult)
+    mult[total_empty + counts < win_count] = 0
+    values = counts * mult
+    values = np.where(pieces == AI, values,
+                      np.where(pieces == PLAYER, -values, 0))
+    totals = np.zeros(len(boards), dtype=np.int64)
+    np.add.at(totals, board_numbers, values)
+    return totals.tolist()